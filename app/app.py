@@ -1,16 +1,10 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file, abort
+from flask import Flask, request, jsonify, send_from_directory, send_file, abort, g
 from flask_cors import CORS, cross_origin
 import os
 import base64
 import mimetypes
 
-from infrastructure.providers.app_container import AppContainer
-from infrastructure.providers.llm_provider import LLMProvider
-from infrastructure.providers.assistant_provider import AssistantProvider
-from infrastructure.providers.service_provider import ServiceProvider
-from infrastructure.providers.db_provider import DBProvider
-from infrastructure.providers.repository_provider import RepositoryProvider
-from infrastructure.providers.client_provider import ClientProvider
+from infrastructure.providers.bootstrap import create_container
 from ui.routes.routes import register_routes
 from infrastructure.config.config import get_env
 from threading import Thread
@@ -24,32 +18,37 @@ backend_ac_url = get_env("BACKEND_AC_API_URL")
 CORS(app, origins=[frontend_url], resources={r"/*": {"origins": frontend_url}})
 app.config["CORS_HEADERS"] = "Content-Type"
 
-# Providers de la aplicación
-providers = [
-    LLMProvider(),
-    AssistantProvider(),
-    ServiceProvider(),
-    DBProvider(),
-    RepositoryProvider(),
-    ClientProvider(),
-]
-
-container = AppContainer(providers)
-container.initialize_services()
+container = create_container()
 
 register_routes(app, container)
 
+
+# Los servicios "scoped" del contenedor viven lo que dura una petición.
+@app.before_request
+def open_container_scope():
+    g.container_scope = container.begin_scope()
+
+
+@app.teardown_request
+def close_container_scope(exception=None):
+    token = g.pop("container_scope", None)
+    if token is not None:
+        container.end_scope(token)
+
+
 def messages_expiration_listener():
     listener_service = container.make("messages_expiration_listener_service")
     listener_service.execute()
 
 if __name__ == "__main__":
-    # # 🔁 Iniciar hilo antes de correr Flask.
-    thread = Thread(target=messages_expiration_listener, daemon=True)
-    thread.start()
+    # 🔁 Listener embebido para desarrollo. En producción corre como proceso propio
+    # (app/listener.py) con LISTENER_EMBEDDED=false.
+    if get_env("LISTENER_EMBEDDED", "true").lower() == "true":
+        thread = Thread(target=messages_expiration_listener, daemon=True)
+        thread.start()
+        print("🧵 Redis messages expiration listener corriendo en segundo plano...")
     print(f"🌐 Frontend URL: {frontend_url} \n")
     print(f"🌐 Backend API AC URL: {backend_ac_url} \n")
-    print("🧵 Redis messages expiration listener corriendo en segundo plano...")
 
     # app.run(debug=False)
     app.run(host="0.0.0.0", port=5000, debug=False)
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict
+import asyncio
 
 
 class ServiceInterface(ABC):
@@ -14,6 +15,17 @@ class ServiceInterface(ABC):
         """
         pass
 
+    async def aexecute(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Async version of `execute`, used by the ASGI routes.
+
+        By default this is a thread offload, not async I/O: the blocking
+        `execute` runs in the event loop's default executor, which frees the
+        loop but holds one of its threads for the whole call. Services with
+        native async I/O override it.
+        """
+        return await asyncio.to_thread(self.execute, *args, **kwargs)
+
     @abstractmethod
     def validate(self, *args, **kwargs):
         """
@@ -0,0 +1,318 @@
+from application.interfaces.service_interface import ServiceInterface
+from infrastructure.workers.keyed_worker_pool import KeyedWorkerPool
+from infrastructure.workers.rate_limiter import RateLimiter
+from infrastructure.workers.redis_job_store import RedisJobStore
+from threading import Thread
+from typing import Any, Dict, Iterator, List
+import asyncio
+import json
+import time
+
+
+class ContactResumeJobService(ServiceInterface):
+    """
+    Batch extraction of contact resumes for CRM backfills.
+
+    `execute` registers a job and returns its id right away; the items run in
+    the background on a bounded worker pool (one key per phone number); every
+    LLM call waits for a token of the rate limiter shared with the
+    RetriverAssistant (one per chunk of a long conversation). Results are appended to the
+    job in Redis as they finish, so any API process can serve `get_job`
+    (polling) or `stream` (Server-Sent Events).
+
+    The items run in the process that received the job: if it dies, the job
+    stays in `running` until it expires. Items that cannot be queued, and
+    results that cannot be stored, mark the job as `failed`.
+    """
+
+    def __init__(
+        self,
+        retreive_user_information_service: ServiceInterface,
+        job_store: RedisJobStore,
+        worker_pool: KeyedWorkerPool,
+        rate_limiter: RateLimiter,
+        max_items: int = 1000,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 5.0,
+        poll_interval_seconds: float = 0.5,
+        keep_alive_seconds: float = 15.0,
+    ) -> None:
+        """
+        :param max_items: Items accepted per job.
+        :param max_retries: Retries of an item rejected by the LLM rate limit.
+        :param rate_limiter: The RetriverAssistant's limiter; paused for every
+            worker after a rate-limit error.
+        :param retry_backoff_seconds: Base pause (doubled per retry) applied to
+            every worker after a rate-limit error.
+        :param poll_interval_seconds: How often `stream` checks for new results.
+        :param keep_alive_seconds: Seconds without results before `stream` sends
+            an SSE comment to keep the connection open.
+        """
+        self.retreive_user_information_service = retreive_user_information_service
+        self.job_store = job_store
+        self.worker_pool = worker_pool
+        self.rate_limiter = rate_limiter
+        self.max_items = max_items
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.keep_alive_seconds = keep_alive_seconds
+
+    def execute(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Create a job for `items` ([{"telefono", "conversation"}]) and start it.
+        :return: The job (id, status and counters).
+        """
+        items = kwargs.get("items")
+        self.validate(items=items)
+
+        job = self.job_store.create("contact_resume", len(items))
+        print(
+            f"📦 Job {job['job_id']}: {len(items)} resúmenes de contacto en cola", "\n"
+        )
+
+        # `submit` bloquea cuando la cola del pool está llena: el reparto va en
+        # su propio hilo para no retener la petición HTTP.
+        Thread(
+            target=self.dispatch,
+            args=(job["job_id"], items),
+            name=f"job-{job['job_id'][:8]}",
+            daemon=True,
+        ).start()
+        return job
+
+    def validate(self, *args, **kwargs):
+        """
+        Validate the items of a job.
+        """
+        items = kwargs.get("items")
+        if not isinstance(items, list) or not items:
+            raise ValueError("items must be a non-empty list.")
+        if len(items) > self.max_items:
+            raise ValueError(f"A job accepts at most {self.max_items} items.")
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(
+                item.get("conversation", []), list
+            ):
+                raise ValueError(
+                    f"items[{index}] must be an object with a conversation list."
+                )
+
+    # ========== Workers ==========
+    def dispatch(self, job_id: str, items: List[dict]) -> None:
+        index = 0
+        try:
+            self.job_store.set_status(job_id, "running")
+            for index, item in enumerate(items):
+                # Misma clave por teléfono: dos items del mismo contacto no corren
+                # a la vez. Sin teléfono, cada item va por su cuenta.
+                key = item.get("telefono") or f"item-{index}"
+                # Cuenta como en curso antes de encolarlo: el stream de un job
+                # fallido no termina mientras queden items en el pool.
+                self.job_store.add_running(job_id)
+                try:
+                    self.worker_pool.submit(key, self.process_item, job_id, index, item)
+                except Exception:
+                    self.release_item(job_id)
+                    raise
+        except Exception as e:
+            # Ej. el pool se cerró: los items sin encolar terminan con error.
+            print(f"❌ Error encolando el job {job_id} desde el item {index}: {e}", "\n")
+            self.fail_job(job_id, f"Items from {index} on could not be queued: {e}")
+            for pending in range(index, len(items)):
+                self.record_result(
+                    job_id,
+                    self.build_result(
+                        pending, items[pending], time.monotonic(), error=f"Not processed: {e}"
+                    ),
+                    running=False,
+                )
+
+    def process_item(self, job_id: str, index: int, item: dict) -> None:
+        started_at = time.monotonic()
+        try:
+            response = self.extract(job_id, index, item)
+            error = self.get_error(response)
+        except Exception as e:
+            print(f"❌ Error en el item {index} del job {job_id}: {e}", "\n")
+            response, error = None, str(e)
+
+        self.record_result(
+            job_id, self.build_result(index, item, started_at, response, error)
+        )
+
+    def extract(self, job_id: str, index: int, item: dict):
+        """Run the extraction of one item, retrying on LLM rate-limit errors."""
+        response = None
+        for attempt in range(self.max_retries + 1):
+            # El token lo toma el asistente en cada llamada al LLM.
+            response = self.retreive_user_information_service.execute(
+                conversation=item.get("conversation", []),
+                telefono=item.get("telefono") or "0000000000",
+            )
+            error = self.get_error(response)
+            if not error or not self.is_rate_limited(error) or attempt == self.max_retries:
+                break
+
+            delay = self.retry_backoff_seconds * (2**attempt)
+            print(
+                f"⏳ Límite de peticiones del LLM (job {job_id}, item {index}); pausa de {delay}s",
+                "\n",
+            )
+            self.rate_limiter.pause(delay)
+        return response
+
+    def build_result(
+        self, index: int, item: dict, started_at: float, response=None, error: str = ""
+    ) -> dict:
+        result = {
+            "index": index,
+            "telefono": item.get("telefono"),
+            "status": "error" if error else "ok",
+            "duration_seconds": round(time.monotonic() - started_at, 3),
+        }
+        if error:
+            result["error"] = error
+        else:
+            result["contact_resume_information"] = response
+        return result
+
+    def record_result(self, job_id: str, result: dict, running: bool = True) -> None:
+        """
+        :param running: The item went through the pool (it counted as running).
+        """
+        try:
+            if self.job_store.add_result(
+                job_id, result, failed=result["status"] == "error", running=running
+            ):
+                print(f"✅ Job {job_id} terminado", "\n")
+        except Exception as e:
+            print(
+                f"❌ No se pudo guardar el resultado del item {result['index']} del job {job_id}: {e}",
+                "\n",
+            )
+            self.fail_job(
+                job_id, f"The result of item {result['index']} could not be stored: {e}"
+            )
+            if running:
+                self.release_item(job_id)
+
+    def release_item(self, job_id: str) -> None:
+        """The item leaves the pool without a stored result."""
+        try:
+            self.job_store.add_running(job_id, -1)
+        except Exception as e:
+            print(f"❌ No se pudo liberar un item del job {job_id}: {e}", "\n")
+
+    def fail_job(self, job_id: str, error: str) -> None:
+        try:
+            self.job_store.fail(job_id, error)
+        except Exception as e:
+            print(f"❌ No se pudo marcar el job {job_id} como fallido: {e}", "\n")
+
+    def get_error(self, response) -> str:
+        """Error of a RetriveUserInformationService response ('' if none)."""
+        if isinstance(response, dict):
+            return str(response.get("error") or "")
+        if not response:
+            return "User resume information not found"
+        # El servicio devuelve el mensaje de error como texto.
+        return str(response) if isinstance(response, str) else ""
+
+    def is_rate_limited(self, error: str) -> bool:
+        error = error.lower()
+        return "429" in error or "rate limit" in error or "rate_limit" in error
+
+    # ========== Results ==========
+    def get_job(self, job_id: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        Status of a job and its results from `offset` on.
+        :return: None if the job does not exist (or expired).
+        """
+        job = self.job_store.get(job_id)
+        if job is None:
+            return None
+
+        results = self.job_store.get_results(job_id, offset, limit)
+        return {
+            "job": job,
+            "results": results,
+            "next_offset": offset + len(results),
+        }
+
+    def stream(self, job_id: str, offset: int = 0) -> Iterator[str]:
+        """
+        Server-Sent Events of a job: one `result` event per finished item (its
+        id is the offset, for Last-Event-ID) and a final `done` event.
+        """
+        idle_since = time.monotonic()
+        while True:
+            events, offset, idle_since, finished = self.next_events(
+                self.poll(job_id, offset), offset, idle_since
+            )
+            yield from events
+            if finished:
+                return
+            time.sleep(self.poll_interval_seconds)
+
+    async def astream(self, job_id: str, offset: int = 0):
+        """
+        Async version of `stream` for the ASGI routes.
+        """
+        idle_since = time.monotonic()
+        while True:
+            events, offset, idle_since, finished = self.next_events(
+                await asyncio.to_thread(self.poll, job_id, offset), offset, idle_since
+            )
+            for event in events:
+                yield event
+            if finished:
+                return
+            await asyncio.sleep(self.poll_interval_seconds)
+
+    def next_events(self, polled: tuple, offset: int, idle_since: float) -> tuple:
+        """
+        SSE events for one `poll` of `stream`/`astream`.
+        :return: (events, next offset, idle since, whether the stream ended).
+        """
+        job, results, done = polled
+        if job is None:
+            return [self.sse("error", {"message": "Job not found"})], offset, idle_since, True
+
+        events = []
+        for result in results:
+            events.append(self.sse("result", result, event_id=offset))
+            offset += 1
+        if results:
+            idle_since = time.monotonic()
+
+        if done:
+            events.append(self.sse("done", job))
+            return events, offset, idle_since, True
+
+        if time.monotonic() - idle_since >= self.keep_alive_seconds:
+            idle_since = time.monotonic()
+            events.append(": keep-alive\n\n")
+        return events, offset, idle_since, False
+
+    def poll(self, job_id: str, offset: int) -> tuple:
+        """(job, new results, whether every result was read)."""
+        job = self.job_store.get(job_id)
+        if job is None:
+            return None, [], False
+
+        results = self.job_store.get_results(job_id, offset)
+        read = offset + len(results)
+        # Un job fallido puede no llegar a `total`: termina con lo ya guardado
+        # cuando el pool ya no tiene items suyos en curso.
+        finished = job["status"] == "completed" or (
+            job["status"] == "failed" and job["running"] <= 0
+        )
+        done = finished and read >= job["completed"] + job["failed"]
+        return job, results, done
+
+    def sse(self, event: str, data: dict, event_id: int = None) -> str:
+        message = f"event: {event}\n"
+        if event_id is not None:
+            message += f"id: {event_id}\n"
+        return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
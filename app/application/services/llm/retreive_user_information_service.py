@@ -34,6 +34,21 @@ class RetriveUserInformationService(ServiceInterface):
             print(f"An error occurred while processing the conversation: {e}", "\n")
             return f"An error occurred while processing the conversation: {str(e)}"
 
+    async def aexecute(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Async version of `execute` for the ASGI routes; the assistant awaits
+        the LLM natively (no worker thread).
+        """
+        try:
+            conversation = kwargs.get("conversation")
+            telefono = kwargs.get("telefono", "0000000000")
+            return await self.retriver_assistant.ainvoke(
+                conversation=conversation, telefono=telefono
+            )
+        except Exception as e:
+            print(f"An error occurred while processing the conversation: {e}", "\n")
+            return f"An error occurred while processing the conversation: {str(e)}"
+
     def validate(self, *args, **kwargs):
         """
         Validate the service parameters.
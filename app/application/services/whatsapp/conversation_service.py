@@ -4,6 +4,7 @@ from application.interfaces.service_interface import ServiceInterface
 from domain.assistants.interfaces.llm_assistant_interface import LlmAssistantInterface
 from domain.whatsapp.entities.langraph_state import LangGraphState
 from langgraph.graph import StateGraph
+from domain.whatsapp.entities.deadline import Deadline
 
 
 class ConversationService(ServiceInterface):
@@ -20,10 +21,11 @@ class ConversationService(ServiceInterface):
         langraph_state: LangGraphState,
         user_phone,
         user_message,
+        deadline: Deadline = None,
     ) -> Dict[str, Any]:
         "Execute the conversation service with the provided user_message."
         return self.init_or_continue_conversation(
-            builder_state, langraph_state, user_phone, user_message
+            builder_state, langraph_state, user_phone, user_message, deadline
         )
 
     def init_or_continue_conversation(
@@ -32,6 +34,7 @@ class ConversationService(ServiceInterface):
         langraph_state: LangGraphState,
         user_phone: str,
         user_message: str,
+        deadline: Deadline = None,
     ):
         "Initialize or continue a conversation."
         print(f"🔔 Processing conversation with message: {user_message}", "\n")
@@ -46,6 +49,7 @@ class ConversationService(ServiceInterface):
                 user_phone=user_phone,
                 language="Español",
                 user_message=user_message,
+                deadline=deadline,
             )
 
             return response
@@ -1,12 +1,22 @@
 from application.interfaces.service_interface import ServiceInterface
 from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
-import re as regex
+from threading import Event, Thread
+from contextlib import contextmanager
+import time
 from domain.whatsapp.helpers.wp_helper import get_message_format
 from domain.whatsapp.entities.langraph_state import LangGraphState
+from domain.whatsapp.entities.deadline import Deadline
 from langgraph.graph import StateGraph
 from domain.whatsapp.interfaces.whatsapp_repository_interface import (
     WhatsappRepositoryInterface,
 )
+from infrastructure.interfaces.debounce_scheduler_interface import (
+    DebounceSchedulerInterface,
+)
+from infrastructure.workers.keyed_worker_pool import KeyedWorkerPool
+from infrastructure.workers.redis_stream_queue import RedisStreamQueue
+from infrastructure.metrics.prometheus_metrics import PrometheusMetrics
+from infrastructure.clients.whatsapp_client import DeliveryUnknownError
 
 
 class MessagesExpirationListenerService(ServiceInterface):
@@ -19,120 +29,325 @@ class MessagesExpirationListenerService(ServiceInterface):
         builder_state: StateGraph,
         langraph_state: LangGraphState,
         whatsapp_repository: WhatsappRepositoryInterface,
+        worker_pool: KeyedWorkerPool,
+        debounce_scheduler: DebounceSchedulerInterface,
+        memory_queue: RedisStreamQueue,
+        poll_interval_seconds: float = 0.5,
+        claim_batch_size: int = 10,
+        retry_delay_seconds: int = 5,
+        metrics: PrometheusMetrics = None,
+        turn_budget_seconds: float = 45,
+        lease_heartbeat_seconds: float = 60,
     ) -> None:
+        """
+        :param turn_budget_seconds: Presupuesto de cada turno, desde que se vacía
+            el buffer hasta el envío de las respuestas.
+        :param lease_heartbeat_seconds: Cada cuánto se renueva el lease de una
+            conversación en proceso (menos que el lease del scheduler).
+        """
         self.redis_connection = redis_connection
         self.conversation_service = conversation_service
         self.send_message_service = send_message_service
         self.builder_state = builder_state
         self.langraph_state = langraph_state
         self.whatsapp_repository = whatsapp_repository
+        self.worker_pool = worker_pool
+        self.debounce_scheduler = debounce_scheduler
+        self.memory_queue = memory_queue
+        self.poll_interval_seconds = poll_interval_seconds
+        self.claim_batch_size = claim_batch_size
+        self.retry_delay_seconds = retry_delay_seconds
+        self.metrics = metrics or PrometheusMetrics()
+        self.turn_budget_seconds = turn_budget_seconds
+        self.lease_heartbeat_seconds = lease_heartbeat_seconds
+        self.stop_event = Event()
 
         self.init_redis_connection()
-        self.pubsub = self.redis_connection.get_connection().pubsub()
-        self.subscribe_to_expired_events()
 
     def start_listener(self) -> None:
-        print("🟢 Escuchando expiraciones en Redis...", "\n")
-
-        for message in self.pubsub.listen():
-            if message["type"] != "pmessage":
+        print("🟢 Escuchando conversaciones pendientes en el scheduler...", "\n")
+        self.stop_event.clear()
+        self.worker_pool.start()
+        # Persiste las memorias de los turnos fuera del camino de la respuesta.
+        self.memory_queue.start()
+
+        while not self.stop_event.is_set():
+            try:
+                # Re-entrega las conversaciones cuyo consumidor murió o excedió su lease.
+                for phone_number in self.debounce_scheduler.requeue_expired():
+                    print(f"♻️ Re-entregando conversación de {phone_number}", "\n")
+
+                # Solo se reclama lo que un worker puede empezar ya: el lease no
+                # corre mientras la conversación espera en la cola del pool.
+                claimed = self.debounce_scheduler.claim_due_with_times(
+                    min(self.claim_batch_size, self.worker_pool.idle_workers())
+                )
+            except Exception as e:
+                print(f"❌ Error consultando el scheduler: {e}", "\n")
+                self.stop_event.wait(self.poll_interval_seconds)
                 continue
 
-            expired_key = message["data"].decode()
-            print(f"🔔 Clave expirada: {expired_key}", "\n")
+            for phone_number, due_at, token in claimed:
+                # Cada número se procesa en orden en su propia cola; números distintos en paralelo.
+                self.worker_pool.submit(
+                    phone_number,
+                    self.process_due_conversation,
+                    phone_number,
+                    due_at,
+                    token,
+                )
+                print(
+                    f"📥 Conversación de {phone_number} encolada. Stats: {self.worker_pool.stats()}",
+                    "\n",
+                )
 
-            match = regex.match(r"whatsapp:timer:(.+)", expired_key)
+            if not claimed:
+                self.stop_event.wait(self.poll_interval_seconds)
 
-            if not match:
-                continue
+        self.memory_queue.stop()
+        print("🔴 Listener detenido.", "\n")
 
-            phone_number = match.group(1)
-            list_key = f"whatsapp:buffer:{phone_number}"
-            print(
-                f"🔍 Procesando mensajes acumulados para el usuario: {list_key}", "\n"
+    def stop(self) -> None:
+        """
+        Stop claiming new conversations. The ones already claimed keep running
+        in the worker pool.
+        """
+        self.stop_event.set()
+
+    def process_due_conversation(
+        self, phone_number: str, due_at: float = None, token: str = None
+    ) -> None:
+        """
+        Procesa una conversación reclamada y la confirma (ack) en el scheduler.
+        Si falla, se libera para un nuevo intento.
+
+        :param due_at: Momento en que terminó la ventana de debounce; lo que pasa
+            desde entonces hasta que empieza el proceso es la espera de la conversación.
+        :param token: Token del claim: el lease se renueva mientras dura el
+            turno, y el ack/nack no aplica si otro consumidor ya la tomó.
+        """
+        if due_at is not None:
+            self.metrics.observe_stage("debounce_wait", max(0.0, time.time() - due_at))
+
+        try:
+            with self.metrics.measure("turn"), self.lease_heartbeat(phone_number, token):
+                self.process_conversation(phone_number)
+        except Exception as e:
+            print(f"❌ Error procesando conversación de {phone_number}: {e}", "\n")
+            self.metrics.count_turn("error")
+            # Si ya no se reintenta, los mensajes en vuelo pasan a la lista de
+            # descartados junto con el ack (el próximo turno no los repite).
+            self.debounce_scheduler.nack(
+                phone_number,
+                self.retry_delay_seconds,
+                on_drop=lambda pipeline: self.whatsapp_repository.dead_letter_message_buffer(
+                    phone_number, pipeline
+                ),
+                token=token,
             )
+            raise e
 
-            # Verificamos si el usuario existe en la base de datos.
-            user = self.whatsapp_repository.get_contact_by_number(phone_number)
-            if user:
-                print(
-                    f"User to respond format_message found: ✅ {user['phone_number']}",
-                    "\n",
-                )
+        self.metrics.count_turn("ok")
+        self.debounce_scheduler.ack(phone_number, token=token)
 
-            # Get messages from Redis list
-            messages = self.get_messages_from_redis(list_key, phone_number)
+    @contextmanager
+    def lease_heartbeat(self, phone_number: str, token: str = None):
+        """
+        Renueva el lease de la conversación cada `lease_heartbeat_seconds`
+        mientras se procesa el bloque.
+        """
+        if token is None:
+            yield
+            return
+
+        done = Event()
+
+        def renew() -> None:
+            while not done.wait(self.lease_heartbeat_seconds):
+                try:
+                    if not self.debounce_scheduler.extend_lease(phone_number, token):
+                        print(f"⚠️ Se perdió el lease de {phone_number}", "\n")
+                        return
+                except Exception as e:
+                    print(f"❌ Error renovando el lease de {phone_number}: {e}", "\n")
+
+        heartbeat = Thread(target=renew, name=f"lease-{phone_number}", daemon=True)
+        heartbeat.start()
+        try:
+            yield
+        finally:
+            done.set()
 
-            # Obtenemos los mensajes acumulados para el número de teléfono.
-            accumulated_messages = self.get_accumulated_messages(
-                phone_number, messages
+    def process_conversation(self, phone_number: str) -> None:
+        """
+        Procesa los mensajes acumulados de un número de teléfono: IA, persistencia y envío.
+        """
+        print(f"🔍 Procesando mensajes acumulados para el usuario: {phone_number}", "\n")
+
+        # Verificamos si el usuario existe en la base de datos (o lo creamos).
+        with self.metrics.measure("contact_lookup"):
+            user = self.resolve_contact(phone_number)
+
+        # Get messages from Redis list
+        with self.metrics.measure("buffer_drain"):
+            messages, new_messages = self.get_messages_from_redis(phone_number)
+
+        # Los mensajes del usuario se guardan una sola vez, al sacarlos del
+        # buffer: un reintento del turno no los vuelve a escribir.
+        if new_messages:
+            print(f"🫙 Storing user messages... {phone_number}", "\n")
+            with self.metrics.measure("message_persist"):
+                self.save_messages_user(phone_number, user, new_messages)
+
+        # El presupuesto del turno empieza al vaciar el buffer.
+        deadline = Deadline(self.turn_budget_seconds)
+        inflight_count = len(messages)
+
+        # Un intento anterior ya generó las respuestas: se envían las que
+        # faltan sin volver a llamar al LLM, y solo lo que llegó después se
+        # responde como un turno nuevo.
+        replies, sent, answered = self.whatsapp_repository.get_pending_replies(
+            phone_number
+        )
+        if replies:
+            print(
+                f"♻️ Reanudando el envío a {phone_number}: {sent}/{len(replies)} respuestas enviadas",
+                "\n",
             )
+            self.deliver_replies(phone_number, user, replies, sent, deadline)
+            if sent < len(replies):
+                self.enqueue_memory(
+                    phone_number,
+                    self.get_accumulated_messages(phone_number, messages[:answered]),
+                    {"responses": replies},
+                )
+            messages = messages[answered:]
 
-            if accumulated_messages:
-                print(f"🫙 Storing user messages... {phone_number}", "\n")
-                self.save_messages_user(phone_number, user, messages)
+        # Obtenemos los mensajes acumulados para el número de teléfono.
+        accumulated_messages = self.get_accumulated_messages(phone_number, messages)
 
-                # Ejecutamos conversación (IA)
+        if accumulated_messages:
+            # Ejecutamos conversación (IA)
+            with self.metrics.measure("conversation"):
                 response_content = self.conversation_service.execute(
                     self.builder_state,
                     self.langraph_state,
                     phone_number,
                     accumulated_messages,
+                    deadline,
                 )
 
-                print(
-                    f"🤖 Response content para {phone_number}: {response_content}",
-                    "\n",
-                )
+            print(
+                f"🤖 Response content para {phone_number}: {response_content}",
+                "\n",
+            )
 
-                format_messages = []
-                for response in response_content["responses"]:
-                    print(
-                        "🔗 Formateando mensaje para WhatsApp...",
-                        response,
-                        "\n",
-                    )
-                    # Formatear el mensaje para enviar por WhatsApp
-                    format_message = get_message_format(
-                        format_type=response["format_type"],
-                        phone_number=phone_number,
-                        response=response["response"],
-                    )
+            # Se guardan antes de enviar: si el turno falla a mitad del envío,
+            # el reintento sigue desde la primera respuesta sin entregar.
+            replies = response_content["responses"]
+            self.whatsapp_repository.save_pending_replies(
+                phone_number, replies, answered=inflight_count
+            )
+            self.deliver_replies(phone_number, user, replies, 0, deadline)
 
-                    # Save assistant response in the database
-                    self.whatsapp_repository.save_message(
-                        user, "ASSISTANT", response["response"]
-                    )
+            # Guardar la memoria del turno después de responder (en segundo plano).
+            self.enqueue_memory(phone_number, accumulated_messages, response_content)
 
-                    format_messages.append(format_message)
+        # Confirmar los mensajes procesados (los que llegaron después siguen en el buffer)
+        self.whatsapp_repository.ack_message_buffer(phone_number)
 
+    def deliver_replies(
+        self, phone_number: str, user: dict, replies: list, sent: int, deadline: Deadline
+    ) -> None:
+        """
+        Envía las respuestas desde la posición `sent`. Cada una se marca como
+        enviada y se guarda en el historial (write-behind) solo después de
+        entregarla.
+
+        El envío se espera dentro del worker (ya ordenado por teléfono, no
+        bloquea a otros usuarios): si una falla, el error sube y el scheduler
+        reintenta el turno, que retoma desde esa respuesta.
+        """
+        with self.metrics.measure("whatsapp_send"):
+            for response in replies[sent:]:
+                # Formatear el mensaje para enviar por WhatsApp
+                format_message = get_message_format(
+                    format_type=response["format_type"],
+                    phone_number=phone_number,
+                    response=response["response"],
+                )
                 print(
-                    f"📩 Mensajes formateados para {phone_number}: {format_messages}",
+                    f"🔗 Enviando mensaje vía WhatsApp a:  {phone_number}: {format_message}",
                     "\n",
                 )
-                print("=" * 50, "\n")
-                for format_message in format_messages:
-                    print(
-                        f"🔗 Enviando mensaje vía WhatsApp a:  {phone_number}: {format_message}",
-                        "\n",
-                    )
-                    # === send response via whatsapp ===
+                try:
                     self.send_message_service.execute(
                         phone_number=phone_number,
                         format_message=format_message,
+                        deadline=deadline,
                     )
+                except DeliveryUnknownError as e:
+                    # Pudo haberse entregado: reenviarlo podría duplicarlo.
+                    print(f"⚠️ Entrega sin confirmar a {phone_number}: {e}", "\n")
+                    self.metrics.count_degraded("send_unconfirmed")
+
+                self.whatsapp_repository.mark_reply_sent(phone_number)
+                # Save assistant response in the database (write-behind)
+                self.whatsapp_repository.queue_message(
+                    user, "ASSISTANT", response["response"]
+                )
 
-                # Limpiar la lista después de procesar
-                self.redis_connection.get_connection().delete(list_key)
+    def enqueue_memory(
+        self, phone_number: str, user_message: str, response_content: dict
+    ) -> None:
+        """
+        Encola la memoria del turno para el worker de memorias. Un fallo aquí no
+        afecta la respuesta ya enviada.
+        """
+        if response_content.get("error"):
+            return
+
+        try:
+            memory = self.langraph_state.build_memory(
+                phone_number, user_message, response_content["responses"]
+            )
+            if memory:
+                self.memory_queue.put(memory)
+        except Exception as e:
+            print(f"❌ Error encolando la memoria de {phone_number}: {e}", "\n")
+
+    def resolve_contact(self, phone_number: str) -> dict:
+        """
+        Obtiene el contacto del número de teléfono, creándolo si aún no existe.
+        (El webhook en modo enqueue-only no resuelve contactos).
+        """
+        user = self.whatsapp_repository.get_contact_by_number(phone_number)
+
+        if user:
+            print(
+                f"User to respond format_message found: ✅ {user['phone_number']}",
+                "\n",
+            )
+            return user
+
+        user = self.whatsapp_repository.save_contact(phone_number)
+        if not user:
+            raise Exception(f"No se pudo crear el contacto {phone_number}. ❌")
+
+        print(f"New user created: ✅ {user}", "\n")
+        return user
 
-    def get_messages_from_redis(self, list_key, phone_number):
+    def get_messages_from_redis(self, phone_number) -> tuple:
         """
-        Obtiene los mensajes acumulados de Redis para un número de teléfono.
+        Obtiene (y toma de forma atómica) los mensajes acumulados de Redis para un número de teléfono.
+
+        :return: (mensajes en vuelo, los que se tomaron del buffer en esta llamada).
         """
-        messages = self.redis_connection.get_connection().lrange(list_key, 0, -1)
-        messages = [message.decode() for message in messages]
+        messages, new_messages = self.whatsapp_repository.drain_message_buffer(
+            phone_number
+        )
         print(f"📝 Mensajes acumulados para {phone_number}: {messages}", "\n")
-        return messages
+        return messages, new_messages
 
     def get_accumulated_messages(self, phone_number, messages) -> str:
         """
@@ -159,7 +374,7 @@ class MessagesExpirationListenerService(ServiceInterface):
         if messages:
             for message in messages:
 
-                self.whatsapp_repository.save_message(
+                self.whatsapp_repository.queue_message(
                     user,
                     "USER",
                     {
@@ -169,10 +384,7 @@ class MessagesExpirationListenerService(ServiceInterface):
 
     def execute(self) -> None:
         """
-        Execute the service to listen for message expirations for a specific user.
-        """
-        """
-        Start the listener for message expirations.
+        Execute the service to listen for due conversations.
         """
         self.start_listener()
 
@@ -192,7 +404,3 @@ class MessagesExpirationListenerService(ServiceInterface):
             raise e
 
         print("🔗 Conexión a Redis establecida correctamente.")
-
-    def subscribe_to_expired_events(self) -> None:
-        print("🔔 Suscribiéndose a eventos de expiración de claves en Redis...", "\n")
-        self.pubsub.psubscribe("__keyevent@0__:expired")
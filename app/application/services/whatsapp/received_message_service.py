@@ -1,5 +1,6 @@
 from application.interfaces.service_interface import ServiceInterface
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+import asyncio
 from flask import jsonify
 from domain.whatsapp.helpers.wp_helper import (
     get_data_user,
@@ -20,9 +21,16 @@ class ReceivedMessageService(ServiceInterface):
         self,
         conversation_service: ServiceInterface,
         whatsapp_repository: WhatsappRepositoryInterface,
+        enqueue_only: bool = False,
     ) -> None:
+        """
+        :param enqueue_only: When True the webhook only validates the payload and
+            appends the message to the Redis buffer. Contact resolution is left to
+            the listener, so the webhook never waits on the backend.
+        """
         self.conversation_service = conversation_service
         self.whatsapp_repository = whatsapp_repository
+        self.enqueue_only = enqueue_only
 
     def execute(
         self,
@@ -31,34 +39,63 @@ class ReceivedMessageService(ServiceInterface):
         """
         Process the received message data.
         """
+        body, status = self.process(data)
+        return jsonify(body), status
+
+    async def aexecute(self, data: dict) -> Dict[str, Any]:
+        """
+        Async version of `execute` for the ASGI routes. Returns the body; its
+        "status" is the HTTP status.
+
+        A thread offload: the Redis (and, without `enqueue_only`, backend)
+        calls are the blocking ones of `process`, run in the event loop's
+        default executor. With `enqueue_only` that is one short Redis round trip.
+        """
+        body, _ = await asyncio.to_thread(self.process, data)
+        return body
+
+    def process(self, data: dict) -> Tuple[Dict[str, Any], int]:
+        """
+        Validate the payload and buffer the message. Returns (body, status).
+        """
         try:
+            if self.enqueue_only and not self.validate(data):
+                # Eventos sin mensaje (ej. estados de entrega): se confirman para evitar reintentos de Meta.
+                return {"message": "Evento ignorado.", "status": 200}, 200
+
             data_user = get_data_user(data)
             message = get_message_user(data_user["type"], data_user)
             number = get_number_user(data_user)
 
-            user = self.whatsapp_repository.get_contact_by_number(number)
-            
-            if user:
-                print(f"User found: ✅ {user}", "\n")
+            if not self.enqueue_only:
+                user = self.whatsapp_repository.get_contact_by_number(number)
 
-            if not user:
-                user = self.whatsapp_repository.save_contact(number)
-                print(f"New user created: ✅ {user}", "\n")
+                if user:
+                    print(f"User found: ✅ {user}", "\n")
+
+                if not user:
+                    user = self.whatsapp_repository.save_contact(number)
+                    print(f"New user created: ✅ {user}", "\n")
 
             self.whatsapp_repository.add_message_to_buffer(number, message)
 
             return (
-                jsonify(
-                    {
-                        "message": f"Mensaje: '{message}' recibido con éxito. ✅",
-                        "status": 200,
-                    }
-                ),
+                {
+                    "message": f"Mensaje: '{message}' recibido con éxito. ✅",
+                    "status": 200,
+                },
                 200,
             )
         except Exception as e:
             print(f"Error processing received message: {e}", "\n")
-            return jsonify({"error": str(e), "status": 500}), 500
+            return {"error": str(e), "status": 500}, 500
 
-    def validate(self, *args, **kwargs):
-        return super().validate(*args, **kwargs)
+    def validate(self, data: dict) -> bool:
+        """
+        Check the webhook payload carries a user message.
+        """
+        try:
+            data_user = get_data_user(data)
+            return bool(data_user.get("from")) and bool(data_user.get("type"))
+        except (KeyError, IndexError, TypeError):
+            return False
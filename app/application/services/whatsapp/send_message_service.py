@@ -1,5 +1,6 @@
 from application.interfaces.service_interface import ServiceInterface
 from infrastructure.interfaces.whatsapp_client_interface import WhatsappClientInterface
+from domain.whatsapp.entities.deadline import Deadline
 
 
 class SendMessageService(ServiceInterface):
@@ -16,21 +17,75 @@ class SendMessageService(ServiceInterface):
         self,
         phone_number: str,
         format_message: dict,
+        wait: bool = True,
+        deadline: Deadline = None,
     ) -> None:
+        """
+        Send a message to a WhatsApp number.
+
+        :param wait: When False the message is queued in the client's sender pool
+            (order per recipient is kept) and the call returns immediately.
+        :param deadline: Turn deadline; the send uses the remaining budget.
+        """
         try:
             print(f"🔔 Enviando mensaje a {phone_number}...", "\n")
 
-            self.whatsapp_client.send_message(format_message)
+            if not wait:
+                future = self.whatsapp_client.send_message_async(
+                    format_message, deadline
+                )
+                future.add_done_callback(
+                    lambda done: self.log_async_result(phone_number, done)
+                )
+                return {
+                    "message": f"Mensaje a {phone_number} encolado para envío.",
+                    "status": 202,
+                }
+
+            result = self.whatsapp_client.send_message(format_message, deadline)
 
             print(f"✅ Mensaje enviado a {phone_number} con éxito.", "\n")
             return {
                 "message": f"Mensaje enviado a {phone_number} con éxito.",
+                "message_id": result.get("message_id") if result else None,
                 "status": 200,
             }
         except Exception as e:
             print(f"❌ Error al enviar mensaje a {phone_number}: {e}", "\n")
             raise e
 
+    async def aexecute(self, phone_number: str, format_message: dict) -> dict:
+        """
+        Async version of `execute` for the ASGI routes, with the async HTTP
+        client of the WhatsApp client (no worker thread).
+        """
+        try:
+            print(f"🔔 Enviando mensaje a {phone_number}...", "\n")
+
+            result = await self.whatsapp_client.asend_message(format_message)
+
+            print(f"✅ Mensaje enviado a {phone_number} con éxito.", "\n")
+            return {
+                "message": f"Mensaje enviado a {phone_number} con éxito.",
+                "message_id": result.get("message_id") if result else None,
+                "status": 200,
+            }
+        except Exception as e:
+            print(f"❌ Error al enviar mensaje a {phone_number}: {e}", "\n")
+            raise e
+
+    def log_async_result(self, phone_number: str, future) -> None:
+        """
+        Log the outcome of a message sent in the background.
+        """
+        if future.exception():
+            print(
+                f"❌ Error al enviar mensaje a {phone_number}: {future.exception()}",
+                "\n",
+            )
+        else:
+            print(f"✅ Mensaje enviado a {phone_number} con éxito.", "\n")
+
     def validate(self, *args, **kwargs) -> bool:
         """
         Validate the input for the service.
@@ -9,6 +9,19 @@ class VerifyTokenService(ServiceInterface):
         """
         Execute the service logic to verify a token.
         """
+        return jsonify(self.verify(token, challenge)), 200
+
+    async def aexecute(self, token: str, challenge: str) -> Dict[str, Any]:
+        """
+        Async version of `execute` for the ASGI routes. Returns the body; its
+        "status" is the HTTP status. No I/O: it runs on the event loop.
+        """
+        return self.verify(token, challenge)
+
+    def verify(self, token: str, challenge: str) -> Dict[str, Any]:
+        """
+        Verify the webhook token sent by Meta.
+        """
         print(
             f"Executing token verification with token: {token} and challenge: {challenge}"
         )
@@ -19,7 +32,7 @@ class VerifyTokenService(ServiceInterface):
         if token is None or challenge is None or token != accessToken:
             raise Exception("Token verification failed.")
 
-        return jsonify({"message": "Token verified successfully.", "status": 200}), 200
+        return {"message": "Token verified successfully.", "status": 200}
 
     
     def validate(self, token: str) -> bool:
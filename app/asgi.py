@@ -0,0 +1,42 @@
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from infrastructure.providers.bootstrap import create_container
+from ui.routes.asgi_routes import register_asgi_routes
+from infrastructure.config.config import get_env
+
+# ASGI entry point: same routes as app.py served by async handlers.
+# Run with: uvicorn asgi:app --app-dir app --host 0.0.0.0 --port 5000
+app = FastAPI()
+
+frontend_url = get_env("APP_FRONTED_URL")
+
+# Configurar CORS con la URL del frontend
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[frontend_url] if frontend_url else [],
+    allow_methods=["*"],
+    allow_headers=["Content-Type"],
+)
+
+container = create_container()
+
+register_asgi_routes(app, container)
+
+
+# Los servicios "scoped" del contenedor viven lo que dura una petición.
+@app.middleware("http")
+async def container_scope(request, call_next):
+    with container.scope():
+        return await call_next(request)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "asgi:app",
+        host="0.0.0.0",
+        port=int(get_env("APP_INTERNAL_PORT", 5000)),
+        workers=int(get_env("ASGI_WORKERS", 1)),
+    )
@@ -0,0 +1,64 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class PaisInfo(BaseModel):
+    id: int = 19
+    codigo_pais: str = "+57"
+    show_data: str = "Colombia"
+
+
+# Valores por defecto del CRM para los campos que no aparecen en la conversación.
+USER_INFO_DEFAULTS = {
+    "tipo_documento": "CC",
+    "direccion": "No registra",
+    "pais_id": PaisInfo().model_dump(),
+    "telefono": "0000000000",
+    "email": "noregistra@gmail.com",
+}
+
+
+class UserInfo(BaseModel):
+    """Datos del usuario extraídos de una conversación (None = no aparece)."""
+
+    tipo_documento: Optional[str] = Field(None, description="Tipo de documento, ej. 'CC'.")
+    nro_documento: Optional[str] = Field(None, description="Número de documento.")
+    primer_nombre: Optional[str] = Field(None, description="Primer nombre.")
+    segundo_nombre: Optional[str] = Field(None, description="Segundo nombre.")
+    primer_apellido: Optional[str] = Field(None, description="Primer apellido.")
+    segundo_apellido: Optional[str] = Field(None, description="Segundo apellido.")
+    nombre_completo: Optional[str] = Field(None, description="Nombre completo.")
+    direccion: Optional[str] = Field(None, description="Dirección.")
+    pais_id: Optional[PaisInfo] = Field(None, description="País del usuario.")
+    telefono: Optional[str] = Field(None, description="Número de teléfono.")
+    email: Optional[str] = Field(None, description="Correo electrónico.")
+    fecha_nacimiento: Optional[str] = Field(None, description="Fecha de nacimiento, formato YYYY-MM-DD.")
+    fecha_consulta: Optional[str] = Field(None, description="Fecha programada para la consulta, formato YYYY-MM-DD.")
+    hora_inicio: Optional[str] = Field(None, description="Hora de inicio de la consulta, ej. '15:20:00'.")
+    hora_fin: Optional[str] = Field(None, description="Hora de fin de la consulta, ej. '16:20:00'.")
+    tipo_consulta: Optional[str] = Field(None, description="Tipo de consulta: PRESENCIAL ó VIRTUAL.")
+
+
+class ContactResume(BaseModel):
+    """Resumen de contacto que devuelve el RetriverAssistant."""
+
+    user_info: UserInfo = Field(default_factory=UserInfo)
+
+    def merge(self, other: "ContactResume") -> "ContactResume":
+        """
+        Combina dos extracciones: lo que trae `other` (un tramo posterior de la
+        conversación) reemplaza lo anterior, ej. una consulta reagendada.
+        """
+        merged = self.user_info.model_dump()
+        merged.update(other.user_info.model_dump(exclude_none=True))
+        return ContactResume(user_info=UserInfo(**merged))
+
+    def to_response(self, telefono: str = None) -> dict:
+        """Dict del endpoint, con los valores por defecto aplicados."""
+        user_info = self.user_info.model_dump()
+        if not user_info["telefono"] and telefono:
+            user_info["telefono"] = telefono
+        for field, default in USER_INFO_DEFAULTS.items():
+            if user_info[field] is None:
+                user_info[field] = default
+        return {"user_info": user_info}
@@ -3,118 +3,105 @@ from langchain.llms.base import LLM
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import Tool, tool
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langchain_core.messages import AIMessage, HumanMessage
 from typing import List
+from threading import Lock
 from domain.whatsapp.entities.langraph_state import LangGraphState
 from domain.whatsapp.entities.chat_state import ChatState
+from domain.assistants.entities.prompt_assembler import PromptAssembler
 
 
 class ExecutiveAssistant(LlmAssistantInterface):
 
     def __init__(
         self,
+        checkpointer: BaseCheckpointSaver = None,
     ) -> None:
+        """
+        :param checkpointer: Saves the graph state per phone number, so an
+            interrupted turn resumes from its last completed node.
+        """
         self.prompt_template = None
+        self.checkpointer = checkpointer
+        # The listener workers share the builder_state; only one may compile it.
+        self.graph_lock = Lock()
         # Initialize the Assistant rules.
         self.initialize_assistant()
 
     def initialize_assistant(self) -> None:
         "Initialize the ExecutiveAssistant with necessary prompt_template."
 
-        self.prompt_template = ChatPromptTemplate(
-            [
+        # Prefijo estático (idéntico en todas las peticiones) + bloque dinámico al
+        # final, para aprovechar el prefix caching del proveedor.
+        self.prompt_assembler = PromptAssembler(
+            static_sections=[
                 # Identidad y rol
-                (
-                    "system",
-                    "* Identidad y rol:\n"
-                    "* Eres Bella Sofía, 30 años, asistente virtual comercial del Dr. Andrés Cánchica en Medellín, Colombia.\n",
-                ),
+                "* Identidad y rol:\n"
+                "* Eres Bella Sofía, 30 años, asistente virtual comercial del Dr. Andrés Cánchica en Medellín, Colombia.\n",
                 # Personalidad
-                (
-                    "system",
-                    "* Personalidad:\n"
-                    "* Eres Amable, empática y profesional; inspiras confianza con respuestas breves y directas (usa el mínimo de tokens posible).\n",
-                ),
+                "* Personalidad:\n"
+                "* Eres Amable, empática y profesional; inspiras confianza con respuestas breves y directas (usa el mínimo de tokens posible).\n",
                 # Servicios
-                (
-                    "system",
-                    "* Servicios:\n"
-                    "  1. Consulta/Valoración\n"
-                    "  2. Cirugía estética\n"
-                    "  3. Cirugía reconstructiva\n"
-                    "  4. Mínimamente invasivos (Botox, ácido hialurónico)",
-                ),
+                "* Servicios:\n"
+                "  1. Consulta/Valoración\n"
+                "  2. Cirugía estética\n"
+                "  3. Cirugía reconstructiva\n"
+                "  4. Mínimamente invasivos (Botox, ácido hialurónico)",
                 # Comportamiento
-                (
-                    "system",
-                    "* Comportamiento:\n"
-                    "* Tu objetivo principal es guiar al usuario para gestionar una consulta con el Dr. Andrés Cánchica. Toda la conversación debe estar orientada a llevarlo paso a paso hasta confirmar una fecha de consulta o valoración con su respectivo pago.\n"
-                    "* *Conduce la conversación siguiendo este flujo:* \n"
-                    "  1. Preséntate y pregunta siempre: '¿Con quién tengo el gusto de hablar?'\n"
-                    "  2. Identifica con claridad el interés del usuario (consulta/valoración o cirugía). Confírmalo con él antes de avanzar.\n"
-                    "  3. Aplica los pasos correspondientes según el interés identificado (usa las 'Condiciones y pasos según interés').\n"
-                    "* Importante: haz solo una pregunta a la vez, no te saltes ningún paso, mantén un tono neutral y no emitas juicios.\n",
-                ),
+                "* Comportamiento:\n"
+                "* Tu objetivo principal es guiar al usuario para gestionar una consulta con el Dr. Andrés Cánchica. Toda la conversación debe estar orientada a llevarlo paso a paso hasta confirmar una fecha de consulta o valoración con su respectivo pago.\n"
+                "* *Conduce la conversación siguiendo este flujo:* \n"
+                "  1. Preséntate y pregunta siempre: '¿Con quién tengo el gusto de hablar?'\n"
+                "  2. Identifica con claridad el interés del usuario (consulta/valoración o cirugía). Confírmalo con él antes de avanzar.\n"
+                "  3. Aplica los pasos correspondientes según el interés identificado (usa las 'Condiciones y pasos según interés').\n"
+                "* Importante: haz solo una pregunta a la vez, no te saltes ningún paso, mantén un tono neutral y no emitas juicios.\n",
                 # Condiciones
-                (
-                    "system",
-                    "* Condiciones y pasos según interés:\n"
-                    "**IMPORTANTE:** Este flujo determina cómo debe continuar la conversación. Avanza paso a paso según el interés del usuario:\n"
-                    "  • Si el usuario tiene interés en una *Valoración o Consulta*:\n"
-                    "     Paso 1. Confirma si desea consulta *virtual* ó *presencial*.\n"
-                    "     Paso 2. Ofrece las fechas disponibles para consulta. (usando la tool `get_available_slots`)\n"
-                    "     Paso 3. Cuando elija una fecha (ej. '9:00AM-10:00AM 02-Octubre 2025'), confírmala textualmente. Ejemplo: 'Te confirmo que elegiste la fecha...'. Luego continúa.\n"
-                    "     Paso 4. Realiza todas las preguntas pre-consulta una a una, en orden. **No te saltes ninguna.**\n"
-                    "     Paso 5. Una vez respondidas todas las preguntas pre-consulta, programa la pre-agenda (usando la tool `schedule_pre_consultation`).\n"
-                    "     Paso 6. Confirma si desea proceder con el pago y pregunta su método preferido: *Transferencia Bancolombia* o *Link de pago*.\n"
-                    "     Paso 7. Envía el método de pago elegido.\n"
-                    "     Paso 8. Solicita y comprueba el comprobante de pago.\n"
-                    "  • Si el usuario tiene interés en una *Cirugía*: Debes informarle que es necesario realizar una valoración previa.\n",
-                ),
+                "* Condiciones y pasos según interés:\n"
+                "**IMPORTANTE:** Este flujo determina cómo debe continuar la conversación. Avanza paso a paso según el interés del usuario:\n"
+                "  • Si el usuario tiene interés en una *Valoración o Consulta*:\n"
+                "     Paso 1. Confirma si desea consulta *virtual* ó *presencial*.\n"
+                "     Paso 2. Ofrece las fechas disponibles para consulta. (usando la tool `get_available_slots`)\n"
+                "     Paso 3. Cuando elija una fecha (ej. '9:00AM-10:00AM 02-Octubre 2025'), confírmala textualmente. Ejemplo: 'Te confirmo que elegiste la fecha...'. Luego continúa.\n"
+                "     Paso 4. Realiza todas las preguntas pre-consulta una a una, en orden. **No te saltes ninguna.**\n"
+                "     Paso 5. Una vez respondidas todas las preguntas pre-consulta, programa la pre-agenda (usando la tool `schedule_pre_consultation`).\n"
+                "     Paso 6. Confirma si desea proceder con el pago y pregunta su método preferido: *Transferencia Bancolombia* o *Link de pago*.\n"
+                "     Paso 7. Envía el método de pago elegido.\n"
+                "     Paso 8. Solicita y comprueba el comprobante de pago.\n"
+                "  • Si el usuario tiene interés en una *Cirugía*: Debes informarle que es necesario realizar una valoración previa.\n",
                 # Preguntas previas
-                (
-                    "system",
-                    "* Preguntas Pre-consulta (realízalas una por una) **en este orden y sin omitir ninguna**:\n"
-                    "1. ¿Cuál es tu nombre completo y correo electrónico?\n"
-                    "2. Documento de identidad y fecha de nacimiento.\n"
-                    "3. Cirugía de interés.\n",
-                ),
+                "* Preguntas Pre-consulta (realízalas una por una) **en este orden y sin omitir ninguna**:\n"
+                "1. ¿Cuál es tu nombre completo y correo electrónico?\n"
+                "2. Documento de identidad y fecha de nacimiento.\n"
+                "3. Cirugía de interés.\n",
                 # FAQs
-                (
-                    "system",
-                    "* FAQs:\n"
-                    "  • ¿Valoración virtual? Sí, mismo costo.\n"
-                    "  • ¿Valoración presencial? Sí, en Medellín.\n"
-                    "  • Pagos nacionales? Transferencia Bancolombia.\n"
-                    "  • Pagos fuera del país? Compartimos link de pago.\n"
-                    "  • Duración consulta? 45–60 min.\n"
-                    "  • Costo valoración? 300 000 COP (se abona si hay cirugía). \n"
-                    "  • ¿Qué incluye valoración? Evaluación de tu caso según la cirugía de interés, y respuesta a tus preguntas.\n"
-                    "  • ¿Precios cirugía? Depende de la cirugía y tu caso, se define en la valoración.\n",
-                ),
+                "* FAQs:\n"
+                "  • ¿Valoración virtual? Sí, mismo costo.\n"
+                "  • ¿Valoración presencial? Sí, en Medellín.\n"
+                "  • Pagos nacionales? Transferencia Bancolombia.\n"
+                "  • Pagos fuera del país? Compartimos link de pago.\n"
+                "  • Duración consulta? 45–60 min.\n"
+                "  • Costo valoración? 300 000 COP (se abona si hay cirugía). \n"
+                "  • ¿Qué incluye valoración? Evaluación de tu caso según la cirugía de interés, y respuesta a tus preguntas.\n"
+                "  • ¿Precios cirugía? Depende de la cirugía y tu caso, se define en la valoración.\n",
                 # Observaciones finales
-                (
-                    "system",
-                    "* Observaciones:\n"
-                    "  • Puedes usar un lenguaje cercano o coloquial, siempre manteniendo el profesionalismo y respeto.\n"
-                    "  • Si ya identificaste al usuario (nombre e intención), continúa con el flujo sin repetir preguntas innecesarias.\n"
-                    "  • Si el usuario ya indicó una fecha de consulta (ejemplo: '9:00AM-10:00AM 02-Octubre 2025'), confírmala y avanza al siguiente paso sin repetir la oferta de fechas.\n"
-                    "  • Si el usuario ya completó todos los pasos, incluyendo el pago, confirma la cita, agradece su confianza y finaliza la conversación de manera amable.\n"
-                    "  • Si el usuario decide NO realizar el pago en este momento, recuérdale que debe hacerlo con al menos 24 horas de anticipación a la consulta, de lo contrario la cita será cancelada automáticamente.\n"
-                    "  • No estás autorizado a dar precios de cirugías, ni siquiera aproximados. Debes explicar que el valor depende de la evaluación personalizada que se realiza durante la valoración.\n"
-                    "  • Si al momento de programar la consulta en el horario seleccionado por el usuario y este horario ya no está disponible y el usuario desea elegir otro horario, debes volver al Paso 2: Ofrece las fechas disponibles para consulta. (usando la tool `get_available_slots`). Cuando el usuario vuelva a elegir una nueva fecha ya NO hacemos las preguntas pre-consulta sino que continuamos al Paso 5. programa la pre-agenda (usando la tool `schedule_pre_consultation`).\n",
-                ),
-                # Variables de contexto
-                ("system", "* Responde en el lenguaje: {language}.\n"),
-                ("system", "* Teléfono Usuario: {user_phone}.\n"),
-                (
-                    "system",
-                    "* Memorias de conversación entre tú y el usuario relevantes recuperadas: {memories}.\n",
-                ),
-                # Mensaje del usuario
-                ("user", "Mensaje Usuario: {user_message}"),
-            ]
+                "* Observaciones:\n"
+                "  • Puedes usar un lenguaje cercano o coloquial, siempre manteniendo el profesionalismo y respeto.\n"
+                "  • Si ya identificaste al usuario (nombre e intención), continúa con el flujo sin repetir preguntas innecesarias.\n"
+                "  • Si el usuario ya indicó una fecha de consulta (ejemplo: '9:00AM-10:00AM 02-Octubre 2025'), confírmala y avanza al siguiente paso sin repetir la oferta de fechas.\n"
+                "  • Si el usuario ya completó todos los pasos, incluyendo el pago, confirma la cita, agradece su confianza y finaliza la conversación de manera amable.\n"
+                "  • Si el usuario decide NO realizar el pago en este momento, recuérdale que debe hacerlo con al menos 24 horas de anticipación a la consulta, de lo contrario la cita será cancelada automáticamente.\n"
+                "  • No estás autorizado a dar precios de cirugías, ni siquiera aproximados. Debes explicar que el valor depende de la evaluación personalizada que se realiza durante la valoración.\n"
+                "  • Si al momento de programar la consulta en el horario seleccionado por el usuario y este horario ya no está disponible y el usuario desea elegir otro horario, debes volver al Paso 2: Ofrece las fechas disponibles para consulta. (usando la tool `get_available_slots`). Cuando el usuario vuelva a elegir una nueva fecha ya NO hacemos las preguntas pre-consulta sino que continuamos al Paso 5. programa la pre-agenda (usando la tool `schedule_pre_consultation`).\n",
+            ],
+            dynamic_section=(
+                "* Responde en el lenguaje: {language}.\n"
+                "* Teléfono Usuario: {user_phone}.\n"
+                "* Memorias de conversación entre tú y el usuario relevantes recuperadas: {memories}.\n"
+            ),
+            user_section="Mensaje Usuario: {user_message}",
         )
+        self.prompt_template = self.prompt_assembler.build()
 
     def invoke(self, *args, **kwargs) -> dict:
         """
@@ -131,16 +118,44 @@ class ExecutiveAssistant(LlmAssistantInterface):
             langraph_state = kwargs.get("langraph_state")
             user_phone = kwargs.get("user_phone", "")
             user_message = kwargs.get("user_message", "")
+            # Presupuesto del turno: los nodos lo leen de config["configurable"].
+            deadline = kwargs.get("deadline")
+
+            with self.graph_lock:
+                graph = self.create_chat_state_graph(builder_state, langraph_state)
+
+            # El hilo del checkpointer es el teléfono; el template y el deadline
+            # viajan en la configuración (no se guardan en el estado).
+            config = {
+                "configurable": {
+                    "thread_id": user_phone,
+                    "prompt_template": self.prompt_template,
+                    "deadline": deadline,
+                }
+            }
 
-            graph = self.create_chat_state_graph(builder_state, langraph_state)
+            if self.is_interrupted_turn(graph, config, user_message):
+                print(f"♻️ Reanudando el turno interrumpido de {user_phone}", "\n")
+                return graph.invoke(None, config=config)
 
+            # Todos los campos del turno van explícitos: LangGraph omite los que
+            # quedan en un default None y se conservarían los del checkpoint
+            # anterior (ej. `response` o `error`).
             state_obj = ChatState(
-                prompt_template=self.prompt_template,
                 user_phone=user_phone,
                 user_message=user_message,
+                memories=[],
+                memory_tokens=0,
+                prompt_tokens=0,
+                cached_tokens=0,
+                response=None,
+                responses=[],
+                error=None,
+                cache_hit=False,
+                other_input=None,
             )
 
-            response = graph.invoke(state_obj)
+            response = graph.invoke(state_obj, config=config)
 
             return response
         except Exception as e:
@@ -154,6 +169,23 @@ class ExecutiveAssistant(LlmAssistantInterface):
                 }
             ]
 
+    def is_interrupted_turn(self, graph, config: dict, user_message: str) -> bool:
+        """
+        True if the last turn of the thread stopped before END with the same
+        message (the listener re-delivered it after a crash): it is resumed from
+        the last checkpoint instead of running from the start.
+        """
+        if self.checkpointer is None:
+            return False
+
+        try:
+            snapshot = graph.get_state(config)
+        except Exception as e:
+            print(f"❌ Error leyendo el checkpoint del turno: {e}", "\n")
+            return False
+
+        return bool(snapshot.next) and snapshot.values.get("user_message") == user_message
+
     # ========== Create the chat state graph for LangGraph ==========
     def create_chat_state_graph(
         self, builder_state: StateGraph, langraph_state: LangGraphState
@@ -179,6 +211,12 @@ class ExecutiveAssistant(LlmAssistantInterface):
         )
 
         # Add nodes only if they don't exist and graph is not compiled
+        if "consultar_cache" not in existing_nodes:
+            print("➕ Agregando nodo 'consultar_cache'")
+            builder_state.add_node("consultar_cache", langraph_state.check_answer_cache)
+        else:
+            print("⏩ Nodo 'consultar_cache' ya existe")
+
         if "recuperar_memorias" not in existing_nodes:
             print("➕ Agregando nodo 'recuperar_memorias'")
             builder_state.add_node(
@@ -195,28 +233,34 @@ class ExecutiveAssistant(LlmAssistantInterface):
         else:
             print("⏩ Nodo 'generar_respuesta' ya existe")
 
-        if "guardar_memoria" not in existing_nodes:
-            print("➕ Agregando nodo 'guardar_memoria'")
-            builder_state.add_node("guardar_memoria", langraph_state.save_memory)
-        else:
-            print("⏩ Nodo 'guardar_memoria' ya existe")
-
         # Set the entry point only if not set
         if (
             not hasattr(builder_state, "entry_point")
             or builder_state.entry_point is None
         ):
             print("📍 Estableciendo punto de entrada")
-            builder_state.set_entry_point("recuperar_memorias")
+            builder_state.set_entry_point("consultar_cache")
         else:
             print(f"⏩ Punto de entrada ya establecido: {builder_state.entry_point}")
 
         # Define edges between nodes only if not already defined
         existing_edges = getattr(builder_state, "_edges", [])
 
+        # La memoria del turno no es un nodo: el listener la guarda en segundo plano
+        # después de enviar las respuestas.
         recuperar_to_generar = ("recuperar_memorias", "generar_respuesta")
-        generar_to_guardar = ("generar_respuesta", "guardar_memoria")
-        guardar_to_end = ("guardar_memoria", END)
+        generar_to_end = ("generar_respuesta", END)
+
+        # Pregunta frecuente ya respondida → END; si no, flujo normal.
+        if "consultar_cache" not in getattr(builder_state, "branches", {}):
+            print("🔀 Agregando arista condicional: consultar_cache → END | recuperar_memorias")
+            builder_state.add_conditional_edges(
+                "consultar_cache",
+                langraph_state.route_after_cache,
+                {"hit": END, "miss": "recuperar_memorias"},
+            )
+        else:
+            print("⏩ Arista condicional de consultar_cache ya existe")
 
         if recuperar_to_generar not in existing_edges:
             print("🔗 Agregando arista: recuperar_memorias → generar_respuesta")
@@ -224,22 +268,16 @@ class ExecutiveAssistant(LlmAssistantInterface):
         else:
             print("⏩ Arista recuperar_memorias → generar_respuesta ya existe")
 
-        if generar_to_guardar not in existing_edges:
-            print("🔗 Agregando arista: generar_respuesta → guardar_memoria")
-            builder_state.add_edge(*generar_to_guardar)
-        else:
-            print("⏩ Arista generar_respuesta → guardar_memoria ya existe")
-
-        if guardar_to_end not in existing_edges:
-            print("🔗 Agregando arista: guardar_memoria → END")
-            builder_state.add_edge(*guardar_to_end)
+        if generar_to_end not in existing_edges:
+            print("🔗 Agregando arista: generar_respuesta → END")
+            builder_state.add_edge(*generar_to_end)
         else:
-            print("⏩ Arista guardar_memoria → END ya existe")
+            print("⏩ Arista generar_respuesta → END ya existe")
 
         # Compile and return the graph only if not compiled
         if not getattr(builder_state, "_compiled", None):
             print("⚙️ Compilando grafo...")
-            compiled_graph = builder_state.compile()
+            compiled_graph = builder_state.compile(checkpointer=self.checkpointer)
             builder_state._compiled = compiled_graph
             print("Grafo LangGraph creado con éxito. ✅", "\n")
             return compiled_graph
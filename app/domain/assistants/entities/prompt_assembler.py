@@ -0,0 +1,47 @@
+from langchain_core.prompts import ChatPromptTemplate
+from typing import List
+import hashlib
+
+
+class PromptAssembler:
+    """
+    Arma prompts aptos para el prefix caching del proveedor.
+
+    Todo el contenido estático (identidad, flujo, FAQs...) va en un único mensaje
+    de sistema al inicio, idéntico en cada petición; el contenido dinámico
+    (teléfono, recuerdos, mensaje) va al final. Así el proveedor reutiliza el
+    prefijo cacheado entre usuarios y turnos.
+    """
+
+    def __init__(
+        self,
+        static_sections: List[str],
+        dynamic_section: str,
+        user_section: str = "Mensaje Usuario: {user_message}",
+    ) -> None:
+        """
+        :param static_sections: Bloques fijos; no pueden tener variables.
+        :param dynamic_section: Bloque de sistema con las variables del turno.
+        :param user_section: Mensaje del usuario (con sus variables).
+        """
+        self.static_prefix = "\n".join(static_sections)
+        self.dynamic_section = dynamic_section
+        self.user_section = user_section
+
+    @property
+    def prefix_hash(self) -> str:
+        """Identifica la versión del prefijo estático (cambia si se edita el texto)."""
+        return hashlib.sha1(self.static_prefix.encode("utf-8")).hexdigest()[:12]
+
+    def build(self) -> ChatPromptTemplate:
+        return ChatPromptTemplate(
+            [
+                # Las llaves del texto fijo se escapan: no son variables de la plantilla.
+                (
+                    "system",
+                    self.static_prefix.replace("{", "{{").replace("}", "}}"),
+                ),
+                ("system", self.dynamic_section),
+                ("user", self.user_section),
+            ]
+        )
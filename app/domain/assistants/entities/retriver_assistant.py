@@ -1,48 +1,51 @@
 from domain.assistants.interfaces.llm_assistant_interface import LlmAssistantInterface
+from domain.assistants.entities.contact_resume import ContactResume
+from domain.whatsapp.entities.context_builder import ContextBuilder
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+from infrastructure.workers.rate_limiter import RateLimiter
 from langchain_core.prompts import ChatPromptTemplate
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableLambda
 from langchain.llms.base import LLM
-from langchain_core.utils.json import parse_json_markdown
+from typing import List
+import copy
+import hashlib
 import json
 
 
 class RetriverAssistant(LlmAssistantInterface):
 
-    def __init__(self, llm: LLM) -> None:
+    def __init__(
+        self,
+        llm: LLM,
+        result_cache: TTLLRUCache = None,
+        context_builder: ContextBuilder = None,
+        chunk_token_budget: int = 6000,
+        max_concurrency: int = 4,
+        rate_limiter: RateLimiter = None,
+    ) -> None:
+        """
+        :param result_cache: Resúmenes por (telefono, hash de la conversación).
+        :param context_builder: Cuenta los tokens de la conversación (sin él no se
+            divide en tramos).
+        :param chunk_token_budget: Tokens máximos de conversación por llamada al
+            LLM; las conversaciones más largas se extraen por tramos (map-reduce).
+        :param max_concurrency: Tramos extraídos en paralelo.
+        :param rate_limiter: Límite de peticiones al LLM; cada tramo toma su
+            propio token (una conversación larga hace varias llamadas).
+        """
         self.llm = llm
+        self.result_cache = result_cache
+        self.context_builder = context_builder
+        self.chunk_token_budget = chunk_token_budget
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
         self.prompt_template = None
-        self.response_schemas = None
+        self.extractor = None
         self.initialize_assistant()
 
     def initialize_assistant(self) -> None:
-        "Initialize the ExecutiveAssistant with necessary prompt_template."
-        self.response_schemas = [
-            ResponseSchema(
-                name="user_info",
-                type="object",
-                description=(
-                    """
-                    Un objeto que contiene información del usuario con los siguientes atributos:
-                    - tipo_documento (string): Tipo de documento. 'CC' por defecto.
-                    - nro_documento (string): Número de documento.
-                    - primer_nombre (string): Primer nombre.
-                    - segundo_nombre (string): Segundo nombre.
-                    - primer_apellido (string): Primer apellido.
-                    - segundo_apellido (string): Segundo apellido.
-                    - nombre_completo (string): Nombre completo.
-                    - direccion (string): Dirección default: No registra.
-                    - pais_id: (json): default { id: 19, codigo_pais: "+57", show_data: "Colombia"}
-                    - telefono (string): Número de teléfono default: 0000000000.
-                    - email (string): Correo electrónico default: noregistra@gmail.com.
-                    - fecha_nacimiento (string): Fecha de nacimiento formato YYYY-MM-DD.
-                    - fecha_consulta (string): Fecha programada para consulta. Formato YYYY-MM-DD.
-                    - hora_inicio (string): ejemplo: "15:20:00". Hora de inicio de la consulta.
-                    - hora_fin (string): ejemplo: "16:20:00". Hora de fin de la consulta.
-                    - tipo_consulta (string): Tipo de consulta. PRESENCIAL ó VIRTUAL.
-                    """
-                ),
-            )
-        ]
+        "Initialize the RetriverAssistant with its prompt_template and extractor."
         self.prompt_template = ChatPromptTemplate(
             [
                 (
@@ -55,7 +58,7 @@ class RetriverAssistant(LlmAssistantInterface):
                 ),
                 (
                     "system",
-                    "Devuelve la información en formato JSON, sin ningún otro texto adicional.",
+                    "Deja en null los campos que no aparezcan en la conversación. Fechas en formato YYYY-MM-DD y horas en formato HH:MM:SS.",
                 ),
                 (
                     "system",
@@ -67,6 +70,39 @@ class RetriverAssistant(LlmAssistantInterface):
                 ),
             ]
         )
+        # Se arma una sola vez: el esquema viaja como función (tool calling) y la
+        # respuesta llega ya validada como ContactResume.
+        self.extractor = self.build_extractor()
+
+    def build_extractor(self):
+        try:
+            structured_llm = self.llm.with_structured_output(
+                ContactResume, method="function_calling"
+            )
+            format_instructions = (
+                "Devuelve la información del usuario llamando a la función ContactResume."
+            )
+        except NotImplementedError:
+            # LLMs sin function calling: instrucciones de formato + parseo del JSON.
+            parser = PydanticOutputParser(pydantic_object=ContactResume)
+            structured_llm = self.llm | parser
+            format_instructions = (
+                parser.get_format_instructions()
+                + "\nDevuelve la información en formato JSON, sin ningún otro texto adicional."
+            )
+
+        extractor = (
+            self.prompt_template.partial(format_instructions=format_instructions)
+            | structured_llm
+        )
+        if self.rate_limiter is None:
+            return extractor
+        return RunnableLambda(self.acquire_rate_limit) | extractor
+
+    def acquire_rate_limit(self, inputs: dict) -> dict:
+        """Wait for a token of the rate limiter before each LLM call."""
+        self.rate_limiter.acquire()
+        return inputs
 
     def invoke(self, *args, **kwargs) -> dict:
         """
@@ -74,43 +110,133 @@ class RetriverAssistant(LlmAssistantInterface):
         """
         try:
             print("🔔 Invoking Retriver Assistant...", "\n")
-            if not self.prompt_template:
-                raise Exception(
-                    "Prompt template not initialized. Call initialize_assistant first."
+            cached, inputs, telefono, cache_key = self.prepare(**kwargs)
+            if cached is not None:
+                return cached
+
+            if len(inputs) == 1:
+                results = [self.extractor.invoke(inputs[0])]
+            else:
+                results = self.extractor.batch(
+                    inputs, config={"max_concurrency": self.max_concurrency}
+                )
+            return self.reduce(results, telefono, cache_key)
+
+        except Exception as e:
+            print(f"Error invoking Retriver Assistant: {e}", "\n")
+            return {"error": str(e)}
+
+    async def ainvoke(self, *args, **kwargs) -> dict:
+        """
+        Async version of `invoke`, awaiting the LLM call natively.
+        """
+        try:
+            print("🔔 Invoking Retriver Assistant (async)...", "\n")
+            cached, inputs, telefono, cache_key = self.prepare(**kwargs)
+            if cached is not None:
+                return cached
+
+            if len(inputs) == 1:
+                results = [await self.extractor.ainvoke(inputs[0])]
+            else:
+                results = await self.extractor.abatch(
+                    inputs, config={"max_concurrency": self.max_concurrency}
                 )
+            return self.reduce(results, telefono, cache_key)
 
-            conversation = kwargs.get("conversation", "")
-            telefono = kwargs.get("telefono", "0000000000")
+        except Exception as e:
+            print(f"Error invoking Retriver Assistant: {e}", "\n")
+            return {"error": str(e)}
+
+    def prepare(self, **kwargs) -> tuple:
+        """
+        Steps shared by `invoke` and `ainvoke` before calling the LLM.
+        :return: (cached response or None, extractor inputs, telefono, cache key).
+        """
+        conversation = kwargs.get("conversation") or []
+        telefono = kwargs.get("telefono", "0000000000")
+
+        cache_key = self.cache_key(conversation, telefono)
+        cached = self.get_cached(cache_key)
+        if cached is not None:
+            return cached, [], telefono, cache_key
+
+        return None, self.build_inputs(conversation, telefono), telefono, cache_key
+
+    # ========== Cache ==========
+    def cache_key(self, conversation, telefono: str) -> tuple:
+        """(telefono, hash del contenido de la conversación)."""
+        content = json.dumps(conversation, ensure_ascii=False, sort_keys=True, default=str)
+        return telefono, hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_cached(self, cache_key: tuple):
+        if self.result_cache is None:
+            return None
+
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+
+        print(f"⚡ Resumen de contacto cacheado para {cache_key[0]}", "\n")
+        return copy.deepcopy(cached)
 
-            output_parser = StructuredOutputParser.from_response_schemas(
-                self.response_schemas
+    # ========== Map-reduce ==========
+    def build_inputs(self, conversation, telefono: str) -> List[dict]:
+        """
+        Inputs of the extractor: one for the whole conversation, or one per
+        chunk of at most `chunk_token_budget` tokens when it is longer.
+        """
+        if not self.prompt_template:
+            raise Exception(
+                "Prompt template not initialized. Call initialize_assistant first."
             )
-            format_instructions = output_parser.get_format_instructions()
-
-            print("== Format Instructions ==", "\n")
-            print(format_instructions, "\n")
-            print("Conversation to process:", "\n")
-            print(conversation, "\n")
-
-            prompt = self.prompt_template.invoke(
-                {
-                    "format_instructions": format_instructions,
-                    "conversation": " * "
-                    + "\n * ".join(
-                        json.dumps(c, ensure_ascii=False) for c in conversation
-                    ),
-                    "telefono": telefono,
-                }
+
+        lines = [json.dumps(c, ensure_ascii=False) for c in conversation]
+        chunks = self.split_lines(lines)
+        if len(chunks) > 1:
+            print(
+                f"✂️ Conversación larga ({len(lines)} mensajes): extracción en {len(chunks)} tramos",
+                "\n",
             )
 
-            response = self.llm.invoke(prompt)
-            json_response = parse_json_markdown(response.content)
+        return [
+            {"conversation": " * " + "\n * ".join(chunk), "telefono": telefono}
+            for chunk in chunks
+        ]
 
-            print("🔔 Response from Retriver Assistant in JSON mood:", "\n")
-            print(json_response, "\n")
+    def split_lines(self, lines: List[str]) -> List[List[str]]:
+        if self.context_builder is None:
+            return [lines]
 
-            return json_response
+        chunks, chunk, chunk_tokens = [], [], 0
+        for line in lines:
+            # Un mensaje más largo que el tramo se recorta para no pasarse.
+            line = self.context_builder.truncate(line, self.chunk_token_budget)
+            tokens = self.context_builder.count_tokens(line)
+            if chunk and chunk_tokens + tokens > self.chunk_token_budget:
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], 0
+            chunk.append(line)
+            chunk_tokens += tokens
 
-        except Exception as e:
-            print(f"Error invoking Retriver Assistant: {e}", "\n")
-            return {"error": str(e)}
+        chunks.append(chunk)
+        return chunks
+
+    def reduce(self, results: List[ContactResume], telefono: str, cache_key: tuple) -> dict:
+        """
+        Merge the extraction of each chunk in conversation order (later data
+        wins) and cache the response.
+        """
+        resume = ContactResume()
+        for result in results:
+            # Sin llamada a la función el modelo no encontró datos en el tramo.
+            if result is not None:
+                resume = resume.merge(result)
+
+        response = resume.to_response(telefono)
+        print("🔔 Response from Retriver Assistant:", "\n")
+        print(response, "\n")
+
+        if self.result_cache is not None:
+            self.result_cache.set(cache_key, copy.deepcopy(response))
+        return response
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import asyncio
 
 
 class LlmAssistantInterface(ABC):
@@ -16,3 +17,11 @@ class LlmAssistantInterface(ABC):
         Invoke the LLM assistant with a given prompt.
         """
         pass
+
+    async def ainvoke(self, *args, **kwargs) -> dict:
+        """
+        Async version of `invoke`. By default this is a thread offload: the
+        blocking `invoke` runs in the event loop's default executor. Assistants
+        with native async LLM calls override it.
+        """
+        return await asyncio.to_thread(self.invoke, *args, **kwargs)
@@ -5,11 +5,14 @@ from typing import Optional, List, Any
 class ChatState(BaseModel):
     """Estado de conversación para LangGraph"""
 
-    prompt_template: Any = None
     user_phone: Optional[str] = None
     user_message: Optional[str] = None
     memories: List[str] = []
+    memory_tokens: int = 0                # Tokens de los recuerdos del prompt
+    prompt_tokens: int = 0                # Tokens del prompt armado
+    cached_tokens: int = 0                # Tokens del prompt servidos desde la cache del proveedor
     response: Optional[Any] = None        # Raw LLM response
     responses: List[dict] = []            # Processed responses
     error: Optional[str] = None           # Error message if any
+    cache_hit: bool = False               # Respondido desde la cache semántica
     other_input: Optional[Any] = None
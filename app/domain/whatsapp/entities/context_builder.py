@@ -0,0 +1,127 @@
+from langchain_core.documents import Document
+from typing import List, Tuple
+
+
+class ContextBuilder:
+    """
+    Arma el contexto del prompt dentro de un presupuesto de tokens.
+
+    Los recuerdos se eligen alternando el más relevante (orden de MM-R) y el más
+    reciente hasta agotar el presupuesto; cada recuerdo largo se recorta y el
+    mensaje acumulado del usuario conserva su parte final. Los tokens se cuentan
+    con tiktoken (o se estiman si el encoding no está disponible).
+    """
+
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        memory_token_budget: int = 1200,
+        max_tokens_per_memory: int = 250,
+        message_token_budget: int = 800,
+    ) -> None:
+        """
+        :param memory_token_budget: Tokens máximos para todos los recuerdos.
+        :param max_tokens_per_memory: Tokens máximos de un recuerdo (se recorta).
+        :param message_token_budget: Tokens máximos del mensaje del usuario.
+        """
+        self.memory_token_budget = memory_token_budget
+        self.max_tokens_per_memory = max_tokens_per_memory
+        self.message_token_budget = message_token_budget
+        self.encoding = self.load_encoding(model)
+
+    def load_encoding(self, model: str):
+        try:
+            import tiktoken
+
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"⚠️ tiktoken no disponible, se estiman los tokens: {e}", "\n")
+            return None
+
+    # ========== Tokens ==========
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is None:
+            # ~4 caracteres por token.
+            return max(1, len(text) // 4)
+        return len(self.encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        """
+        Recorta `text` a `max_tokens`, conservando el inicio (o el final).
+        """
+        if self.count_tokens(text) <= max_tokens:
+            return text
+
+        if self.encoding is None:
+            max_chars = max_tokens * 4
+            return "…" + text[-max_chars:] if keep_end else text[:max_chars] + "…"
+
+        tokens = self.encoding.encode(text)
+        if keep_end:
+            return "…" + self.encoding.decode(tokens[-max_tokens:])
+        return self.encoding.decode(tokens[:max_tokens]) + "…"
+
+    def count_prompt_tokens(self, prompt) -> int:
+        """
+        Tokens del contenido de un prompt ya armado (ChatPromptValue o texto).
+        """
+        if hasattr(prompt, "to_messages"):
+            return sum(
+                self.count_tokens(str(message.content)) for message in prompt.to_messages()
+            )
+        return self.count_tokens(str(prompt))
+
+    # ========== Contexto ==========
+    def select_memories(
+        self, relevant: List[Document], recent: List[Document]
+    ) -> Tuple[List[str], int]:
+        """
+        Elige recuerdos dentro del presupuesto, priorizando por turnos el más
+        relevante y el más reciente.
+
+        :param relevant: Recuerdos en orden de relevancia.
+        :param recent: Recuerdos del más reciente al más antiguo.
+        :return: (recuerdos elegidos en orden cronológico, tokens usados).
+        """
+        candidates = []
+        for index in range(max(len(relevant), len(recent))):
+            if index < len(relevant):
+                candidates.append(relevant[index])
+            if index < len(recent):
+                candidates.append(recent[index])
+
+        selected = {}
+        used_tokens = 0
+        for doc in candidates:
+            content = doc.page_content
+            if content in selected:
+                continue
+
+            content_tokens = self.count_tokens(content)
+            if content_tokens > self.max_tokens_per_memory:
+                content = self.truncate(content, self.max_tokens_per_memory)
+                content_tokens = self.count_tokens(content)
+
+            if used_tokens + content_tokens > self.memory_token_budget:
+                continue
+
+            selected[doc.page_content] = (content, doc.metadata.get("timestamp") or 0)
+            used_tokens += content_tokens
+
+        chronological = sorted(selected.values(), key=lambda item: item[1])
+        return [content for content, _ in chronological], used_tokens
+
+    def format_memories(self, memories: List[str]) -> str:
+        return "\n".join(f"- {m}" for m in memories)
+
+    def build_user_message(self, user_message: str) -> str:
+        """
+        Mensaje acumulado del usuario dentro del presupuesto; si excede, se
+        conservan los mensajes más recientes (el final).
+        """
+        return self.truncate(user_message or "", self.message_token_budget, keep_end=True)
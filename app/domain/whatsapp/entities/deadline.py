@@ -0,0 +1,39 @@
+import time
+
+
+class Deadline:
+    """
+    Presupuesto de tiempo de un turno. Se crea al vaciar el buffer de mensajes y
+    viaja por el servicio de conversación, los nodos del grafo (en
+    `config["configurable"]["deadline"]`), las tools y los envíos: cada etapa
+    usa lo que queda del presupuesto como timeout.
+    """
+
+    def __init__(self, budget_seconds: float) -> None:
+        """
+        :param budget_seconds: Segundos que puede tardar el turno completo.
+        """
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        """Segundos que quedan del presupuesto (0 si ya venció)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(
+        self, cap: float = None, reserve: float = 0.0, minimum: float = 0.0
+    ) -> float:
+        """
+        Timeout para una etapa: lo que queda menos `reserve` (tiempo guardado para
+        las etapas siguientes), sin pasar de `cap` ni bajar de `minimum`.
+        """
+        seconds = self.remaining() - reserve
+        if cap is not None:
+            seconds = min(seconds, cap)
+        return max(seconds, minimum)
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.2f}s of {self.budget_seconds}s)"
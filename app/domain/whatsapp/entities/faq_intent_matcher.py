@@ -0,0 +1,119 @@
+from typing import Optional, Tuple
+from domain.whatsapp.entities.topic_classifier import normalize_text
+
+# Únicas preguntas frecuentes que se responden desde la cache: su respuesta no
+# depende del paciente ni del paso del flujo en el que está.
+# - phrases: alguna debe aparecer completa en el mensaje.
+# - requires: si no está vacío, alguna de estas palabras debe aparecer.
+# - vocabulary: palabras propias de la pregunta (cuentan para la confianza).
+FAQ_INTENTS = {
+    "ubicación consultorio": {
+        "phrases": [
+            "donde queda", "donde quedan", "donde esta", "donde estan",
+            "donde se encuentra", "donde se encuentran", "donde es", "donde atiende",
+            "donde atienden", "cual es la direccion", "como llego", "ubicacion",
+            "direccion",
+        ],
+        "requires": [],
+        "vocabulary": [
+            "consultorio", "clinica", "sede", "ubicados", "ubicacion", "direccion",
+            "doctor", "dr", "andres", "canchica", "medellin", "exactamente",
+            "llegar", "llego",
+        ],
+    },
+    "precio consulta": {
+        "phrases": [
+            "cuanto cuesta", "cuanto vale", "cuanto es", "cual es el precio",
+            "cual es el valor", "cual es el costo", "que precio", "que valor",
+            "que costo", "precio", "costo", "valor",
+        ],
+        "requires": ["consulta", "valoracion"],
+        "vocabulary": [
+            "consulta", "valoracion", "virtual", "presencial", "cuesta", "vale",
+            "precio", "costo", "valor", "tiene",
+        ],
+    },
+    "medios de pago": {
+        "phrases": [
+            "como puedo pagar", "como se paga", "como pago", "como hago el pago",
+            "forma de pago", "formas de pago", "medio de pago", "medios de pago",
+            "metodo de pago", "metodos de pago", "aceptan", "puedo pagar",
+            "se puede pagar",
+        ],
+        "requires": [],
+        "vocabulary": [
+            "pagar", "pago", "pagos", "tarjeta", "credito", "debito",
+            "transferencia", "nequi", "link", "efectivo", "desde", "exterior",
+            "fuera", "pais", "consulta", "valoracion", "con",
+        ],
+    },
+}
+
+# Palabras que no cambian la pregunta ("hola, ¿me puedes decir...?").
+FAQ_FILLER_WORDS = {
+    "a", "al", "buen", "buena", "buenas", "buenos", "cual", "como", "cuanto",
+    "de", "decir", "del", "dia", "dias", "donde", "el", "en", "es", "favor",
+    "gracias", "gustaria", "hola", "informar", "la", "las", "le", "les", "los",
+    "me", "noches", "o", "para", "podria", "podrias", "por", "puede", "puedes",
+    "que", "queria", "quisiera", "saber", "se", "su", "sus", "tardes", "un",
+    "una", "ustedes", "y",
+}
+
+# Sin signo de interrogación, el mensaje debe usar alguna de estas palabras.
+INTERROGATIVE_WORDS = {"donde", "cuanto", "cuanta", "como", "cual", "cuales", "aceptan"}
+
+
+class FaqIntentMatcher:
+    """
+    Reconoce las preguntas frecuentes cacheables (FAQ_INTENTS).
+
+    El mensaje debe tener forma de pregunta, usar las frases de una sola
+    intención y casi nada más: la confianza es la fracción de sus palabras que
+    pertenecen a la pregunta (frases, vocabulario o relleno). Un mensaje como
+    "ya pagué, ¿cómo te envío el comprobante?" no alcanza el umbral.
+    """
+
+    def __init__(self, min_confidence: float = 0.9) -> None:
+        """
+        :param min_confidence: Fracción mínima de palabras de la pregunta.
+        """
+        self.min_confidence = min_confidence
+
+    def classify(self, message: str) -> Tuple[Optional[str], float]:
+        """
+        :return: (intención, confianza), o (None, 0.0) si no es una pregunta
+            frecuente o coincide con más de una intención.
+        """
+        normalized = normalize_text(message)
+        tokens = normalized.split()
+        if not tokens or not self.is_question(message, tokens):
+            return None, 0.0
+
+        padded = f" {normalized} "
+        matches = []
+        for intent, spec in FAQ_INTENTS.items():
+            phrases = [p for p in spec["phrases"] if f" {p} " in padded]
+            if not phrases:
+                continue
+            if spec["requires"] and not any(w in tokens for w in spec["requires"]):
+                continue
+            matches.append((intent, spec, phrases))
+
+        if len(matches) != 1:
+            return None, 0.0
+
+        intent, spec, phrases = matches[0]
+        known = FAQ_FILLER_WORDS | set(spec["vocabulary"])
+        for phrase in phrases:
+            known.update(phrase.split())
+
+        confidence = sum(token in known for token in tokens) / len(tokens)
+        return intent, round(confidence, 4)
+
+    def match(self, message: str) -> Optional[str]:
+        """Intención de la pregunta frecuente, o None."""
+        intent, confidence = self.classify(message)
+        return intent if confidence >= self.min_confidence else None
+
+    def is_question(self, message: str, tokens: list) -> bool:
+        return "?" in message or "¿" in message or bool(INTERROGATIVE_WORDS & set(tokens))
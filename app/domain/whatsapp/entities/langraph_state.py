@@ -6,7 +6,14 @@ from langchain_core.documents import Document
 from langchain_core.tools import Tool, tool
 from langchain_core.prompts import ChatPromptTemplate
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import time
 from domain.whatsapp.entities.chat_state import ChatState
+from domain.whatsapp.entities.topic_classifier import TopicClassifier
+from domain.whatsapp.entities.faq_intent_matcher import FaqIntentMatcher
+from domain.whatsapp.entities.context_builder import ContextBuilder
+from domain.whatsapp.entities.deadline import Deadline
 from infrastructure.interfaces.google_calendar_client_interface import (
     GoogleCalendarClientInterface,
 )
@@ -15,6 +22,44 @@ from pydantic import create_model
 from domain.whatsapp.interfaces.whatsapp_repository_interface import (
     WhatsappRepositoryInterface,
 )
+from infrastructure.metrics.prometheus_metrics import PrometheusMetrics
+from infrastructure.caches.semantic_answer_cache import SemanticAnswerCache
+import re
+
+# Tools con respuesta fija (sin datos del usuario) que se pueden cachear.
+CACHEABLE_TOOLS = {
+    "send_consulting_location",
+    "send_payment_method_transfer",
+    "send_payment_method_link",
+}
+
+# Las preguntas largas suelen traer contexto propio del usuario: no se cachean.
+FAQ_MAX_QUESTION_TOKENS = 60
+
+# Datos personales que impiden cachear una respuesta del LLM: correos, números
+# de documento (6+ dígitos seguidos o con puntos de miles) y nombres propios.
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+DOCUMENT_PATTERN = re.compile(r"(?<![\d.])(?:\d{6,}|\d{1,3}(?:\.\d{3}){2,})(?![\d])")
+SENTENCE_SPLIT_PATTERN = re.compile(r"[.!?¡¿:;\n]+")
+# Nombres propios que el asistente usa en cualquier respuesta (no son del paciente).
+ASSISTANT_PROPER_NOUNS = {
+    "Bella", "Sofía", "Dr", "Doctor", "Andrés", "Cánchica", "Cano", "Medellín",
+    "Colombia", "Antioquia", "El", "Poblado", "Tesoro", "Torre", "Médica", "Bancolombia",
+    "Nequi", "COP", "WhatsApp", "Botox", "Consulta", "Valoración", "Virtual",
+    "Presencial", "Transferencia", "Link",
+}
+
+# Tools con efectos (agendan o registran un pago): no se cortan por timeout. La
+# llamada seguiría corriendo y el modelo reintentaría una acción ya hecha.
+MUTATING_TOOLS = {"schedule_pre_consultation", "payment_received"}
+
+# Respuesta al usuario cuando una tool falla o no responde a tiempo.
+TOOL_ERROR_RESPONSE = {
+    "format_type": "text",
+    "response": {
+        "message": "Lo siento, no pude completar esa acción en este momento. ¿Lo intentamos de nuevo en unos minutos?",
+    },
+}
 
 
 class LangGraphState:
@@ -26,11 +71,63 @@ class LangGraphState:
         vectorstore: VectorStore,
         google_calendar_client: GoogleCalendarClientInterface,
         whatsapp_repository: WhatsappRepositoryInterface,
+        topic_classifier: TopicClassifier = None,
+        retrieval_executor: ThreadPoolExecutor = None,
+        retrieval_deadline_seconds: float = 8.0,
+        tool_executor: ThreadPoolExecutor = None,
+        tool_timeouts: dict = None,
+        default_tool_timeout_seconds: float = 15.0,
+        min_tool_timeout_seconds: float = 3.0,
+        context_builder: ContextBuilder = None,
+        answer_cache: SemanticAnswerCache = None,
+        metrics: PrometheusMetrics = None,
+        llm_executor: ThreadPoolExecutor = None,
+        llm_reserve_seconds: float = 10.0,
+        llm_hedge_after_seconds: float = None,
+        faq_matcher: FaqIntentMatcher = None,
+        recent_memories_backfill_limit: int = 500,
     ):
+        """
+        :param min_tool_timeout_seconds: Timeout mínimo de una tool aunque el
+            presupuesto del turno ya se haya gastado.
+        :param llm_reserve_seconds: Parte del presupuesto del turno que se guarda
+            para el LLM; si no queda más que eso, se omiten los recuerdos.
+        :param llm_hedge_after_seconds: Si el LLM no respondió en estos segundos,
+            se lanza una segunda petición y se usa la primera en terminar
+            (None = sin hedging).
+        :param faq_matcher: Reconoce las preguntas frecuentes cacheables.
+        :param recent_memories_backfill_limit: Memorias leídas de Chroma al
+            reconstruir el índice de recencia de un usuario.
+        """
         self.llm = llm
         self.vectorstore = vectorstore
         self.google_calendar_client = google_calendar_client
         self.whatsapp_repository = whatsapp_repository
+        self.topic_classifier = topic_classifier
+        # Pool compartido por las búsquedas concurrentes de recuperar_memorias.
+        self.retrieval_executor = retrieval_executor or ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="retrieval"
+        )
+        self.retrieval_deadline_seconds = retrieval_deadline_seconds
+        # Pool y timeouts (segundos por nombre de tool) de process_tool_calls.
+        self.tool_executor = tool_executor or ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="tool"
+        )
+        self.tool_timeouts = tool_timeouts or {}
+        self.default_tool_timeout_seconds = default_tool_timeout_seconds
+        self.min_tool_timeout_seconds = min_tool_timeout_seconds
+        self.context_builder = context_builder or ContextBuilder()
+        self.answer_cache = answer_cache
+        self.faq_matcher = faq_matcher or FaqIntentMatcher()
+        # Latencia por etapa y por tool, y tokens del LLM (exportados en /metrics).
+        self.metrics = metrics or PrometheusMetrics()
+        # Presupuesto del turno para el LLM (y peticiones hedged).
+        self.llm_executor = llm_executor or ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="llm"
+        )
+        self.llm_reserve_seconds = llm_reserve_seconds
+        self.llm_hedge_after_seconds = llm_hedge_after_seconds
+        self.recent_memories_backfill_limit = recent_memories_backfill_limit
 
         # Inicializar herramientas.
         self.bind_llm_available_tools()
@@ -263,44 +360,174 @@ class LangGraphState:
         }
 
     # Methods LangGraph state managment ================================================
-    def retrieve_memories(self, state: ChatState) -> ChatState:
+    def check_answer_cache(self, state: ChatState) -> ChatState:
+        """
+        Responde desde la cache semántica las preguntas frecuentes, sin recuperar
+        memorias ni llamar al LLM.
+        """
+        intent = self.get_faq_intent(state.user_message)
+        if not intent:
+            return state
+
+        try:
+            with self.metrics.measure("answer_cache"):
+                responses = self.answer_cache.lookup(state.user_message, intent=intent)
+        except Exception as e:
+            print(f"❌ Error consultando la cache de respuestas: {e}", "\n")
+            responses = None
+
+        if responses:
+            state.responses = responses
+            state.cache_hit = True
+        return state
+
+    def route_after_cache(self, state: ChatState) -> str:
+        return "hit" if state.cache_hit else "miss"
+
+    def get_faq_intent(self, user_message: str) -> str:
+        """
+        Intención de pregunta frecuente del mensaje (FAQ_INTENTS), o None.
+        """
+        if self.answer_cache is None or not user_message:
+            return None
+
+        if self.context_builder.count_tokens(user_message) > FAQ_MAX_QUESTION_TOKENS:
+            return None
+
+        return self.faq_matcher.match(user_message)
+
+    def store_cacheable_answer(self, state: ChatState, responses: list) -> None:
+        """
+        Guarda en la cache semántica la respuesta a una pregunta frecuente si no
+        depende del usuario: generada sin recuerdos, solo texto o tools de
+        respuesta fija, y sin datos personales.
+        """
+        intent = self.get_faq_intent(state.user_message)
+        if not intent:
+            return
+
+        # Con recuerdos la respuesta puede depender de la conversación del paciente.
+        if state.memories:
+            return
+
+        tool_calls = (
+            state.response.tool_calls if isinstance(state.response, AIMessage) else []
+        )
+        if any(tool_call["name"] not in CACHEABLE_TOOLS for tool_call in tool_calls):
+            return
+
+        if any(response["format_type"] == "error" for response in responses):
+            return
+
+        # Las tools cacheables devuelven textos fijos; el texto del LLM se revisa.
+        if not tool_calls and any(
+            self.contains_personal_data(str(response["response"]), state.user_phone)
+            for response in responses
+        ):
+            return
+
+        try:
+            self.answer_cache.store(state.user_message, responses, intent=intent)
+        except Exception as e:
+            print(f"❌ Error guardando en la cache de respuestas: {e}", "\n")
+
+    def contains_personal_data(self, text: str, user_phone: str = None) -> bool:
+        """
+        Teléfono, correo, documento o un nombre propio que no es del asistente.
+        """
+        if user_phone and user_phone in text:
+            return True
+        if EMAIL_PATTERN.search(text) or DOCUMENT_PATTERN.search(text):
+            return True
+
+        # Palabras con mayúscula que no inician frase ("¡Claro, Ana!").
+        for sentence in SENTENCE_SPLIT_PATTERN.split(text):
+            words = re.findall(r"[^\W\d_]+", sentence)
+            for word in words[1:]:
+                if word[0].isupper() and word not in ASSISTANT_PROPER_NOUNS:
+                    return True
+        return False
+
+    def retrieve_memories(
+        self, state: ChatState, config: RunnableConfig = None
+    ) -> ChatState:
         print("🔍 Recuperando recuerdos a largo plazo...", "\n")
 
-        memories = self.recall_longterm_memories(
-            {
-                "user_message": state.user_message,
-                "user_phone": state.user_phone,  # Pass explicitly
-                "topic": self.infer_topic_from_message(state.user_message),
-            }
+        # Con poco presupuesto se responde sin recuerdos: el LLM tiene prioridad.
+        deadline = self.get_deadline(config)
+        timeout = self.retrieval_deadline_seconds
+        if deadline is not None:
+            if deadline.remaining() <= self.llm_reserve_seconds:
+                print(f"⏱️ Sin presupuesto para recuerdos ({deadline}). Se omiten.", "\n")
+                self.metrics.count_degraded("skip_memories")
+                state.memories, state.memory_tokens = [], 0
+                return state
+            timeout = deadline.timeout(
+                cap=self.retrieval_deadline_seconds, reserve=self.llm_reserve_seconds
+            )
+
+        # El tópico se infiere dentro de la búsqueda por relevancia, en paralelo
+        # con la de recuerdos recientes.
+        with self.metrics.measure("retrieval"):
+            relevant, recent = self.recall_memory_candidates(
+                {
+                    "user_message": state.user_message,
+                    "user_phone": state.user_phone,  # Pass explicitly
+                },
+                timeout=timeout,
+            )
+
+        # Solo los recuerdos que caben en el presupuesto de tokens.
+        state.memories, state.memory_tokens = self.context_builder.select_memories(
+            relevant, recent
         )
 
-        state.memories = memories
-        
-        print(f"🧠 Recuerdos recuperados: {state.memories}", "\n")
+        print(
+            f"🧠 Recuerdos recuperados ({state.memory_tokens} tokens): {state.memories}",
+            "\n",
+        )
         return state
 
-    def generate_response(self, state: ChatState) -> ChatState:
+    def generate_response(
+        self, state: ChatState, config: RunnableConfig = None
+    ) -> ChatState:
+        deadline = self.get_deadline(config)
         try:
             print("📝 Generando respuesta con LangGraphState...", "\n")
-            prompt_template = state.prompt_template
+            # El template no es parte del estado (no se guarda en los checkpoints):
+            # llega en config["configurable"].
+            prompt_template = ((config or {}).get("configurable") or {}).get(
+                "prompt_template"
+            )
 
             if not prompt_template:
                 print(
-                    "❗ No se encontró el template de prompt en el estado. Asegúrate de inicializarlo correctamente."
+                    "❗ No se encontró el template de prompt en la configuración. Asegúrate de inicializarlo correctamente."
                 )
-                raise ValueError("Prompt template not found in state.")
+                raise ValueError("Prompt template not found in config.")
 
-            context = "\n".join(f"- {m}" for m in state.memories)
+            context = self.context_builder.format_memories(state.memories)
             prompt = prompt_template.invoke(
                 {
                     "language": "Español",
                     "user_phone": state.user_phone,
                     "memories": context,
-                    "user_message": state.user_message,
+                    "user_message": self.context_builder.build_user_message(
+                        state.user_message
+                    ),
                 }
             )
-            print(f"📜 Prompt generado: {prompt}", "\n")
-            state.response = self.llm.invoke(prompt)
+            prompt_tokens = self.context_builder.count_prompt_tokens(prompt)
+            print(f"📜 Prompt generado ({prompt_tokens} tokens): {prompt}", "\n")
+            with self.metrics.measure("llm"):
+                state.response = self.invoke_llm(prompt, deadline)
+
+            usage = getattr(state.response, "usage_metadata", None) or {}
+            cached_tokens = self.record_llm_usage("executive_assistant", usage)
+            print(
+                f"🧊 Tokens de entrada cacheados por el proveedor: {cached_tokens}/{usage.get('input_tokens', 0)}",
+                "\n",
+            )
 
             print(
                 f"🤖 Respuesta generada por LLM desde LangraphState: {state.response}",
@@ -310,7 +537,10 @@ class LangGraphState:
             # Process tool calls or normal response.
             if isinstance(state.response, AIMessage) and state.response.tool_calls:
                 print("🔧 Procesando tool_calls...", "\n")
-                responses = self.process_tool_calls(state.response.tool_calls)
+                with self.metrics.measure("tool_execution"):
+                    responses = self.process_tool_calls(
+                        state.response.tool_calls, deadline
+                    )
             else:
                 print("🗣️ Respuesta normal:", state.response.content, "\n")
                 responses = [
@@ -320,9 +550,13 @@ class LangGraphState:
                     }
                 ]
 
+            self.store_cacheable_answer(state, responses)
+
             return {
                 # "response": state.response,  # Raw LLM response
                 "responses": responses,  # Processed responses
+                "prompt_tokens": prompt_tokens,
+                "cached_tokens": cached_tokens,
                 "error": None,
             }
         except Exception as e:
@@ -335,11 +569,71 @@ class LangGraphState:
                 ],
             }
 
-    def process_tool_calls(self, tool_calls):
+    def get_deadline(self, config: RunnableConfig = None) -> Deadline:
+        """Deadline del turno pasado al grafo en `configurable` (o None)."""
+        return ((config or {}).get("configurable") or {}).get("deadline")
+
+    def invoke_llm(self, prompt, deadline: Deadline = None):
+        """
+        Llama al LLM con lo que queda del presupuesto del turno como timeout.
+
+        Con `llm_hedge_after_seconds`, si la primera petición tarda más que eso
+        se lanza una segunda igual y se usa la primera respuesta que llegue.
+        """
+        timeout = deadline.timeout(minimum=1.0) if deadline is not None else None
+        kwargs = {"timeout": timeout} if timeout is not None else {}
+
+        if not self.llm_hedge_after_seconds:
+            return self.llm.invoke(prompt, **kwargs)
+
+        started_at = time.monotonic()
+        futures = [self.llm_executor.submit(self.llm.invoke, prompt, **kwargs)]
+        done, _ = wait(futures, timeout=self.llm_hedge_after_seconds)
+
+        remaining = None if timeout is None else timeout - (time.monotonic() - started_at)
+        if not done and (remaining is None or remaining > self.llm_hedge_after_seconds):
+            print(
+                f"🐢 El LLM no respondió en {self.llm_hedge_after_seconds}s. Enviando petición hedged.",
+                "\n",
+            )
+            hedge_kwargs = {"timeout": remaining} if remaining is not None else {}
+            futures.append(self.llm_executor.submit(self.llm.invoke, prompt, **hedge_kwargs))
+
+        # La primera respuesta correcta gana; si una falla se espera la otra.
+        pending = set(futures)
+        error = None
+        while pending:
+            wait_timeout = (
+                None
+                if timeout is None
+                else max(0.0, timeout - (time.monotonic() - started_at))
+            )
+            done, pending = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if len(futures) > 1:
+                        self.metrics.count_hedge(
+                            "hedge" if future is futures[1] else "primary"
+                        )
+                    return future.result()
+                error = future.exception()
+
+        if error is not None:
+            raise error
+        raise TimeoutError(f"El LLM no respondió dentro del presupuesto ({timeout}s).")
+
+    def process_tool_calls(self, tool_calls, deadline: Deadline = None):
         """
         Procesa las llamadas a herramientas especificadas en tool_calls.
+
+        Las llamadas son independientes y corren en paralelo, cada una con su
+        timeout (acotado por el presupuesto del turno, sin bajar de
+        `min_tool_timeout_seconds`); las de MUTATING_TOOLS se esperan siempre.
+        Las respuestas se devuelven en el orden en que el modelo las pidió.
         """
-        responses = []
+        calls = []
         for tool_call in tool_calls:
             function_name = tool_call["name"]
             args = tool_call["args"]
@@ -353,47 +647,121 @@ class LangGraphState:
                 raise ValueError(
                     f"La función '{function_name}' no existe en el asistente."
                 )
+            calls.append((function_name, function, args))
+
+        started_at = time.monotonic()
+        futures = [
+            self.tool_executor.submit(self.run_tool, function_name, function, args)
+            for function_name, function, args in calls
+        ]
 
-            response_function = function(**args)
-            responses.append(response_function)
+        responses = []
+        for (function_name, _, _), future in zip(calls, futures):
+            timeout = self.get_tool_timeout(function_name, deadline)
+            remaining = (
+                None
+                if timeout is None
+                else max(0.0, started_at + timeout - time.monotonic())
+            )
+            try:
+                responses.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                self.metrics.observe_call(
+                    "tool",
+                    f"{function_name}.timeout",
+                    time.monotonic() - started_at,
+                    error=True,
+                )
+                print(f"⏱️ La tool '{function_name}' superó {timeout}s.", "\n")
+                responses.append(TOOL_ERROR_RESPONSE)
+            except Exception as e:
+                print(f"❌ Error ejecutando la tool '{function_name}': {e}", "\n")
+                responses.append(TOOL_ERROR_RESPONSE)
 
         print("Respuestas de las tool_calls:", responses, "\n")
         return responses
 
+    def get_tool_timeout(self, function_name: str, deadline: Deadline = None) -> float:
+        """
+        Segundos que se espera a una tool (None = sin límite, para las que
+        tienen efectos).
+        """
+        if function_name in MUTATING_TOOLS:
+            return None
+
+        timeout = self.tool_timeouts.get(
+            function_name, self.default_tool_timeout_seconds
+        )
+        if deadline is None:
+            return timeout
+        # Acotado por lo que queda del turno, pero con un intento real aunque
+        # el presupuesto ya se haya gastado.
+        return deadline.timeout(
+            cap=timeout, minimum=min(timeout, self.min_tool_timeout_seconds)
+        )
+
+    def run_tool(self, function_name: str, function, args: dict):
+        with self.metrics.measure_call("tool", function_name):
+            return function(**args)
+
+    def record_llm_usage(self, prompt: str, usage_metadata: dict) -> int:
+        """
+        Registra los tokens de una respuesta del LLM; devuelve los tokens de
+        entrada cacheados por el proveedor.
+        """
+        return self.metrics.record_tokens(prompt, usage_metadata)
+
     # Guardar nuevos recuerdos
-    def save_memory(self, state: ChatState) -> ChatState:
+    def build_memory(
+        self, user_phone: str, user_message: str, responses: list[dict]
+    ) -> dict:
         """
-        Guarda la conversación completa (usuario + respuesta del asistente) como un solo bloque.
+        Arma el recuerdo de un turno (usuario + respuesta del asistente) como un solo
+        bloque. Se persiste fuera del grafo con `save_memories`, después de enviar
+        las respuestas.
+
+        :return: El recuerdo, o None si el mensaje o la respuesta están vacíos.
         """
-        user_message = state.user_message.strip()
-        user_phone = state.user_phone
+        user_message = (user_message or "").strip()
 
         assistant_responses = " ".join(
-            [response["response"]["message"] for response in state.responses]
+            [response["response"].get("message", "") for response in responses]
         ).strip()
 
         if not user_message or not assistant_responses:
             print("🟨 Mensaje o respuesta vacía. No se guardó memoria.")
             print("User message:", user_message)
             print("Assistant responses:", assistant_responses, "\n")
-            return state
+            return None
 
         full_dialogue = f"user: {user_message} | assistant: {assistant_responses}"
 
-        print(f"💾 Guardando full dialogo:\n{full_dialogue}\n")
+        return {
+            # Id fijo: si la entrega se repite, Chroma sobrescribe en vez de duplicar.
+            "id": str(uuid.uuid4()),
+            "role": "dialogue",
+            "user_message": full_dialogue,
+            "user_phone": user_phone,
+            "topic_message": user_message,
+            "timestamp": int(datetime.utcnow().timestamp()),
+        }
 
-        self.save_longterm_memory(
+    def save_memories(self, memories: list[dict]) -> None:
+        """
+        Guarda un lote de recuerdos (de `build_memory`) con una sola escritura en
+        Chroma. El tópico se infiere del mensaje del usuario.
+        """
+        inputs = [
             {
-                "role": "dialogue",
-                "user_message": full_dialogue,
-                "user_phone": user_phone,
-                "topic": self.infer_topic_from_message(user_message),
-                "timestamp": int(datetime.utcnow().timestamp()),
+                **memory,
+                "topic": memory.get("topic")
+                or self.infer_topic_from_message(memory.get("topic_message", "")),
             }
-        )
-
-        print("✅ Memoria conversacional guardada exitosamente.\n")
-        return state
+            for memory in memories
+        ]
+        with self.metrics.measure("memory_write"):
+            self.save_longterm_memories(inputs)
+        print(f"✅ {len(inputs)} memorias conversacionales guardadas.\n")
 
     # ========== LangGraph Tools for Long-term Memory Management ==========
 
@@ -403,6 +771,44 @@ class LangGraphState:
         - page_content: 'role: contenido'
         - metadata: incluye user_phone, timestamp, rol y opcionalmente tópico
         """
+        saved = self.save_longterm_memories([input])
+        if not saved:
+            return "⚠️ No se proporcionó phone, mensaje o rol."
+
+        return f"Memoria guardada para {saved[0].metadata['user_phone']} en {saved[0].metadata['timestamp']}."
+
+    def save_longterm_memories(self, inputs: list[dict]) -> list[Document]:
+        """
+        Guarda varios recuerdos en Chroma en una sola llamada (un solo lote de
+        embeddings) y los añade al índice de recencia.
+        """
+        docs = [doc for doc in map(self.build_memory_document, inputs) if doc]
+        if not docs:
+            return []
+
+        # Add documents to vectorstore
+        self.vectorstore.add_documents(docs, ids=[doc.id for doc in docs])
+
+        recent_by_user = {}
+        for doc in docs:
+            if doc.metadata["timestamp"] is not None:
+                recent_by_user.setdefault(doc.metadata["user_phone"], []).append(
+                    {
+                        "id": doc.id,
+                        "content": doc.page_content,
+                        "timestamp": doc.metadata["timestamp"],
+                    }
+                )
+            print(
+                f"✅ Memoria guardada: [{doc.metadata['timestamp']}] {doc.page_content}"
+            )
+
+        for user_phone, recent in recent_by_user.items():
+            self.index_recent_memories(user_phone, recent)
+
+        return docs
+
+    def build_memory_document(self, input: dict) -> Document:
         user_message = input.get("user_message", "").strip()
         user_phone = input.get("user_phone", "").strip()
         role = input.get("role", "dialogue").strip()
@@ -413,14 +819,12 @@ class LangGraphState:
             topic = "general"
 
         if not user_phone or not user_message or not role:
-            return "⚠️ No se proporcionó phone, mensaje o rol."
-
-        content = f"{role}: {user_message}"
+            return None
 
         # Create document with metadata
-        doc = Document(
-            page_content=content,
-            id=str(uuid.uuid4()),
+        return Document(
+            page_content=f"{role}: {user_message}",
+            id=input.get("id") or str(uuid.uuid4()),
             metadata={
                 "user_phone": user_phone,
                 "timestamp": timestamp,
@@ -428,11 +832,6 @@ class LangGraphState:
                 **({"topic": topic} if topic else {}),
             },
         )
-        # Add document to vectorstore
-        self.vectorstore.add_documents([doc])
-
-        print(f"✅ Memoria guardada: [{timestamp}] {role} → {user_message}")
-        return f"Memoria guardada para {user_phone} en {timestamp}."
 
     from datetime import datetime, timedelta
 
@@ -443,51 +842,200 @@ class LangGraphState:
         - Filtra opcionalmente por topic y edad
         - Refuerza prioridad por recencia
         - Devuelve un set con los 15 recuerdos únicos más recientes
+
+        La búsqueda por relevancia (con la inferencia del tópico si no se pasa
+        `topic`) y la de recientes corren en paralelo con un deadline común: la
+        etapa cuesta lo que la consulta más lenta, no la suma.
+        """
+        user_phone = input.get("user_phone", "").strip()
+        if not user_phone or not input.get("user_message", "").strip():
+            return set()
+
+        results, latest_15 = self.recall_memory_candidates(input)
+
+        top_15_recent_contents = self.merge_memories(results + latest_15)
+
+        print(
+            f"🔍 Top 15 recuerdos únicos y recientes para {user_phone}: {top_15_recent_contents}",
+            "\n",
+        )
+
+        return top_15_recent_contents
+
+    def recall_memory_candidates(
+        self, input: dict, timeout: float = None
+    ) -> tuple[list[Document], list[Document]]:
+        """
+        Recuerdos relevantes (orden de MM-R) y recientes (del más nuevo al más
+        antiguo) de user_phone, buscados en paralelo.
+
+        :param timeout: Deadline de la etapa (por defecto `retrieval_deadline_seconds`).
         """
         user_message = input.get("user_message", "").strip()
         user_phone = input.get("user_phone", "").strip()
         max_age_days = input.get("max_age_days", 7)  # Default to 7 days of recency
-        topic_filter = input.get("topic", "").strip().lower()
+        topic = input.get("topic")
 
         if not user_phone or not user_message:
-            return set()
+            return [], []
 
-        metadata_filter = [{"user_phone": user_phone}]
+        relevant_future = self.retrieval_executor.submit(
+            self.search_relevant_memories, user_message, user_phone, topic, max_age_days
+        )
+        recent_future = self.retrieval_executor.submit(
+            self.search_recent_memories, user_phone
+        )
 
-        if topic_filter:
-            metadata_filter.append({"topic": topic_filter})
+        wait(
+            [relevant_future, recent_future],
+            timeout=self.retrieval_deadline_seconds if timeout is None else timeout,
+        )
+        return (
+            self.future_result(relevant_future, "relevantes"),
+            self.future_result(recent_future, "recientes"),
+        )
+
+    def future_result(self, future: Future, name: str) -> list:
+        """
+        Resultado de una búsqueda de la etapa de recuperación; si falló o no
+        terminó antes del deadline se continúa sin ella.
+        """
+        if not future.done():
+            future.cancel()
+            print(
+                f"⏱️ Búsqueda de recuerdos {name} no terminó a tiempo. Se omite.",
+                "\n",
+            )
+            return []
+
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"❌ Error en la búsqueda de recuerdos {name}: {e}", "\n")
+            return []
+
+    def search_relevant_memories(
+        self,
+        user_message: str,
+        user_phone: str,
+        topic: str = None,
+        max_age_days: int = 7,
+    ) -> list[Document]:
+        """
+        Los 10 recuerdos más relevantes con MM-R, en orden de relevancia.
+
+        Filtra por el tópico del mensaje; si no hay ninguno con ese tópico (p. ej.
+        memorias guardadas con los tópicos libres que generaba el LLM antes del
+        clasificador local), repite la búsqueda sin filtrar por tópico.
+        """
+        if topic is None:
+            with self.metrics.measure("topic_inference"):
+                topic = self.infer_topic_from_message(user_message)
+        topic_filter = topic.strip().lower()
+
+        metadata_filter = [{"user_phone": user_phone}]
 
         if max_age_days is not None:
             cutoff = datetime.utcnow() - timedelta(days=max_age_days)
             cutoff_timestamp = int(cutoff.timestamp())
             metadata_filter.append({"timestamp": {"$gte": cutoff_timestamp}})
 
-        final_filter = {"$and": metadata_filter}
-        print("🔍 Final filter", final_filter, "\n")
+        if topic_filter:
+            memories = self.search_memories(
+                user_message, metadata_filter + [{"topic": topic_filter}]
+            )
+            if memories:
+                return memories
+        return self.search_memories(user_message, metadata_filter)
 
-        # 🔍 Recuperar los 10 recuerdos más relevantes con MM-R y ordenarlos por recencia
-        docs = self.vectorstore.max_marginal_relevance_search(
-            query=user_message,
-            k=10,
-            fetch_k=30,
-            filter=final_filter,
+    def search_memories(self, user_message: str, metadata_filter: list) -> list[Document]:
+        final_filter = (
+            {"$and": metadata_filter} if len(metadata_filter) > 1 else metadata_filter[0]
         )
-        docs = sorted(docs, key=lambda d: d.metadata.get("timestamp", ""), reverse=True)
-        results = docs
-
-        # 🔍 Recuperar los 15 recuerdos más recientes del usuario (sin importar relevancia)
-        user_docs = self.vectorstore.similarity_search(
-            query="",
-            k=100,
-            filter={"user_phone": user_phone},
+        print("🔍 Final filter", final_filter, "\n")
+
+        with self.metrics.measure("chroma_search"):
+            return self.vectorstore.max_marginal_relevance_search(
+                query=user_message,
+                k=10,
+                fetch_k=30,
+                filter=final_filter,
+            )
+
+    def search_recent_memories(self, user_phone: str, limit: int = 15) -> list[Document]:
+        """
+        Los 15 recuerdos más recientes del usuario (sin importar relevancia), leídos
+        del índice de recencia en Redis: sin embeddings ni búsqueda vectorial.
+        """
+        with self.metrics.measure("recent_memories"):
+            memories = self.whatsapp_repository.get_recent_memories(user_phone, limit)
+
+        # Un índice vacío tras la reconstrucción es un usuario sin memorias.
+        if not memories and not self.whatsapp_repository.recent_memories_backfilled(
+            user_phone
+        ):
+            memories = self.backfill_recent_memories(user_phone)[:limit]
+
+        return [
+            Document(
+                page_content=memory["content"],
+                id=memory.get("id"),
+                metadata={"user_phone": user_phone, "timestamp": memory["timestamp"]},
+            )
+            for memory in memories
+        ]
+
+    def backfill_recent_memories(self, user_phone: str) -> list[dict]:
+        """
+        Reconstruye el índice de recencia de un usuario desde Chroma (`get` por
+        metadatos, sin embeddings, hasta `recent_memories_backfill_limit`). Ocurre
+        una sola vez por usuario: queda marcado aunque no tenga memorias.
+        """
+        result = self.vectorstore.get(
+            where={"user_phone": user_phone},
+            limit=self.recent_memories_backfill_limit,
+            include=["documents", "metadatas"],
         )
-        docs_with_timestamps = [doc for doc in user_docs if "timestamp" in doc.metadata]
-        docs_with_timestamps.sort(key=lambda d: d.metadata["timestamp"], reverse=True)
-        latest_15 = docs_with_timestamps[:15]
 
-        # 🔗 Unir ambos conjuntos de recuerdos 10 + 15
-        combined_docs = results + latest_15
+        memories = [
+            {"id": id, "content": content, "timestamp": metadata["timestamp"]}
+            for id, content, metadata in zip(
+                result.get("ids", []),
+                result.get("documents", []),
+                result.get("metadatas", []),
+            )
+            if metadata and metadata.get("timestamp") is not None
+        ]
+        memories.sort(key=lambda m: m["timestamp"], reverse=True)
+
+        if memories:
+            print(f"🗂️ Reconstruyendo índice de recencia de {user_phone}.", "\n")
+            # Sin índice no se marca: se reintenta en el próximo turno.
+            if not self.index_recent_memories(user_phone, memories):
+                return memories
+        try:
+            self.whatsapp_repository.mark_recent_memories_backfilled(user_phone)
+        except Exception as e:
+            print(f"❌ Error marcando el índice de recencia: {e}", "\n")
+        return memories
 
+    def index_recent_memories(self, user_phone: str, memories: list[dict]) -> bool:
+        """
+        Añade memorias al índice de recencia. El índice es una optimización: si
+        falla, la memoria ya quedó guardada en Chroma.
+        :return: Si se actualizó el índice.
+        """
+        try:
+            self.whatsapp_repository.add_recent_memories(user_phone, memories)
+            return True
+        except Exception as e:
+            print(f"❌ Error actualizando el índice de recencia: {e}", "\n")
+            return False
+
+    def merge_memories(self, combined_docs: list[Document]) -> list[str]:
+        """
+        Une los recuerdos relevantes y recientes, sin duplicados, en orden cronológico.
+        """
         # 🧹 Eliminar duplicados por contenido
         unique_docs_dict = {}
         for doc in combined_docs:
@@ -509,16 +1057,21 @@ class LangGraphState:
         sorted_unique_docs = sorted_unique_docs[::-1]
 
         # 🎯 Tomar solo los 15 más recientes
-        top_15_recent_contents = [content for content, _ in sorted_unique_docs[:15]]
+        return [content for content, _ in sorted_unique_docs[:15]]
 
-        print(
-            f"🔍 Top 15 recuerdos únicos y recientes para {user_phone}: {top_15_recent_contents}",
-            "\n",
-        )
+    def infer_topic_from_message(self, message: str) -> str:
+        """
+        Infiere un tópico corto (1 a 3 palabras) para el mensaje con el clasificador
+        local; el LLM solo se usa cuando la confianza del clasificador es baja.
+        """
+        if self.topic_classifier is None:
+            return self.infer_topic_with_llm(message)
 
-        return top_15_recent_contents
+        return self.topic_classifier.infer_topic(
+            message, fallback=self.infer_topic_with_llm
+        )
 
-    def infer_topic_from_message(self, message: str) -> str:
+    def infer_topic_with_llm(self, message: str) -> str:
         """
         Usa el LLM para inferir un tópico corto (1 a 3 palabras) que represente el contenido del mensaje.
         """
@@ -546,4 +1099,5 @@ class LangGraphState:
             }
         )
         response = self.llm.invoke(prompt)
+        self.record_llm_usage("topic", getattr(response, "usage_metadata", None))
         return response.content.strip().lower()
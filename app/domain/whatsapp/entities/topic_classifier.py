@@ -0,0 +1,208 @@
+from typing import Callable, Optional, Tuple
+from threading import Lock
+import hashlib
+import re
+import unicodedata
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+
+# Tópicos del asistente y sus palabras clave (sin tildes, en minúscula).
+# Las palabras sueltas se comparan como prefijo de cada token ("valora" -> "valoración",
+# "valorar"); las frases se buscan completas en el mensaje.
+TOPIC_KEYWORDS = {
+    "valoración médica": [
+        "valoracion", "valorar", "valoren", "consulta", "virtual", "presencial",
+        "evaluacion", "revisen mi caso",
+    ],
+    "agendamiento cita": [
+        "agenda", "cita", "horario", "fecha", "disponib", "reserv", "turno",
+        "semana", "manana", "lunes", "martes", "miercoles", "jueves", "viernes",
+        "sabado",
+    ],
+    "cancelación cita": [
+        "cancel", "reprogram", "aplazar", "cambiar la cita", "mover la cita",
+        "no puedo asistir",
+    ],
+    "ubicación consultorio": [
+        "ubicacion", "ubicad", "direccion", "donde queda", "donde estan",
+        "donde es", "como llego", "mapa", "sede", "consultorio",
+    ],
+    "precios cirugía": [
+        "precio", "costo", "cuesta", "cuanto vale", "valor de", "tarifa", "cotiz",
+        "financ", "credito",
+    ],
+    "pagos": [
+        "pago", "pagar", "pague", "transferencia", "bancolombia", "link de pago",
+        "comprobante", "consign", "tarjeta", "nequi", "abono",
+    ],
+    "cirugía estética": [
+        "estetic", "lipo", "abdominoplast", "mamoplast", "aumento de senos",
+        "senos", "busto", "mamas", "rinoplast", "blefaroplast", "gluteo",
+        "implante", "bbl",
+    ],
+    "cirugía reconstructiva": [
+        "reconstruc", "cicatri", "quemadura", "malformacion", "secuela",
+    ],
+    "mínimamente invasivos": [
+        "botox", "toxina", "hialuronico", "relleno", "armonizacion",
+        "minimamente invasiv",
+    ],
+    "información cirugía": [
+        "cirugia", "operacion", "operarme", "operar", "procedimiento",
+        "postoperatorio", "recuperacion", "incapacidad", "anestesia",
+    ],
+    "datos personales": [
+        "nombre", "correo", "email", "documento", "cedula", "nacimiento",
+        "identidad", "pasaporte", "gmail", "hotmail", "outlook",
+    ],
+    "saludo": [
+        "hola", "buenos dias", "buenas tardes", "buenas noches", "buen dia",
+        "saludos", "gracias",
+    ],
+}
+
+# Tópicos genéricos: pesan menos para que uno específico gane el empate
+# ("precio de la cirugía" -> "precios cirugía").
+TOPIC_WEIGHTS = {"información cirugía": 0.5}
+
+DEFAULT_TOPIC = "general"
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sin tildes y sin signos de puntuación."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^\w\s]", " ", text).strip()
+
+
+class TopicClassifier:
+    """
+    Clasificador local de tópicos para los mensajes de los pacientes.
+
+    Puntúa cada tópico por palabras clave (sobre el texto normalizado y, si spaCy
+    y `es_core_news_sm` están disponibles, también sobre los lemas). Solo cuando la
+    confianza es baja se recurre al `fallback` (el LLM). Los resultados se cachean
+    por hash del mensaje.
+    """
+
+    def __init__(
+        self,
+        cache: TTLLRUCache = None,
+        min_confidence: float = 0.5,
+        use_spacy: bool = True,
+        spacy_model: str = "es_core_news_sm",
+        short_message_tokens: int = 3,
+    ) -> None:
+        """
+        :param cache: Cache de tópicos por hash de mensaje.
+        :param min_confidence: Confianza mínima para no llamar al fallback.
+        :param use_spacy: Lematizar con spaCy si el modelo está instalado.
+        :param short_message_tokens: Mensajes sin palabras clave de hasta este
+            número de tokens ("sí", "ok, listo") se clasifican como "general"
+            sin llamar al fallback.
+        """
+        self.cache = cache if cache is not None else TTLLRUCache(max_size=5000, ttl_seconds=0)
+        self.min_confidence = min_confidence
+        self.short_message_tokens = short_message_tokens
+        self.nlp = self.load_spacy(spacy_model) if use_spacy else None
+
+        self.lock = Lock()
+        self.local_hits = 0
+        self.fallbacks = 0
+
+    def load_spacy(self, model: str):
+        try:
+            import spacy
+
+            nlp = spacy.load(model, disable=["parser", "ner"])
+            print(f"✅ Modelo spaCy '{model}' cargado para clasificar tópicos.", "\n")
+            return nlp
+        except Exception as e:
+            print(f"⚠️ spaCy '{model}' no disponible, se usan solo palabras clave: {e}", "\n")
+            return None
+
+    def tokens(self, message: str, normalized: str) -> set:
+        tokens = set(normalized.split())
+        if self.nlp is not None:
+            tokens.update(
+                normalize_text(token.lemma_)
+                for token in self.nlp(message)
+                if not token.is_punct and not token.is_space
+            )
+        return tokens
+
+    def classify(self, message: str) -> Tuple[str, float]:
+        """
+        Clasifica un mensaje sin usar el LLM.
+
+        :return: (tópico, confianza entre 0 y 1).
+        """
+        normalized = normalize_text(message)
+        if not normalized:
+            return DEFAULT_TOPIC, 1.0
+
+        tokens = self.tokens(message, normalized)
+        padded = f" {normalized} "
+
+        scores = {}
+        for topic, keywords in TOPIC_KEYWORDS.items():
+            score = 0
+            for keyword in keywords:
+                if " " in keyword:
+                    matched = f" {keyword} " in padded
+                else:
+                    matched = any(token.startswith(keyword) for token in tokens)
+                if matched:
+                    score += TOPIC_WEIGHTS.get(topic, 1)
+            if score:
+                scores[topic] = score
+
+        if not scores:
+            # Mensajes cortos sin contenido ("sí", "ok") no necesitan al LLM.
+            if len(normalized.split()) <= self.short_message_tokens:
+                return DEFAULT_TOPIC, 1.0
+            return DEFAULT_TOPIC, 0.0
+
+        topic, best = max(scores.items(), key=lambda item: item[1])
+        confidence = best / sum(scores.values())
+        # Una sola coincidencia es una señal más débil que varias.
+        if best < 2:
+            confidence *= 0.8
+
+        return topic, round(confidence, 4)
+
+    def infer_topic(
+        self, message: str, fallback: Optional[Callable[[str], str]] = None
+    ) -> str:
+        """
+        Tópico de un mensaje: cache -> clasificador local -> fallback si la
+        confianza es baja.
+        """
+        key = hashlib.sha1(normalize_text(message).encode("utf-8")).hexdigest()
+        topic = self.cache.get(key)
+        if topic is not None:
+            return topic
+
+        topic, confidence = self.classify(message)
+
+        if confidence < self.min_confidence and fallback is not None:
+            with self.lock:
+                self.fallbacks += 1
+            try:
+                topic = fallback(message) or DEFAULT_TOPIC
+            except Exception as e:
+                print(f"❌ Error infiriendo el tópico con el fallback: {e}", "\n")
+                topic = DEFAULT_TOPIC
+        else:
+            with self.lock:
+                self.local_hits += 1
+
+        self.cache.set(key, topic)
+        return topic
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "local_hits": self.local_hits,
+                "fallbacks": self.fallbacks,
+                "cache": self.cache.stats(),
+            }
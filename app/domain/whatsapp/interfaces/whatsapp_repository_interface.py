@@ -37,6 +37,80 @@ class WhatsappRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def drain_message_buffer(self, user: str) -> tuple:
+        """
+        Take every buffered message of a user for processing.
+
+        :param user: The WhatsApp number of the user.
+        :return: (the messages to process, oldest first; the ones taken from the
+            buffer by this call, which were not seen by a previous attempt).
+        """
+        pass
+
+    @abstractmethod
+    def ack_message_buffer(self, user: str, pipeline=None) -> None:
+        """
+        Confirm the drained messages of a user were processed.
+        """
+        pass
+
+    @abstractmethod
+    def dead_letter_message_buffer(self, user: str, pipeline=None) -> None:
+        """
+        Set aside the drained messages of a user whose turn was dropped.
+        """
+        pass
+
+    @abstractmethod
+    def save_pending_replies(self, user: str, replies: list, answered: int) -> None:
+        """
+        Save the replies of a turn before sending them.
+        """
+        pass
+
+    @abstractmethod
+    def get_pending_replies(self, user: str) -> tuple:
+        """
+        Replies saved for the in-flight messages: (replies, sent, answered).
+        """
+        pass
+
+    @abstractmethod
+    def mark_reply_sent(self, user: str) -> None:
+        """
+        Record that the next saved reply was delivered.
+        """
+        pass
+
+    @abstractmethod
+    def add_recent_memories(self, user: str, memories: list) -> None:
+        """
+        Add memories to the user's recency index.
+        """
+        pass
+
+    @abstractmethod
+    def get_recent_memories(self, user: str, limit: int = 15) -> list:
+        """
+        Get the newest memories of the user, newest first.
+        """
+        pass
+
+    @abstractmethod
+    def mark_recent_memories_backfilled(self, user: str) -> None:
+        """
+        Record that the recency index of the user was rebuilt.
+        """
+        pass
+
+    @abstractmethod
+    def recent_memories_backfilled(self, user: str) -> bool:
+        """
+        Whether the recency index of the user was already rebuilt.
+        """
+        pass
+
     @abstractmethod
     def save_message(self, *args, **kwargs):
         """
@@ -44,6 +118,20 @@ class WhatsappRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def save_messages(self, messages: list) -> None:
+        """
+        Save several conversation messages in a single call.
+        """
+        pass
+
+    @abstractmethod
+    def queue_message(self, user: dict, type_sender: str, message: dict) -> None:
+        """
+        Queue a conversation message to be saved in the background.
+        """
+        pass
+
     @abstractmethod
     def update_contact_by_id(self, *args, **kwargs):
         """
@@ -0,0 +1,198 @@
+from langchain_core.embeddings import Embeddings
+from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
+from threading import Lock
+from typing import List, Optional
+import json
+import time
+import uuid
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Global (not per user) cache of assistant answers, looked up by the
+    similarity of the question embedding.
+
+    Entries live in Redis with a TTL, under a namespace that includes the prompt
+    version: changing the prompt template (or bumping the version) starts an
+    empty cache. Every process keeps a local copy of the vectors, refreshed
+    every `refresh_seconds`, so a lookup is one embedding plus a dot product.
+    """
+
+    def __init__(
+        self,
+        redis_connection: DBConnectionInterface,
+        embeddings: Embeddings,
+        version: str,
+        similarity_threshold: float = 0.92,
+        ttl_seconds: int = 60 * 60 * 24,
+        max_entries: int = 500,
+        refresh_seconds: float = 30,
+        prefix: str = "whatsapp:answer_cache",
+    ) -> None:
+        """
+        :param version: Prompt/template version; part of the namespace.
+        :param similarity_threshold: Minimum cosine similarity for a hit.
+        """
+        self.redis_connection = redis_connection
+        self.embeddings = embeddings
+        self.namespace = f"{prefix}:{version}"
+        self.index_key = f"{self.namespace}:ids"
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+
+        self.lock = Lock()
+        self.entries = []
+        self.vectors = None
+        self.refreshed_at = 0.0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        if not self.redis_connection.is_connected():
+            self.redis_connection.connect()
+
+    def entry_key(self, entry_id: str) -> str:
+        return f"{self.namespace}:entry:{entry_id}"
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question: str, intent: str = None) -> Optional[List[dict]]:
+        """
+        Cached responses for the most similar question above the threshold, or None.
+
+        :param intent: Only compare with the questions stored under this intent.
+        """
+        self.refresh()
+        with self.lock:
+            entries, vectors = self.entries, self.vectors
+
+        indexes = [
+            index
+            for index, entry in enumerate(entries)
+            if intent is None or entry.get("intent") == intent
+        ]
+        if not indexes:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        similarities = vectors[indexes] @ self.embed(question)
+        best = int(np.argmax(similarities))
+        hit = similarities[best] >= self.similarity_threshold
+        entry = entries[indexes[best]]
+
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not hit:
+            return None
+
+        print(
+            f"⚡ Respuesta cacheada (similitud {similarities[best]:.3f}) para: {entry['question']}",
+            "\n",
+        )
+        return entry["responses"]
+
+    def store(self, question: str, responses: List[dict], intent: str = None) -> None:
+        """Cache the responses given to a question (of an FAQ intent)."""
+        entry = {
+            "id": str(uuid.uuid4()),
+            "intent": intent,
+            "question": question,
+            "vector": self.embed(question).tolist(),
+            "responses": responses,
+        }
+
+        client = self.redis_connection.get_connection()
+        pipeline = client.pipeline(transaction=True)
+        pipeline.set(
+            self.entry_key(entry["id"]),
+            json.dumps(entry, ensure_ascii=False),
+            ex=self.ttl_seconds,
+        )
+        pipeline.zadd(self.index_key, {entry["id"]: time.time() + self.ttl_seconds})
+        pipeline.expire(self.index_key, self.ttl_seconds)
+        pipeline.execute()
+
+        # Respeta el tamaño máximo descartando las entradas más antiguas.
+        overflow = client.zcard(self.index_key) - self.max_entries
+        if overflow > 0:
+            oldest = client.zrange(self.index_key, 0, overflow - 1)
+            pipeline = client.pipeline(transaction=True)
+            pipeline.zrem(self.index_key, *oldest)
+            pipeline.delete(*[self.entry_key(i.decode()) for i in oldest])
+            pipeline.execute()
+
+        with self.lock:
+            self.stores += 1
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> None:
+        """Reload the local copy of the entries from Redis."""
+        if not force and time.monotonic() - self.refreshed_at < self.refresh_seconds:
+            return
+
+        client = self.redis_connection.get_connection()
+        client.zremrangebyscore(self.index_key, "-inf", time.time())
+        ids = [entry_id.decode() for entry_id in client.zrange(self.index_key, 0, -1)]
+        values = client.mget([self.entry_key(i) for i in ids]) if ids else []
+        entries = [json.loads(value) for value in values if value]
+
+        with self.lock:
+            self.entries = entries
+            self.vectors = (
+                np.asarray([e["vector"] for e in entries], dtype=np.float32)
+                if entries
+                else None
+            )
+            self.refreshed_at = time.monotonic()
+
+    def invalidate(self, intent: str = None) -> int:
+        """
+        Drop every entry of the current namespace (or only those of `intent`);
+        return how many.
+        """
+        client = self.redis_connection.get_connection()
+        ids = [entry_id.decode() for entry_id in client.zrange(self.index_key, 0, -1)]
+        if intent is not None and ids:
+            values = client.mget([self.entry_key(i) for i in ids])
+            ids = [
+                entry_id
+                for entry_id, value in zip(ids, values)
+                if value and json.loads(value).get("intent") == intent
+            ]
+
+        pipeline = client.pipeline(transaction=True)
+        if ids:
+            pipeline.delete(*[self.entry_key(i) for i in ids])
+            pipeline.zrem(self.index_key, *ids)
+        if intent is None:
+            pipeline.delete(self.index_key)
+        pipeline.execute()
+
+        print(f"🧹 Cache de respuestas invalidada: {len(ids)} entradas", "\n")
+        self.refresh(force=True)
+        return len(ids)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,328 @@
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import base64
+import json
+import random
+import time
+
+
+class RedisCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer on Redis. The thread is the user's phone number, so
+    the state of each conversation persists between turns and a turn that was
+    interrupted (crash, redeploy) resumes from its last completed node.
+
+    Per thread and namespace:
+    - `{prefix}:{thread}:{ns}`: sorted set of checkpoint ids by creation time.
+    - `{prefix}:{thread}:{ns}:{id}`: hash with the checkpoint (channel values
+      included), its metadata and its parent.
+    - `{prefix}:{thread}:{ns}:{id}:writes`: hash with the pending writes.
+
+    Only the last `max_checkpoints` of a thread are kept, and every key expires
+    `ttl_seconds` after the last turn.
+    """
+
+    def __init__(
+        self,
+        redis_connection: DBConnectionInterface,
+        prefix: str = "whatsapp:checkpoints",
+        ttl_seconds: int = 60 * 60 * 24 * 7,
+        max_checkpoints: int = 20,
+    ) -> None:
+        """
+        :param ttl_seconds: Seconds a conversation's checkpoints live after its last write.
+        :param max_checkpoints: Checkpoints kept per thread (the oldest are dropped).
+        """
+        super().__init__()
+        self.redis_connection = redis_connection
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints = max_checkpoints
+
+        if not self.redis_connection.is_connected():
+            self.redis_connection.connect()
+
+    # ========== Keys ==========
+    def index_key(self, thread_id: str, checkpoint_ns: str) -> str:
+        return f"{self.prefix}:{thread_id}:{checkpoint_ns}"
+
+    def checkpoint_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{self.prefix}:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    def writes_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{self.checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)}:writes"
+
+    # ========== Serialization ==========
+    def dumps(self, value: Any) -> str:
+        type_, data = self.serde.dumps_typed(value)
+        return json.dumps([type_, base64.b64encode(data).decode()])
+
+    def loads(self, value) -> Any:
+        type_, data = json.loads(value)
+        return self.serde.loads_typed((type_, base64.b64decode(data)))
+
+    # ========== Read ==========
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Checkpoint of `config` (its checkpoint_id, or the latest of the thread)."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        if not checkpoint_id:
+            latest = self.redis_connection.get_connection().zrevrange(
+                self.index_key(thread_id, checkpoint_ns), 0, 0
+            )
+            if not latest:
+                return None
+            checkpoint_id = latest[0].decode()
+
+        return self.load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints of the thread of `config`, newest first."""
+        if not config:
+            raise ValueError("RedisCheckpointSaver.list requiere un thread_id.")
+
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        config_checkpoint_id = get_checkpoint_id(config)
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+
+        checkpoint_ids = self.redis_connection.get_connection().zrevrange(
+            self.index_key(thread_id, checkpoint_ns), 0, -1
+        )
+        for checkpoint_id in (i.decode() for i in checkpoint_ids):
+            if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                continue
+            if before_checkpoint_id and checkpoint_id >= before_checkpoint_id:
+                continue
+
+            checkpoint_tuple = self.load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+            if checkpoint_tuple is None:
+                continue
+            if filter and not all(
+                checkpoint_tuple.metadata.get(key) == value
+                for key, value in filter.items()
+            ):
+                continue
+
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield checkpoint_tuple
+
+    def load_tuple(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> Optional[CheckpointTuple]:
+        client = self.redis_connection.get_connection()
+        saved = client.hgetall(self.checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+        if not saved:
+            return None
+
+        parent_id = saved.get(b"parent_id", b"").decode() or None
+        writes = self.load_writes(thread_id, checkpoint_ns, checkpoint_id)
+
+        # Los Send pendientes del paso anterior se guardan como writes del padre.
+        pending_sends = []
+        if parent_id:
+            pending_sends = [
+                value
+                for _, channel, value in self.load_writes(
+                    thread_id, checkpoint_ns, parent_id
+                )
+                if channel == TASKS
+            ]
+
+        checkpoint = self.loads(saved[b"checkpoint"])
+        return CheckpointTuple(
+            config=self.make_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint={**checkpoint, "pending_sends": pending_sends},
+            metadata=self.loads(saved[b"metadata"]),
+            parent_config=(
+                self.make_config(thread_id, checkpoint_ns, parent_id)
+                if parent_id
+                else None
+            ),
+            pending_writes=writes,
+        )
+
+    def load_writes(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> List[Tuple[str, str, Any]]:
+        """(task_id, channel, value) of a checkpoint, in the order of the tasks."""
+        saved = self.redis_connection.get_connection().hgetall(
+            self.writes_key(thread_id, checkpoint_ns, checkpoint_id)
+        )
+        writes = sorted(json.loads(value) for value in saved.values())
+        return [
+            (task_id, channel, self.loads(value))
+            for _, _, task_id, channel, value in writes
+        ]
+
+    # ========== Write ==========
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint (with its channel values) as the latest of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = checkpoint["id"]
+
+        saved = checkpoint.copy()
+        saved.pop("pending_sends", None)
+
+        client = self.redis_connection.get_connection()
+        index_key = self.index_key(thread_id, checkpoint_ns)
+        checkpoint_key = self.checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)
+
+        pipeline = client.pipeline(transaction=True)
+        pipeline.hset(
+            checkpoint_key,
+            mapping={
+                "checkpoint": self.dumps(saved),
+                "metadata": self.dumps(get_checkpoint_metadata(config, metadata)),
+                "parent_id": config["configurable"].get("checkpoint_id") or "",
+            },
+        )
+        pipeline.expire(checkpoint_key, self.ttl_seconds)
+        pipeline.zadd(index_key, {checkpoint_id: time.time()})
+        pipeline.expire(index_key, self.ttl_seconds)
+        pipeline.execute()
+
+        self.trim(thread_id, checkpoint_ns)
+        return self.make_config(thread_id, checkpoint_ns, checkpoint_id)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save the writes of a task for the checkpoint of `config`."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        writes_key = self.writes_key(thread_id, checkpoint_ns, checkpoint_id)
+
+        pipeline = self.redis_connection.get_connection().pipeline(transaction=True)
+        for index, (channel, value) in enumerate(writes):
+            write_index = WRITES_IDX_MAP.get(channel, index)
+            field = f"{task_id}:{write_index}"
+            saved = json.dumps(
+                [task_path, write_index, task_id, channel, self.dumps(value)]
+            )
+            # Los writes normales no se repiten; los especiales (errores,
+            # interrupciones) reemplazan al anterior.
+            if write_index >= 0:
+                pipeline.hsetnx(writes_key, field, saved)
+            else:
+                pipeline.hset(writes_key, field, saved)
+        pipeline.expire(writes_key, self.ttl_seconds)
+        pipeline.execute()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread (a phone number)."""
+        client = self.redis_connection.get_connection()
+        keys = list(client.scan_iter(match=f"{self.prefix}:{thread_id}:*", count=500))
+        if keys:
+            client.delete(*keys)
+
+    def trim(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop the oldest checkpoints of a thread beyond `max_checkpoints`."""
+        client = self.redis_connection.get_connection()
+        index_key = self.index_key(thread_id, checkpoint_ns)
+        overflow = client.zcard(index_key) - self.max_checkpoints
+        if overflow <= 0:
+            return
+
+        oldest = [i.decode() for i in client.zrange(index_key, 0, overflow - 1)]
+        pipeline = client.pipeline(transaction=True)
+        pipeline.zrem(index_key, *oldest)
+        for checkpoint_id in oldest:
+            pipeline.delete(
+                self.checkpoint_key(thread_id, checkpoint_ns, checkpoint_id),
+                self.writes_key(thread_id, checkpoint_ns, checkpoint_id),
+            )
+        pipeline.execute()
+
+    def make_config(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        # Versiones de texto ordenables (mismo formato que el saver en memoria).
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    # ========== Async (ASGI) ==========
+    # Offloads a hilos del executor por defecto (el cliente Redis es síncrono),
+    # no I/O asíncrona: liberan el event loop pero ocupan un hilo por llamada.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], **kwargs):
+        for checkpoint_tuple in await asyncio.to_thread(
+            lambda: list(self.list(config, **kwargs))
+        ):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
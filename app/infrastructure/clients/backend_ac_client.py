@@ -1,21 +1,73 @@
 from infrastructure.interfaces.backend_ac_client_interface import (
     BackendACClientInterface,
 )
+from infrastructure.metrics.prometheus_metrics import PrometheusMetrics
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import requests
 import json
+import time
 
 
 class BackendACClient(BackendACClientInterface):
 
-    def __init__(self, api_url: str, api_key: str):
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        max_retries: int = 2,
+        backoff_factor: float = 0.3,
+        metrics: PrometheusMetrics = None,
+    ):
+        """
+        Initialize the client with a pooled keep-alive session.
+
+        :param pool_size: Max connections kept alive to the backend.
+        :param connect_timeout: Seconds to establish the connection.
+        :param read_timeout: Seconds to wait for the response.
+        :param max_retries: Retries for idempotent calls (GET, PUT, DELETE).
+        :param backoff_factor: Base of the exponential backoff between retries.
+        :param metrics: Prometheus metrics where the call latency is exported.
+        """
         self.api_url = api_url
         self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.metrics = metrics or PrometheusMetrics()
+        self.session = self.create_session(pool_size, max_retries, backoff_factor)
+        # False once the backend answered 404/405 on the bulk endpoint (until
+        # the process restarts).
+        self.bulk_messages_supported = True
 
-    # 1.
-    def get_contact_by_number(self, number):
-        try:
-            url = f"{self.api_url}/whatsapp/contacts/{number}"
-            headers = {
+    def create_session(
+        self, pool_size: int, max_retries: int, backoff_factor: float
+    ) -> requests.Session:
+        """
+        Build the shared session: keep-alive pool, default headers and retries
+        with jittered exponential backoff for idempotent methods only.
+        """
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "PUT", "DELETE"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(
+            {
                 "Content-Type": "application/json",
                 "Accept": "application/json, text/plain, */*",
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -23,12 +75,34 @@ class BackendACClient(BackendACClientInterface):
                 "Chrome/92.0.4515.159 Safari/537.36",
                 "Connection": "keep-alive",
             }
+        )
+        return session
+
+    def request(self, endpoint: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared session, recording its latency under `endpoint`.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        started_at = time.perf_counter()
+        error = False
+        try:
+            response = self.session.request(method, url, **kwargs)
+            error = response.status_code >= 500
+            return response
+        except Exception:
+            error = True
+            raise
+        finally:
+            seconds = time.perf_counter() - started_at
+            self.metrics.observe_call("backend_ac", endpoint, seconds, error)
+
+    # 1.
+    def get_contact_by_number(self, number):
+        try:
+            url = f"{self.api_url}/whatsapp/contacts/{number}"
             print(f"🔍 Fetching contact by number: {number}", "\n")
             print(f"URL: {url}", "\n\n")
-            response = requests.get(
-                url,
-                headers=headers,
-            )
+            response = self.request("get_contact_by_number", "GET", url)
             print(f"Response statrs get_contact_by_number {response.status_code}", "\n")
             print(f"Response body get_contact_by_number {response.text}", "\n\n")
             print("--------------------------------------------------", "\n")
@@ -41,20 +115,12 @@ class BackendACClient(BackendACClientInterface):
     def save_contact(self, phone_number):
         try:
             url = f"{self.api_url}/whatsapp/save/contact"
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/92.0.4515.159 Safari/537.36",
-                "Connection": "keep-alive",
-            }
             data = {
                 "phone_number": phone_number,
             }
             print(f"🔍 Saving contact: {phone_number}", "\n")
             print("Data:", data, "\n")
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = self.request("save_contact", "POST", url, data=json.dumps(data))
             print(f"Response status save_contact {response.status_code}", "\n")
             print(f"Response body save_contact {response.text}", "\n\n")
 
@@ -67,18 +133,7 @@ class BackendACClient(BackendACClientInterface):
     def delete_contact(self, contact_id):
         try:
             url = f"{self.api_url}/whatsapp/delete/contact/{contact_id}"
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/92.0.4515.159 Safari/537.36",
-                "Connection": "keep-alive",
-            }
-            response = requests.delete(
-                url,
-                headers=headers,
-            )
+            response = self.request("delete_contact", "DELETE", url)
             return response.status_code == 204
         except Exception as exception:
             print(f"❌ Error deleting contact: {exception}", "\n")
@@ -90,18 +145,12 @@ class BackendACClient(BackendACClientInterface):
     ) -> None:
         try:
             url = f"{self.api_url}/whatsapp/update/contact/{contact_id}"
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/92.0.4515.159 Safari/537.36",
-                "Connection": "keep-alive",
-            }
             data = {
                 column_to_update: new_value,
             }
-            response = requests.put(url, headers=headers, data=json.dumps(data))
+            response = self.request(
+                "update_contact_by_id", "PUT", url, data=json.dumps(data)
+            )
             return response.status_code == 200
         except Exception as exception:
             print(f"❌ Error updating contact by ID: {exception}", "\n")
@@ -116,22 +165,63 @@ class BackendACClient(BackendACClientInterface):
     ) -> None:
         try:
             url = f"{self.api_url}/whatsapp/save/message"
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/92.0.4515.159 Safari/537.36",
-                "Connection": "keep-alive",
-            }
             data = {
                 "contact_id": user_id,
                 "type_sender": type_sender,
                 "message": message,
             }
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = self.request("save_message", "POST", url, data=json.dumps(data))
             return response.status_code == 201
 
         except Exception as exception:
             print(f"❌ Error saving message: {exception}", "\n")
             raise exception
+
+    # 7.
+    def save_messages(self, messages: list) -> list:
+        """
+        Save a batch of messages in one request. Falls back to one request per
+        message when the backend does not expose the bulk endpoint.
+
+        :return: The messages that could not be stored (empty if all were).
+        """
+        if not messages:
+            return []
+
+        if not self.bulk_messages_supported:
+            return self.save_messages_one_by_one(messages)
+
+        try:
+            url = f"{self.api_url}/whatsapp/save/messages"
+            response = self.request(
+                "save_messages", "POST", url, data=json.dumps({"messages": messages})
+            )
+
+            if response.status_code in (404, 405):
+                print("⚠️ Bulk endpoint no disponible, guardando mensaje a mensaje.", "\n")
+                self.bulk_messages_supported = False
+                return self.save_messages_one_by_one(messages)
+
+            return [] if response.status_code == 201 else list(messages)
+
+        except Exception as exception:
+            print(f"❌ Error saving messages: {exception}", "\n")
+            raise exception
+
+    def save_messages_one_by_one(self, messages: list) -> list:
+        """
+        Save each message with `save_message`.
+
+        :return: The messages that could not be stored.
+        """
+        failed = []
+        for message in messages:
+            try:
+                saved = self.save_message(
+                    message["contact_id"], message["type_sender"], message["message"]
+                )
+            except Exception:
+                saved = False
+            if not saved:
+                failed.append(message)
+        return failed
@@ -1,9 +1,12 @@
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
 from datetime import datetime, timedelta, timezone, time
 import json
 import os
 from pathlib import Path
+from threading import local
 import uuid
 from infrastructure.interfaces.google_calendar_client_interface import (
     GoogleCalendarClientInterface,
@@ -15,22 +18,43 @@ from domain.calendar_event.helpers.calendar_helper import (
 from domain.whatsapp.interfaces.whatsapp_repository_interface import (
     WhatsappRepositoryInterface,
 )
+from infrastructure.metrics.prometheus_metrics import PrometheusMetrics
 
 
 class GoogleCalendarClient(GoogleCalendarClientInterface):
 
     def __init__(
-        self, whatsapp_repository: WhatsappRepositoryInterface, webhook_url
+        self,
+        whatsapp_repository: WhatsappRepositoryInterface,
+        webhook_url,
+        metrics: PrometheusMetrics = None,
+        timeout: float = 10,
     ) -> None:
+        """
+        :param timeout: Seconds per request to the Google API (httplib2 has no
+            timeout by default).
+        """
+        # googleapiclient (httplib2) is not thread-safe: one service per thread.
+        self.local = local()
         self.service = None
         self.creds = None
         self.SERVICE_ACCOUNT_FILE = None
         self.SCOPES = ["https://www.googleapis.com/auth/calendar"]
         self.utc_5 = "-05:00"
         self.whatsapp_repository = whatsapp_repository
+        self.metrics = metrics or PrometheusMetrics()
+        self.timeout = timeout
         self.connect()
         # self.register_webhook(webhook_url)
 
+    @property
+    def service(self):
+        return getattr(self.local, "service", None)
+
+    @service.setter
+    def service(self, value) -> None:
+        self.local.service = value
+
     def __del__(self):
         """
         Destructor to close the connection when the client is destroyed.
@@ -61,7 +85,7 @@ class GoogleCalendarClient(GoogleCalendarClientInterface):
             self.creds = Credentials.from_service_account_file(
                 self.SERVICE_ACCOUNT_FILE, scopes=self.SCOPES
             )
-            self.service = build("calendar", "v3", credentials=self.creds)
+            self.service = self.build_service()
 
             print("Google Calendar API connection established. ✅")
             return True
@@ -69,6 +93,13 @@ class GoogleCalendarClient(GoogleCalendarClientInterface):
             print(f"Error connecting to Google Calendar API: {e}")
             return False
 
+    def build_service(self):
+        """
+        Calendar service over an authorized HTTP client with `timeout`.
+        """
+        http = AuthorizedHttp(self.creds, http=httplib2.Http(timeout=self.timeout))
+        return build("calendar", "v3", http=http)
+
     def register_webhook(self, webhook_url):
         """
         Register a webhook to receive notifications from Google Calendar.
@@ -93,7 +124,11 @@ class GoogleCalendarClient(GoogleCalendarClientInterface):
         """
         try:
             if not self.service:
-                self.connect()
+                if self.creds:
+                    # Reutiliza las credenciales para el servicio de este hilo.
+                    self.service = self.build_service()
+                else:
+                    self.connect()
 
             print("Google Calendar API connection retrieved successfully. ✅")
             return self.service
@@ -120,6 +155,13 @@ class GoogleCalendarClient(GoogleCalendarClientInterface):
         """
         return self.service is not None and self.creds is not None
 
+    def execute(self, operation: str, request):
+        """
+        Execute a Google API request, recording its latency under `operation`.
+        """
+        with self.metrics.measure_call("google_calendar", operation):
+            return request.execute()
+
     def add_event(self, calendar_email, summary, description, start, end, attendees=[]):
         """
         Add an event to the Google Calendar.
@@ -146,8 +188,9 @@ class GoogleCalendarClient(GoogleCalendarClientInterface):
 
             print(f"Adding event to Google Calendar: {event}")
 
-            created_event = (
-                service.events().insert(calendarId=calendar_email, body=event).execute()
+            created_event = self.execute(
+                "events.insert",
+                service.events().insert(calendarId=calendar_email, body=event),
             )
 
             print(f"Event created ✅: {created_event.get('htmlLink')}")
@@ -201,7 +244,9 @@ class GoogleCalendarClient(GoogleCalendarClientInterface):
                     }
 
                     # Realizar solicitud freeBusy para obtener horarios ocupados
-                    response = service.freebusy().query(body=request_body).execute()
+                    response = self.execute(
+                        "freebusy.query", service.freebusy().query(body=request_body)
+                    )
                     busy_times = response["calendars"][calendar_email]["busy"]
 
                     for busy_time in busy_times:
@@ -257,7 +302,9 @@ class GoogleCalendarClient(GoogleCalendarClientInterface):
                 "🔍 Verificando disponibilidad del horario en Google Calendar...",
                 request_body,
             )
-            response = service.freebusy().query(body=request_body).execute()
+            response = self.execute(
+                "freebusy.query", service.freebusy().query(body=request_body)
+            )
             busy_times = response["calendars"][calendar_email]["busy"]
 
             print(
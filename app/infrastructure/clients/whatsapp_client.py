@@ -1,34 +1,268 @@
 from infrastructure.interfaces.whatsapp_client_interface import WhatsappClientInterface
-import requests
+from infrastructure.workers.keyed_worker_pool import KeyedWorkerPool
+from infrastructure.metrics.prometheus_metrics import PrometheusMetrics
+from domain.whatsapp.entities.deadline import Deadline
+from concurrent.futures import Future
+import asyncio
+import httpx
 import json
+import random
+import time
+import weakref
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Errores en los que la petición no llegó a salir: reintentar no duplica el
+# mensaje. Un timeout de lectura o una conexión cortada llegan después de que
+# la API pudo aceptar el POST, así que esos no se reintentan.
+RETRYABLE_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class DeliveryUnknownError(Exception):
+    """
+    The request was sent but no response arrived: the message may or may not
+    have been delivered, so it must not be sent again.
+    """
 
 
 class WhatsappClient(WhatsappClientInterface):
 
-    def __init__(self, whatsapp_api_url: str, token: str) -> None:
-        """Initialize the WhatsApp client with the API URL and token."""
+    def __init__(
+        self,
+        whatsapp_api_url: str,
+        token: str,
+        max_connections: int = 20,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_concurrent_recipients: int = 8,
+        metrics: PrometheusMetrics = None,
+        min_send_timeout: float = 3.0,
+    ) -> None:
+        """
+        Initialize the WhatsApp client with the API URL and token.
+
+        :param max_connections: Keep-alive connections kept to the Graph API.
+        :param max_retries: Retries on 429/5xx and connection errors.
+        :param backoff_factor: Base of the exponential backoff when the API does
+            not send a Retry-After header.
+        :param max_concurrent_recipients: Recipients sent to in parallel by
+            `send_message_async`. Messages to the same recipient keep their order.
+        :param metrics: Prometheus metrics where the send latency is exported.
+        :param min_send_timeout: Read timeout of an attempt when the turn deadline
+            is (almost) spent: the reply is still sent, but not retried.
+        """
         self.whatsapp_api_url = whatsapp_api_url
         self.token = token
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.metrics = metrics or PrometheusMetrics()
 
-    def send_message(self, format_message: dict) -> None:
+        self.http_client = httpx.Client(
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": "Bearer " + self.token,
+            },
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self.sender_pool = KeyedWorkerPool(
+            max_workers=max_concurrent_recipients, name="whatsapp-sender"
+        )
+
+        # Async client (ASGI): created lazily inside the running event loop.
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.min_send_timeout = min_send_timeout
+        self.max_connections = max_connections
+        self.async_http_client = None
+        self.recipient_locks = weakref.WeakValueDictionary()
+
+    def send_message(self, format_message: dict, deadline: Deadline = None) -> dict:
         """
         Send a message to a WhatsApp number.
+
+        :param deadline: Turn deadline; attempts use the remaining budget as
+            timeout and are not retried once it is spent.
+        :return: The parsed Graph API response (message id and recipient).
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "Bearer " + self.token,
-        }
         try:
-            response = requests.post(
-                self.whatsapp_api_url, data=json.dumps(format_message), headers=headers
-            )
+            with self.metrics.measure_call("whatsapp", "send_message"):
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        response = self.http_client.post(
+                            self.whatsapp_api_url,
+                            content=json.dumps(format_message),
+                            timeout=self.get_attempt_timeout(deadline),
+                        )
+                    except RETRYABLE_TRANSPORT_ERRORS as exception:
+                        delay = self.get_retry_delay(attempt)
+                        if not self.can_retry(attempt, delay, deadline):
+                            raise exception
+                        print(f"⚠️ Error de red enviando mensaje: {exception}", "\n")
+                        time.sleep(delay)
+                        continue
+                    except httpx.TransportError as exception:
+                        raise DeliveryUnknownError(
+                            f"Sin respuesta de la API de WhatsApp: {exception!r}"
+                        ) from exception
+
+                    print(f"========= Response from WhatsApp API: =========== \n")
+                    print(f"Response message: {response.text}", "\n")
+                    print(f"Response status code: {response.status_code}", "\n")
 
-            print(f"========= Response from WhatsApp API: =========== \n")
-            print(f"Response message: {response.text}", "\n")
-            print(f"Response status code: {response.status_code}", "\n")
+                    delay = self.get_retry_delay(attempt, response)
+                    if response.status_code in RETRYABLE_STATUS_CODES and self.can_retry(
+                        attempt, delay, deadline
+                    ):
+                        time.sleep(delay)
+                        continue
 
-            # return response.status_code == 200
+                    return self.parse_response(response)
 
         except Exception as exception:
             print(f"❌ Error sending message: {exception}", "\n")
             raise exception
+
+    def send_message_async(
+        self, format_message: dict, deadline: Deadline = None
+    ) -> Future:
+        """
+        Queue a message to be sent in the background. Messages to the same
+        recipient are sent strictly in order; different recipients in parallel.
+        """
+        return self.sender_pool.submit(
+            format_message.get("to"), self.send_message, format_message, deadline
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the sender pool after the queued messages are sent (`wait`), then
+        close the HTTP connections.
+        """
+        self.sender_pool.shutdown(wait=wait)
+        self.http_client.close()
+
+    async def asend_message(self, format_message: dict) -> dict:
+        """
+        Async version of `send_message`. Messages to the same recipient are sent
+        one after another; different recipients are sent concurrently.
+        """
+        recipient = format_message.get("to")
+        lock = self.recipient_locks.get(recipient)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.recipient_locks[recipient] = lock
+
+        async with lock:
+            try:
+                with self.metrics.measure_call("whatsapp", "asend_message"):
+                    client = self.get_async_http_client()
+                    for attempt in range(self.max_retries + 1):
+                        try:
+                            response = await client.post(
+                                self.whatsapp_api_url, content=json.dumps(format_message)
+                            )
+                        except RETRYABLE_TRANSPORT_ERRORS as exception:
+                            if attempt >= self.max_retries:
+                                raise exception
+                            print(f"⚠️ Error de red enviando mensaje: {exception}", "\n")
+                            await asyncio.sleep(self.get_retry_delay(attempt))
+                            continue
+                        except httpx.TransportError as exception:
+                            raise DeliveryUnknownError(
+                                f"Sin respuesta de la API de WhatsApp: {exception!r}"
+                            ) from exception
+
+                        print(f"Response status code (async): {response.status_code}", "\n")
+
+                        if (
+                            response.status_code in RETRYABLE_STATUS_CODES
+                            and attempt < self.max_retries
+                        ):
+                            await asyncio.sleep(self.get_retry_delay(attempt, response))
+                            continue
+
+                        return self.parse_response(response)
+
+            except Exception as exception:
+                print(f"❌ Error sending message: {exception}", "\n")
+                raise exception
+
+    def get_async_http_client(self) -> httpx.AsyncClient:
+        """
+        Shared pooled AsyncClient, created on first use inside the event loop.
+        """
+        if self.async_http_client is None:
+            self.async_http_client = httpx.AsyncClient(
+                headers=self.http_client.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self.async_http_client
+
+    def parse_response(self, response: httpx.Response) -> dict:
+        """
+        Parse the Graph API response, raising an exception with the API error if any.
+        """
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+
+        if response.status_code >= 400 or "error" in body:
+            error = body.get("error", {})
+            raise Exception(
+                f"WhatsApp API error {response.status_code}: "
+                f"{error.get('message', response.text)} (code: {error.get('code')})"
+            )
+
+        messages = body.get("messages") or [{}]
+        contacts = body.get("contacts") or [{}]
+        return {
+            "status_code": response.status_code,
+            "message_id": messages[0].get("id"),
+            "wa_id": contacts[0].get("wa_id"),
+        }
+
+    def get_attempt_timeout(self, deadline: Deadline = None) -> httpx.Timeout:
+        """
+        Timeout of one attempt: the client's, shortened to what is left of the
+        turn deadline (never below `min_send_timeout`).
+        """
+        if deadline is None:
+            return self.timeout
+        return httpx.Timeout(
+            deadline.timeout(cap=self.timeout.read, minimum=self.min_send_timeout),
+            connect=self.timeout.connect,
+        )
+
+    def can_retry(self, attempt: int, delay: float, deadline: Deadline = None) -> bool:
+        """
+        Whether another attempt fits: retries left and, with a deadline, budget
+        for the backoff.
+        """
+        if attempt >= self.max_retries:
+            return False
+        return deadline is None or deadline.remaining() > delay
+
+    def get_retry_delay(self, attempt: int, response: httpx.Response = None) -> float:
+        """
+        Seconds to wait before the next attempt: Retry-After when the API sends
+        it, exponential backoff with jitter otherwise.
+        """
+        retry_after = response.headers.get("Retry-After") if response else None
+        if retry_after:
+            try:
+                return min(float(retry_after), 60)
+            except ValueError:
+                pass
+
+        delay = self.backoff_factor * (2**attempt)
+        return delay + random.uniform(0, delay)
@@ -0,0 +1,180 @@
+from langchain_core.embeddings import Embeddings
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
+from threading import Lock
+from typing import List
+from array import array
+import hashlib
+import time
+
+# Drops the oldest entries of the Redis cache (by write time) beyond ARGV[1].
+TRIM_SCRIPT = """
+local overflow = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[1])
+if overflow <= 0 then
+    return 0
+end
+local keys = redis.call('ZRANGE', KEYS[1], 0, overflow - 1)
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, overflow - 1)
+for i = 1, #keys do
+    redis.call('DEL', keys[i])
+end
+return overflow
+"""
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches vectors by content hash.
+
+    Lookups go to an in-process LRU cache first, then (optionally) to Redis, and
+    only the texts missing from both are sent to the wrapped model. Keys are
+    namespaced by `model:version`, so changing the model or bumping the version
+    never mixes vectors.
+
+    Queries and documents share the cache, which is valid for symmetric models
+    such as OpenAI's.
+
+    Vectors are kept as float32 (`array("f")`) at every level, so a text gets
+    the same vector from the model, the local cache or Redis. In Redis a
+    1536-dimension vector takes ~6 KB, plus its entry in the `{namespace}:index`
+    sorted set: the default cap of 20000 vectors is ~130 MB.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        redis_connection: DBConnectionInterface = None,
+        local_cache: TTLLRUCache = None,
+        version: str = "v1",
+        redis_ttl_seconds: int = 60 * 60 * 24 * 30,
+        redis_max_size: int = 20000,
+        prefix: str = "embeddings",
+    ) -> None:
+        """
+        :param embeddings: Model used for the texts not cached yet.
+        :param redis_connection: Optional Redis shared by every process.
+        :param local_cache: In-process cache (size bound + LRU eviction).
+        :param version: Bump it to invalidate the vectors of the same model.
+        :param redis_ttl_seconds: Seconds a vector lives in Redis (0 = forever).
+        :param redis_max_size: Vectors kept in Redis; the oldest written are
+            dropped first (0 = no cap).
+        """
+        self.embeddings = embeddings
+        self.redis_connection = redis_connection
+        self.local_cache = local_cache or TTLLRUCache(max_size=10000, ttl_seconds=0)
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.redis_max_size = redis_max_size
+
+        model = getattr(embeddings, "model", None) or embeddings.__class__.__name__
+        self.namespace = f"{prefix}:{model}:{version}"
+        self.index_key = f"{self.namespace}:index"
+
+        self.lock = Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+        if self.redis_connection:
+            if not self.redis_connection.is_connected():
+                self.redis_connection.connect()
+            self.trim_script = self.redis_connection.get_connection().register_script(
+                TRIM_SCRIPT
+            )
+
+    def key(self, text: str) -> str:
+        return f"{self.namespace}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.key(text) for text in texts]
+        vectors = {}
+
+        # 1. Cache local.
+        for key in set(keys):
+            vector = self.local_cache.get(key)
+            if vector is not None:
+                vectors[key] = vector
+        local_hits = len(vectors)
+
+        # 2. Redis.
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        redis_hits = 0
+        if missing and self.redis_connection:
+            for key, vector in zip(missing, self.get_from_redis(missing)):
+                if vector is not None:
+                    vectors[key] = vector
+                    self.local_cache.set(key, vector)
+                    redis_hits += 1
+
+        # 3. Modelo, una sola vez por texto distinto.
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                pending.setdefault(key, text)
+
+        if pending:
+            embedded = self.embeddings.embed_documents(list(pending.values()))
+            new_vectors = {
+                key: array("f", vector) for key, vector in zip(pending.keys(), embedded)
+            }
+            for key, vector in new_vectors.items():
+                vectors[key] = vector
+                self.local_cache.set(key, vector)
+            if self.redis_connection:
+                self.set_in_redis(new_vectors)
+
+        with self.lock:
+            self.local_hits += local_hits
+            self.redis_hits += redis_hits
+            self.misses += len(pending)
+
+        return [list(vectors[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def get_from_redis(self, keys: List[str]) -> list:
+        try:
+            values = self.redis_connection.get_connection().mget(keys)
+            return [array("f", value) if value else None for value in values]
+        except Exception as e:
+            print(f"❌ Error leyendo embeddings de Redis: {e}", "\n")
+            return [None] * len(keys)
+
+    def set_in_redis(self, vectors: dict) -> None:
+        try:
+            now = time.time()
+            pipeline = self.redis_connection.get_connection().pipeline(transaction=False)
+            for key, vector in vectors.items():
+                pipeline.set(key, vector.tobytes(), ex=self.redis_ttl_seconds or None)
+
+            if self.redis_max_size:
+                pipeline.zadd(self.index_key, {key: now for key in vectors})
+                if self.redis_ttl_seconds:
+                    # Los vectores ya expirados salen también del índice.
+                    pipeline.zremrangebyscore(
+                        self.index_key, "-inf", now - self.redis_ttl_seconds
+                    )
+                    pipeline.expire(self.index_key, self.redis_ttl_seconds)
+                self.trim_script(
+                    keys=[self.index_key], args=[self.redis_max_size], client=pipeline
+                )
+            pipeline.execute()
+        except Exception as e:
+            print(f"❌ Error guardando embeddings en Redis: {e}", "\n")
+
+    def stats(self) -> dict:
+        """Hits per level, misses (texts sent to the model) and hit ratio."""
+        with self.lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_ratio": (
+                    round((self.local_hits + self.redis_hits) / lookups, 4)
+                    if lookups
+                    else 0.0
+                ),
+                "local_cache": self.local_cache.stats(),
+            }
@@ -34,6 +34,16 @@ class BackendACClientInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def save_messages(self, messages: list) -> list:
+        """
+        Save several conversation messages in a single call.
+
+        :param messages: List of dicts with contact_id, type_sender and message.
+        :return: The messages that could not be stored (empty if all were).
+        """
+        pass
+
     @abstractmethod
     def update_contact_by_id(self, *args, **kwargs):
         """
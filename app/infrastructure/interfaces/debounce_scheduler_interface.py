@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+
+class DebounceSchedulerInterface(ABC):
+
+    @abstractmethod
+    def schedule(self, key: str, delay_seconds: int, pipeline=None) -> None:
+        """
+        Schedule (or push back) the processing of a key after a debounce window.
+
+        :param key: Identifier of the conversation (e.g. phone number).
+        :param delay_seconds: Seconds to wait before the key becomes due.
+        :param pipeline: Optional Redis pipeline to enqueue the command in.
+        """
+        pass
+
+    @abstractmethod
+    def claim_due(self, limit: int) -> List[str]:
+        """
+        Claim up to `limit` keys whose debounce window has elapsed.
+
+        :param limit: Maximum number of keys to claim.
+        :return: The claimed keys. Each claimed key must be acknowledged.
+        """
+        pass
+
+    @abstractmethod
+    def claim_due_with_times(self, limit: int) -> List[Tuple[str, float, str]]:
+        """
+        Same as `claim_due`, also returning when each key became due.
+
+        :return: (key, due timestamp, claim token) of the claimed keys.
+        """
+        pass
+
+    @abstractmethod
+    def extend_lease(self, key: str, token: str) -> bool:
+        """
+        Renew the lease of a claimed key while it is being processed.
+
+        :return: False if the claim no longer owns the key.
+        """
+        pass
+
+    @abstractmethod
+    def ack(self, key: str, pipeline=None, token: str = None) -> bool:
+        """
+        Acknowledge that a claimed key has been processed.
+
+        :param token: Claim token; the ack is ignored if the claim lost the key.
+        """
+        pass
+
+    @abstractmethod
+    def nack(self, key: str, delay_seconds: int, on_drop=None, token: str = None) -> bool:
+        """
+        Release a claimed key so it is delivered again after a delay.
+
+        :param on_drop: Called with the ack pipeline when the key exceeded its
+            attempts and is dropped, to clean up in the same transaction.
+        :param token: Claim token; the nack is ignored if the claim lost the key.
+        :return: False if the key was dropped.
+        """
+        pass
+
+    @abstractmethod
+    def requeue_expired(self) -> List[str]:
+        """
+        Move claimed keys whose lease expired back to the due queue.
+
+        :return: The re-delivered keys.
+        """
+        pass
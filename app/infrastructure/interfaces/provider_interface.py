@@ -1,15 +1,30 @@
 from abc import ABC, abstractmethod
 
 
+class Lifetime:
+    """
+    How long an instance made by the container lives.
+    """
+
+    # One instance for the whole process.
+    SINGLETON = "singleton"
+    # One instance per request (or per container scope).
+    SCOPED = "scoped"
+    # A new instance on every make().
+    TRANSIENT = "transient"
+
+
 class ProviderInterface(ABC):
     """
     Interface for a container that manages the lifecycle of objects.
     """
 
     @abstractmethod
-    def bind(self, name: str, callable_fn: callable) -> None:
+    def bind(
+        self, name: str, callable_fn: callable, lifetime: str = Lifetime.TRANSIENT
+    ) -> None:
         """
-        Bind a name to a callable function.
+        Bind a name to a callable function with the given lifetime.
         """
         pass
 
@@ -27,6 +42,20 @@ class ProviderInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def names(self) -> list:
+        """
+        Get the names of every service bound in the provider.
+        """
+        pass
+
+    @abstractmethod
+    def get_lifetime(self, name: str) -> str:
+        """
+        Get the lifetime the service was bound with.
+        """
+        pass
+
     @abstractmethod
     def register(self, container) -> None:
         """
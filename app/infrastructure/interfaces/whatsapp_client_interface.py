@@ -1,12 +1,42 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 
 class WhatsappClientInterface(ABC):
     @abstractmethod
-    def send_message(self, phone_number: str, message: str) -> None:
+    def send_message(self, format_message: dict, deadline=None) -> dict:
         """
         Send a message to a WhatsApp user.
 
-        :param phone_number: The WhatsApp phone number of the user.
-        :param message: The message to be sent.
+        :param format_message: The message formatted for the WhatsApp API.
+        :param deadline: Optional turn deadline bounding the attempts.
+        :return: The parsed API response.
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def send_message_async(self, format_message: dict, deadline=None) -> Future:
+        """
+        Queue a message to be sent in the background, keeping order per recipient.
+
+        :param format_message: The message formatted for the WhatsApp API.
+        :param deadline: Optional turn deadline bounding the attempts.
+        :return: A future with the parsed API response.
+        """
+        pass
+
+    @abstractmethod
+    async def asend_message(self, format_message: dict) -> dict:
+        """
+        Async version of `send_message`, keeping order per recipient.
+
+        :param format_message: The message formatted for the WhatsApp API.
+        :return: The parsed API response.
+        """
+        pass
+
+    @abstractmethod
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop sending in the background, after the queued messages when `wait`.
+        """
+        pass
@@ -0,0 +1,59 @@
+from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
+import uuid
+
+# Only the owner of the lock (same token) may extend or release it.
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLeaderLock:
+    """
+    Redis lock used for leader election: SET NX PX with a unique token, renewed
+    by the owner before it expires. If the leader dies, the lock expires and
+    another process takes over.
+    """
+
+    def __init__(
+        self,
+        redis_connection: DBConnectionInterface,
+        name: str,
+        ttl_seconds: int = 15,
+    ) -> None:
+        self.redis_connection = redis_connection
+        self.key = f"lock:{name}"
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = str(uuid.uuid4())
+
+        if not self.redis_connection.is_connected():
+            self.redis_connection.connect()
+
+        client = self.redis_connection.get_connection()
+        self.renew_script = client.register_script(RENEW_SCRIPT)
+        self.release_script = client.register_script(RELEASE_SCRIPT)
+
+    def acquire(self) -> bool:
+        """Try to become the leader. Returns True if the lock was taken."""
+        return bool(
+            self.redis_connection.get_connection().set(
+                self.key, self.token, nx=True, px=self.ttl_ms
+            )
+        )
+
+    def renew(self) -> bool:
+        """Extend the lock. Returns False if the leadership was lost."""
+        return bool(self.renew_script(keys=[self.key], args=[self.token, self.ttl_ms]))
+
+    def release(self) -> None:
+        """Give the leadership up, only if this process still holds it."""
+        self.release_script(keys=[self.key], args=[self.token])
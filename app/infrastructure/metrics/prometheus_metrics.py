@@ -0,0 +1,247 @@
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from threading import Lock
+from typing import Callable
+import os
+import re
+import time
+
+# Segundos: desde una lectura de Redis hasta una respuesta lenta del LLM.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+class PrometheusMetrics:
+    """
+    Prometheus metrics of a turn: latency per stage (listener and graph),
+    latency of the calls to external APIs, LLM token usage and, as gauges, the
+    `stats()` of the caches, queues and pools registered with `register_stats`.
+
+    Each instance owns its registry, exported by the `/metrics` route. The
+    registry only holds the numbers of its own process: with several workers
+    (ASGI_WORKERS > 1) set PROMETHEUS_MULTIPROC_DIR in the environment of the
+    server (not in .env: it is read on import) to an empty directory shared by
+    the workers, and `export` merges the histograms and
+    counters of every worker. The `stats()` gauges are per process and are
+    left out of that export.
+    """
+
+    def __init__(self, namespace: str = "backend_ac") -> None:
+        self.namespace = namespace
+        self.registry = CollectorRegistry()
+
+        self.stage_seconds = Histogram(
+            "stage_seconds",
+            "Latency of each stage of a turn.",
+            ["stage"],
+            namespace=namespace,
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.external_call_seconds = Histogram(
+            "external_call_seconds",
+            "Latency of the calls to external APIs.",
+            ["client", "operation", "outcome"],
+            namespace=namespace,
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.llm_tokens = Counter(
+            "llm_tokens",
+            "Tokens of the LLM responses (input, cached input and output).",
+            ["prompt", "kind"],
+            namespace=namespace,
+            registry=self.registry,
+        )
+        self.turns = Counter(
+            "turns",
+            "Processed turns by outcome.",
+            ["outcome"],
+            namespace=namespace,
+            registry=self.registry,
+        )
+        self.degraded_turns = Counter(
+            "degraded_turns",
+            "Turns that skipped a stage to stay within their deadline.",
+            ["reason"],
+            namespace=namespace,
+            registry=self.registry,
+        )
+        self.llm_requests = Counter(
+            "llm_requests",
+            "LLM responses by prompt and whether the provider served part of the input from its prompt cache.",
+            ["prompt", "prompt_cache"],
+            namespace=namespace,
+            registry=self.registry,
+        )
+        self.llm_hedged_requests = Counter(
+            "llm_hedged_requests",
+            "LLM calls that sent a hedged request, by the request that answered first.",
+            ["winner"],
+            namespace=namespace,
+            registry=self.registry,
+        )
+
+        self.stats_collector = StatsCollector(namespace)
+        self.registry.register(self.stats_collector)
+
+    # ========== Stages ==========
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.stage_seconds.labels(stage=stage).observe(seconds)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Time the wrapped block as `stage` (also when it raises)."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - started_at)
+
+    def count_turn(self, outcome: str) -> None:
+        self.turns.labels(outcome=outcome).inc()
+
+    def count_degraded(self, reason: str) -> None:
+        self.degraded_turns.labels(reason=reason).inc()
+
+    def count_hedge(self, winner: str) -> None:
+        self.llm_hedged_requests.labels(winner=winner).inc()
+
+    # ========== External calls ==========
+    def observe_call(
+        self, client: str, operation: str, seconds: float, error: bool = False
+    ) -> None:
+        self.external_call_seconds.labels(
+            client=client, operation=operation, outcome="error" if error else "ok"
+        ).observe(seconds)
+
+    @contextmanager
+    def measure_call(self, client: str, operation: str):
+        """Time the wrapped call, flagging raised exceptions as errors."""
+        started_at = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe_call(
+                client, operation, time.perf_counter() - started_at, error
+            )
+
+    # ========== Tokens ==========
+    def record_tokens(self, prompt: str, usage_metadata: dict) -> int:
+        """
+        Add the `usage_metadata` of one LLM response to the token counters.
+
+        :return: Cached input tokens of the response.
+        """
+        usage_metadata = usage_metadata or {}
+        cached_tokens = (usage_metadata.get("input_token_details") or {}).get(
+            "cache_read", 0
+        ) or 0
+
+        for kind, tokens in (
+            ("input", usage_metadata.get("input_tokens", 0) or 0),
+            ("cached_input", cached_tokens),
+            ("output", usage_metadata.get("output_tokens", 0) or 0),
+        ):
+            self.llm_tokens.labels(prompt=prompt, kind=kind).inc(tokens)
+        self.llm_requests.labels(
+            prompt=prompt, prompt_cache="hit" if cached_tokens else "miss"
+        ).inc()
+        return cached_tokens
+
+    # ========== Stats ==========
+    def register_stats(
+        self, name: str, stats_fn: Callable[[], dict], label: str = None
+    ) -> None:
+        """
+        Export the dict returned by `stats_fn` as gauges named `{name}_{field}`.
+
+        :param label: For per-key snapshots ({key: {field: value}}), the label
+            that holds the key.
+        """
+        self.stats_collector.register(name, stats_fn, label)
+
+    def export(self) -> tuple:
+        """(body, content type) of the Prometheus text format."""
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            # Suma lo que escribió cada worker en el directorio compartido.
+            registry = CollectorRegistry()
+            MultiProcessCollector(registry)
+            return generate_latest(registry), CONTENT_TYPE_LATEST
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+
+class StatsCollector:
+    """
+    Custom collector that reads the registered `stats()` at scrape time. Numeric
+    values become gauges; nested dicts are flattened into the metric name.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self.lock = Lock()
+        self.sources = {}
+
+    def register(self, name: str, stats_fn: Callable[[], dict], label: str = None):
+        with self.lock:
+            self.sources[name] = (stats_fn, label)
+
+    def collect(self):
+        with self.lock:
+            sources = list(self.sources.items())
+
+        families = {}
+        for name, (stats_fn, label) in sources:
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                print(f"❌ Error leyendo las métricas de {name}: {e}", "\n")
+                continue
+            if not stats:
+                continue
+
+            if label:
+                for key, fields in stats.items():
+                    for field, value in self.flatten(fields):
+                        self.add_sample(
+                            families, f"{name}_{field}", value, label, key
+                        )
+            else:
+                for field, value in self.flatten(stats):
+                    self.add_sample(families, f"{name}_{field}", value)
+
+        return iter(families.values())
+
+    def describe(self):
+        # Las métricas dependen de lo registrado: no se validan al registrar.
+        return []
+
+    def flatten(self, stats: dict, prefix: str = ""):
+        for field, value in stats.items():
+            if isinstance(value, dict):
+                yield from self.flatten(value, f"{prefix}{field}_")
+            elif isinstance(value, (int, float)):
+                yield f"{prefix}{field}", float(value)
+
+    def add_sample(
+        self, families: dict, name: str, value: float, label: str = None, key=None
+    ) -> None:
+        metric_name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{self.namespace}_{name}")
+        family = families.get(metric_name)
+        if family is None:
+            family = GaugeMetricFamily(
+                metric_name, f"{name} (stats)", labels=[label] if label else None
+            )
+            families[metric_name] = family
+        family.add_metric([str(key)] if label else [], value)
@@ -1,23 +1,107 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import RLock
 from typing import List
-from infrastructure.interfaces.provider_interface import ProviderInterface
+from infrastructure.interfaces.provider_interface import ProviderInterface, Lifetime
+
+# Instances of the scoped services of the current request (None = no scope open).
+_scope: ContextVar = ContextVar("container_scope", default=None)
 
 
 class AppContainer:
     def __init__(self, providers: List[ProviderInterface]):
         self.providers = providers
+        self.singletons = {}
+        # Reentrant: a singleton factory makes its own singleton dependencies.
+        self.singletons_lock = RLock()
 
     def initialize_services(self) -> None:
         for provider in self.providers:
             provider.register(self)
 
     def make(self, name: str):
+        provider = self.find_provider(name)
+        lifetime = provider.get_lifetime(name)
+
+        if lifetime == Lifetime.SINGLETON:
+            if name in self.singletons:
+                return self.singletons[name]
+
+            with self.singletons_lock:
+                if name not in self.singletons:
+                    self.singletons[name] = self.build(provider, name)
+                return self.singletons[name]
+
+        if lifetime == Lifetime.SCOPED:
+            scope = _scope.get()
+            # Outside of a scope a scoped service behaves as transient.
+            if scope is None:
+                return self.build(provider, name)
+            if name not in scope:
+                scope[name] = self.build(provider, name)
+            return scope[name]
+
+        return self.build(provider, name)
+
+    def resolved(self, name: str):
+        """
+        The singleton `name` if it was already built, None otherwise (never builds it).
+        """
+        return self.singletons.get(name)
+
+    def find_provider(self, name: str) -> ProviderInterface:
         for provider in self.providers:
             if provider.has(name):
-                try:
-                    return provider.make(name)
-                except Exception as e:
-                    print(
-                        f"Error al obtener el servicio {name} de {provider.__class__.__name__}: {e}"
-                    )
-                    raise e
+                return provider
         raise Exception(f"Servicio {name} no encontrado en ningún proveedor.")
+
+    def build(self, provider: ProviderInterface, name: str):
+        try:
+            return provider.make(name)
+        except Exception as e:
+            print(
+                f"Error al obtener el servicio {name} de {provider.__class__.__name__}: {e}"
+            )
+            raise e
+
+    # ========== Scopes ==========
+    def begin_scope(self):
+        """
+        Open a scope for the current request. Returns the token for end_scope.
+        """
+        return _scope.set({})
+
+    def end_scope(self, token) -> None:
+        """
+        Close the scope opened with begin_scope, dropping its instances.
+        """
+        _scope.reset(token)
+
+    @contextmanager
+    def scope(self):
+        token = self.begin_scope()
+        try:
+            yield self
+        finally:
+            self.end_scope(token)
+
+    # ========== Warm up ==========
+    def warm_up(self, names: List[str] = None) -> None:
+        """
+        Build the singletons up front (all of them by default), so the first
+        request does not pay for clients, pools and compiled graphs.
+        """
+        if names is None:
+            names = [
+                name
+                for provider in self.providers
+                for name in provider.names()
+                if provider.get_lifetime(name) == Lifetime.SINGLETON
+            ]
+
+        for name in names:
+            try:
+                self.make(name)
+                print(f"🔥 {name} listo.")
+            except Exception as e:
+                print(f"❌ Error precargando {name}: {e}", "\n")
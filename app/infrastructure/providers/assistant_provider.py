@@ -1,4 +1,4 @@
-from infrastructure.interfaces.provider_interface import ProviderInterface
+from infrastructure.interfaces.provider_interface import ProviderInterface, Lifetime
 from domain.assistants.entities.executive_assistant import ExecutiveAssistant
 from domain.assistants.entities.retriver_assistant import RetriverAssistant
 from langchain_openai import OpenAIEmbeddings
@@ -8,6 +8,16 @@ from langchain_chroma import Chroma
 from domain.whatsapp.entities.langraph_state import LangGraphState
 from langgraph.graph import StateGraph
 from domain.whatsapp.entities.chat_state import ChatState
+from domain.whatsapp.entities.topic_classifier import TopicClassifier
+from domain.whatsapp.entities.faq_intent_matcher import FaqIntentMatcher
+from domain.whatsapp.entities.context_builder import ContextBuilder
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+from infrastructure.workers.rate_limiter import RateLimiter
+from infrastructure.embeddings.cached_embeddings import CachedEmbeddings
+from infrastructure.caches.semantic_answer_cache import SemanticAnswerCache
+from infrastructure.checkpoints.redis_checkpoint_saver import RedisCheckpointSaver
+from concurrent.futures import ThreadPoolExecutor
+import json
 
 from infrastructure.config.config import get_env
 
@@ -15,9 +25,13 @@ from infrastructure.config.config import get_env
 class AssistantProvider(ProviderInterface):
     def __init__(self):
         self.assistants = {}
+        self.lifetimes = {}
 
-    def bind(self, name: str, callable_fn: callable) -> None:
+    def bind(
+        self, name: str, callable_fn: callable, lifetime: str = Lifetime.TRANSIENT
+    ) -> None:
         self.assistants[name] = callable_fn
+        self.lifetimes[name] = lifetime
 
     def make(self, name: str):
         if name not in self.assistants:
@@ -27,18 +41,63 @@ class AssistantProvider(ProviderInterface):
     def has(self, name: str) -> bool:
         return name in self.assistants
 
+    def names(self) -> list:
+        return list(self.assistants)
+
+    def get_lifetime(self, name: str) -> str:
+        return self.lifetimes.get(name, Lifetime.TRANSIENT)
+
     # Assistants registrated in the provider
     def register(self, container) -> None:
         self.bind(
             "executive_assistant_gpt_4o",
-            lambda: ExecutiveAssistant(),
+            lambda: ExecutiveAssistant(
+                checkpointer=(
+                    container.make("checkpointer")
+                    if get_env("CHECKPOINTER_ENABLED", "true").lower() == "true"
+                    else None
+                ),
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        # Estado del grafo por teléfono: los turnos interrumpidos se reanudan.
+        self.bind(
+            "checkpointer",
+            lambda: RedisCheckpointSaver(
+                container.make("redis_connection"),
+                ttl_seconds=int(get_env("CHECKPOINTER_TTL_SECONDS", 60 * 60 * 24 * 7)),
+                max_checkpoints=int(get_env("CHECKPOINTER_MAX_CHECKPOINTS", 20)),
+            ),
+            lifetime=Lifetime.SINGLETON,
         )
 
         self.bind(
             "retriver_assistant_gpt_4o",
             lambda: RetriverAssistant(
                 container.make("gpt_4o"),
+                result_cache=TTLLRUCache(
+                    max_size=int(get_env("CONTACT_RESUME_CACHE_MAX_SIZE", 1000)),
+                    ttl_seconds=int(get_env("CONTACT_RESUME_CACHE_TTL_SECONDS", 3600)),
+                ),
+                context_builder=ContextBuilder(model="gpt-4o-mini"),
+                chunk_token_budget=int(get_env("CONTACT_RESUME_CHUNK_TOKENS", 6000)),
+                max_concurrency=int(get_env("CONTACT_RESUME_MAX_CONCURRENCY", 4)),
+                rate_limiter=container.make("contact_resume_rate_limiter"),
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        # Límite de peticiones al LLM de los resúmenes de contacto (endpoint y lotes).
+        self.bind(
+            "contact_resume_rate_limiter",
+            lambda: RateLimiter(
+                requests_per_minute=float(
+                    get_env("CONTACT_RESUME_REQUESTS_PER_MINUTE", 120)
+                ),
+                burst=int(get_env("CONTACT_RESUME_RATE_BURST", 4)),
             ),
+            lifetime=Lifetime.SINGLETON,
         )
 
         persist_directory = get_env("CHROMA_PERSIST_DIRECTORY", "chroma_data_dev")
@@ -49,14 +108,128 @@ class AssistantProvider(ProviderInterface):
                 Chroma(
                     collection_name="executive_assistant_memories_gpt_4o",
                     persist_directory=f"./{persist_directory}",
-                    embedding_function=OpenAIEmbeddings(),
+                    embedding_function=container.make("embeddings"),
                 ),
                 container.make("google_calendar_client"),
                 container.make("whatsapp_repository"),
+                container.make("topic_classifier"),
+                retrieval_executor=ThreadPoolExecutor(
+                    max_workers=int(get_env("RETRIEVAL_MAX_WORKERS", 8)),
+                    thread_name_prefix="retrieval",
+                ),
+                retrieval_deadline_seconds=float(
+                    get_env("RETRIEVAL_DEADLINE_SECONDS", 8)
+                ),
+                tool_executor=ThreadPoolExecutor(
+                    max_workers=int(get_env("TOOL_MAX_WORKERS", 8)),
+                    thread_name_prefix="tool",
+                ),
+                # Ej.: TOOL_TIMEOUTS={"get_available_slots": 20}
+                tool_timeouts=json.loads(get_env("TOOL_TIMEOUTS", "{}")),
+                default_tool_timeout_seconds=float(
+                    get_env("TOOL_TIMEOUT_SECONDS", 15)
+                ),
+                min_tool_timeout_seconds=float(
+                    get_env("TOOL_MIN_TIMEOUT_SECONDS", 3)
+                ),
+                recent_memories_backfill_limit=int(
+                    get_env("RECENT_MEMORIES_BACKFILL_LIMIT", 500)
+                ),
+                context_builder=ContextBuilder(
+                    model="gpt-4o-mini",
+                    memory_token_budget=int(
+                        get_env("CONTEXT_MEMORY_TOKEN_BUDGET", 1200)
+                    ),
+                    max_tokens_per_memory=int(
+                        get_env("CONTEXT_MAX_TOKENS_PER_MEMORY", 250)
+                    ),
+                    message_token_budget=int(
+                        get_env("CONTEXT_MESSAGE_TOKEN_BUDGET", 800)
+                    ),
+                ),
+                answer_cache=(
+                    container.make("answer_cache")
+                    if get_env("FAQ_CACHE_ENABLED", "true").lower() == "true"
+                    else None
+                ),
+                faq_matcher=FaqIntentMatcher(
+                    min_confidence=float(get_env("FAQ_MIN_CONFIDENCE", 0.9))
+                ),
+                metrics=container.make("metrics"),
+                llm_executor=ThreadPoolExecutor(
+                    max_workers=int(get_env("LLM_MAX_WORKERS", 8)),
+                    thread_name_prefix="llm",
+                ),
+                llm_reserve_seconds=float(get_env("LLM_RESERVE_SECONDS", 10)),
+                # 0 = sin peticiones hedged.
+                llm_hedge_after_seconds=float(get_env("LLM_HEDGE_AFTER_SECONDS", 0))
+                or None,
             ),
+            lifetime=Lifetime.SINGLETON,
         )
 
-        self.bind("builder_state", lambda: self.make_state_graph())
+        # La versión incluye el hash del prompt: si cambia la plantilla, la cache
+        # empieza vacía.
+        self.bind(
+            "answer_cache",
+            lambda: SemanticAnswerCache(
+                container.make("redis_connection"),
+                container.make("embeddings"),
+                version="{}-{}".format(
+                    get_env("FAQ_CACHE_VERSION", "v2"),
+                    container.make(
+                        "executive_assistant_gpt_4o"
+                    ).prompt_assembler.prefix_hash,
+                ),
+                similarity_threshold=float(get_env("FAQ_CACHE_SIMILARITY", 0.92)),
+                ttl_seconds=int(get_env("FAQ_CACHE_TTL_SECONDS", 86400)),
+                max_entries=int(get_env("FAQ_CACHE_MAX_ENTRIES", 500)),
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        self.bind(
+            "embeddings",
+            lambda: CachedEmbeddings(
+                OpenAIEmbeddings(),
+                redis_connection=(
+                    container.make("redis_connection")
+                    if get_env("EMBEDDING_CACHE_SHARED", "true").lower() == "true"
+                    else None
+                ),
+                local_cache=TTLLRUCache(
+                    max_size=int(get_env("EMBEDDING_CACHE_MAX_SIZE", 10000)),
+                    ttl_seconds=0,
+                ),
+                version=get_env("EMBEDDING_CACHE_VERSION", "v1"),
+                redis_ttl_seconds=int(
+                    get_env("EMBEDDING_CACHE_TTL_SECONDS", 60 * 60 * 24 * 30)
+                ),
+                redis_max_size=int(get_env("EMBEDDING_CACHE_REDIS_MAX_SIZE", 20000)),
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        self.bind(
+            "topic_classifier",
+            lambda: TopicClassifier(
+                cache=TTLLRUCache(
+                    max_size=int(get_env("TOPIC_CACHE_MAX_SIZE", 5000)),
+                    ttl_seconds=int(get_env("TOPIC_CACHE_TTL_SECONDS", 86400)),
+                ),
+                min_confidence=float(get_env("TOPIC_MIN_CONFIDENCE", 0.5)),
+                use_spacy=get_env("TOPIC_CLASSIFIER_USE_SPACY", "true").lower()
+                == "true",
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        # Singleton: the graph is compiled once and reused by every conversation.
+        self.bind(
+            "builder_state",
+            lambda: self.make_state_graph(),
+            lifetime=Lifetime.SINGLETON,
+        )
 
     def make_state_graph(self):
         graph = StateGraph(ChatState)
@@ -0,0 +1,86 @@
+from infrastructure.providers.app_container import AppContainer
+from infrastructure.providers.llm_provider import LLMProvider
+from infrastructure.providers.assistant_provider import AssistantProvider
+from infrastructure.providers.service_provider import ServiceProvider
+from infrastructure.providers.db_provider import DBProvider
+from infrastructure.providers.repository_provider import RepositoryProvider
+from infrastructure.providers.client_provider import ClientProvider
+from infrastructure.config.config import get_env
+from typing import Callable
+
+
+def create_container() -> AppContainer:
+    """
+    Build the application container with every provider registered.
+    Shared by the Flask (WSGI) and the ASGI entry points.
+    """
+    # Providers de la aplicación
+    providers = [
+        LLMProvider(),
+        AssistantProvider(),
+        ServiceProvider(),
+        DBProvider(),
+        RepositoryProvider(),
+        ClientProvider(),
+    ]
+
+    container = AppContainer(providers)
+    container.initialize_services()
+    register_metrics_stats(container)
+
+    # Construye clientes, pools y el grafo al arrancar en vez de en la primera petición.
+    if get_env("APP_EAGER_WARMUP", "false").lower() == "true":
+        container.warm_up()
+
+    return container
+
+
+def register_metrics_stats(container: AppContainer) -> None:
+    """
+    Export the `stats()` of caches, queues and pools on /metrics. Only the
+    singletons already built in this process are read: a scrape never builds one.
+    """
+    metrics = container.make("metrics")
+
+    def stats_of(name: str, stats: Callable[[object], dict]) -> Callable[[], dict]:
+        def read():
+            instance = container.resolved(name)
+            return stats(instance) if instance is not None else None
+
+        return read
+
+    # (métrica, singleton, stats, label de las claves de un snapshot por clave)
+    sources = [
+        ("answer_cache", "answer_cache", lambda c: c.stats(), None),
+        ("embedding_cache", "embeddings", lambda e: e.stats(), None),
+        ("topic_classifier", "topic_classifier", lambda t: t.stats(), None),
+        (
+            "contact_resume_cache",
+            "retriver_assistant_gpt_4o",
+            lambda a: a.result_cache.stats() if a.result_cache else None,
+            None,
+        ),
+        ("contact_cache", "contact_cache", lambda c: c.stats(), None),
+        ("message_writer", "message_writer", lambda w: w.stats(), None),
+        ("memory_writer", "memory_write_queue", lambda q: q.stats(), None),
+        (
+            "contact_resume_job_pool",
+            "contact_resume_job_service",
+            lambda j: j.worker_pool.stats(),
+            None,
+        ),
+        (
+            "contact_resume_rate_limiter",
+            "contact_resume_rate_limiter",
+            lambda r: r.stats(),
+            None,
+        ),
+        (
+            "listener_pool",
+            "messages_expiration_listener_service",
+            lambda l: l.worker_pool.stats(),
+            None,
+        ),
+    ]
+    for metric, name, stats, label in sources:
+        metrics.register_stats(metric, stats_of(name, stats), label)
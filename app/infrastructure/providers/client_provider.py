@@ -1,16 +1,21 @@
-from infrastructure.interfaces.provider_interface import ProviderInterface
+from infrastructure.interfaces.provider_interface import ProviderInterface, Lifetime
 from infrastructure.clients.whatsapp_client import WhatsappClient
 from infrastructure.clients.google_calendar_client import GoogleCalendarClient
 from infrastructure.clients.backend_ac_client import BackendACClient
+from infrastructure.metrics.prometheus_metrics import PrometheusMetrics
 from infrastructure.config.config import get_env
 
 
 class ClientProvider(ProviderInterface):
     def __init__(self):
         self.clients = {}
+        self.lifetimes = {}
 
-    def bind(self, name: str, callable_fn: callable) -> None:
+    def bind(
+        self, name: str, callable_fn: callable, lifetime: str = Lifetime.TRANSIENT
+    ) -> None:
         self.clients[name] = callable_fn
+        self.lifetimes[name] = lifetime
 
     def make(self, name: str):
         if name not in self.clients:
@@ -20,13 +25,33 @@ class ClientProvider(ProviderInterface):
     def has(self, name: str) -> bool:
         return name in self.clients
 
+    def names(self) -> list:
+        return list(self.clients)
+
+    def get_lifetime(self, name: str) -> str:
+        return self.lifetimes.get(name, Lifetime.TRANSIENT)
+
     def register(self, container) -> None:
+        # Registry of the process, exported by the /metrics route.
+        self.bind(
+            "metrics",
+            lambda: PrometheusMetrics(),
+            lifetime=Lifetime.SINGLETON,
+        )
+
         self.bind(
             "whatsapp_client",
             lambda: WhatsappClient(
                 get_env("WHATSAPP_API_URL", "https://api.whatsapp.com"),
                 get_env("WHATSAPP_TOKEN", "your_api_key_here"),
+                max_connections=int(get_env("WHATSAPP_MAX_CONNECTIONS", 20)),
+                connect_timeout=float(get_env("WHATSAPP_CONNECT_TIMEOUT", 3)),
+                read_timeout=float(get_env("WHATSAPP_READ_TIMEOUT", 10)),
+                max_retries=int(get_env("WHATSAPP_MAX_RETRIES", 3)),
+                max_concurrent_recipients=int(get_env("WHATSAPP_SENDER_WORKERS", 8)),
+                metrics=container.make("metrics"),
             ),
+            lifetime=Lifetime.SINGLETON,
         )
 
         webhook_google_calendar = "https://0497256c184f.ngrok-free.app" + get_env(
@@ -38,7 +63,10 @@ class ClientProvider(ProviderInterface):
             lambda: GoogleCalendarClient(
                 container.make("whatsapp_repository"),
                 webhook_url=webhook_google_calendar,
+                metrics=container.make("metrics"),
+                timeout=float(get_env("GOOGLE_CALENDAR_TIMEOUT_SECONDS", 10)),
             ),
+            lifetime=Lifetime.SINGLETON,
         )
 
         self.bind(
@@ -46,5 +74,11 @@ class ClientProvider(ProviderInterface):
             lambda: BackendACClient(
                 get_env("BACKEND_AC_API_URL", "https://api.backendac.com"),
                 get_env("BACKEND_AC_API_KEY", "your_backend_ac_api_key_here"),
+                pool_size=int(get_env("BACKEND_AC_POOL_SIZE", 10)),
+                connect_timeout=float(get_env("BACKEND_AC_CONNECT_TIMEOUT", 3.05)),
+                read_timeout=float(get_env("BACKEND_AC_READ_TIMEOUT", 10)),
+                max_retries=int(get_env("BACKEND_AC_MAX_RETRIES", 2)),
+                metrics=container.make("metrics"),
             ),
+            lifetime=Lifetime.SINGLETON,
         )
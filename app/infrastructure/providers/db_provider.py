@@ -1,4 +1,4 @@
-from infrastructure.interfaces.provider_interface import ProviderInterface
+from infrastructure.interfaces.provider_interface import ProviderInterface, Lifetime
 from infrastructure.databases.mysql_connection import MySQLConnection
 from infrastructure.databases.redis_connection import RedisConnection
 from infrastructure.config.config import get_env
@@ -8,9 +8,13 @@ class DBProvider(ProviderInterface):
 
     def __init__(self):
         self.services = {}
+        self.lifetimes = {}
 
-    def bind(self, name: str, callable_fn: callable) -> None:
+    def bind(
+        self, name: str, callable_fn: callable, lifetime: str = Lifetime.TRANSIENT
+    ) -> None:
         self.services[name] = callable_fn
+        self.lifetimes[name] = lifetime
 
     def make(self, name: str):
         if name not in self.services:
@@ -20,6 +24,12 @@ class DBProvider(ProviderInterface):
     def has(self, name: str) -> bool:
         return name in self.services
 
+    def names(self) -> list:
+        return list(self.services)
+
+    def get_lifetime(self, name: str) -> str:
+        return self.lifetimes.get(name, Lifetime.TRANSIENT)
+
     def register(self, container) -> None:
         self.bind(
             "mysql_connection",
@@ -30,6 +40,8 @@ class DBProvider(ProviderInterface):
                 password=get_env("MYSQL_PASSWORD", "password"),
                 database=get_env("MYSQL_DATABASE", "my_database"),
             ),
+            # MySQL connections are not thread-safe: one per request.
+            lifetime=Lifetime.SCOPED,
         )
 
         self.bind(
@@ -39,4 +51,6 @@ class DBProvider(ProviderInterface):
                 port=get_env("REDIS_PORT", 6379),
                 db=get_env("REDIS_DB", 0),
             ),
+            # redis-py clients are thread-safe and keep their own connection pool.
+            lifetime=Lifetime.SINGLETON,
         )
@@ -1,4 +1,4 @@
-from infrastructure.interfaces.provider_interface import ProviderInterface
+from infrastructure.interfaces.provider_interface import ProviderInterface, Lifetime
 from langchain_openai import ChatOpenAI
 from infrastructure.config.config import get_env
 
@@ -6,9 +6,13 @@ from infrastructure.config.config import get_env
 class LLMProvider(ProviderInterface):
     def __init__(self):
         self.llms = {}
+        self.lifetimes = {}
 
-    def bind(self, name: str, callable_fn: callable) -> None:
+    def bind(
+        self, name: str, callable_fn: callable, lifetime: str = Lifetime.TRANSIENT
+    ) -> None:
         self.llms[name] = callable_fn
+        self.lifetimes[name] = lifetime
 
     def make(self, name: str):
         if name not in self.llms:
@@ -18,6 +22,12 @@ class LLMProvider(ProviderInterface):
     def has(self, name: str) -> bool:
         return name in self.llms
 
+    def names(self) -> list:
+        return list(self.llms)
+
+    def get_lifetime(self, name: str) -> str:
+        return self.lifetimes.get(name, Lifetime.TRANSIENT)
+
     def register(self, container) -> None:
         self.bind(
             "gpt_4o",
@@ -26,8 +36,10 @@ class LLMProvider(ProviderInterface):
                 model="gpt-4o-mini",
                 temperature=0.0,
                 max_tokens=None,
-                timeout=None,
-                max_retries=2,
+                # Default for calls without a turn deadline (which sets its own).
+                timeout=float(get_env("OPENAI_TIMEOUT_SECONDS", 30)),
+                max_retries=int(get_env("OPENAI_MAX_RETRIES", 2)),
                 api_key=get_env("OPENAI_API_KEY"),
             ),
+            lifetime=Lifetime.SINGLETON,
         )
@@ -1,14 +1,22 @@
-from infrastructure.interfaces.provider_interface import ProviderInterface
+from infrastructure.interfaces.provider_interface import ProviderInterface, Lifetime
 from infrastructure.repositories.whatsapp_repository import WhatsappRepository
+from infrastructure.schedulers.redis_debounce_scheduler import RedisDebounceScheduler
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+from infrastructure.workers.write_behind_queue import WriteBehindQueue
+from infrastructure.config.config import get_env
 
 
 class RepositoryProvider(ProviderInterface):
 
     def __init__(self):
         self.repositories = {}
+        self.lifetimes = {}
 
-    def bind(self, name: str, callable_fn: callable) -> None:
+    def bind(
+        self, name: str, callable_fn: callable, lifetime: str = Lifetime.TRANSIENT
+    ) -> None:
         self.repositories[name] = callable_fn
+        self.lifetimes[name] = lifetime
 
     def make(self, name: str):
         if name not in self.repositories:
@@ -18,11 +26,61 @@ class RepositoryProvider(ProviderInterface):
     def has(self, name: str) -> bool:
         return name in self.repositories
 
+    def names(self) -> list:
+        return list(self.repositories)
+
+    def get_lifetime(self, name: str) -> str:
+        return self.lifetimes.get(name, Lifetime.TRANSIENT)
+
     def register(self, container) -> None:
+        self.bind(
+            "contact_cache",
+            lambda: TTLLRUCache(
+                max_size=int(get_env("CONTACT_CACHE_MAX_SIZE", 5000)),
+                ttl_seconds=int(get_env("CONTACT_CACHE_TTL_SECONDS", 600)),
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        # Persists the conversation history in batches, off the reply critical path.
+        self.bind(
+            "message_writer",
+            lambda: WriteBehindQueue(
+                flush_fn=lambda messages: container.make(
+                    "backend_ac_client"
+                ).save_messages(messages),
+                max_batch_size=int(get_env("MESSAGE_WRITER_BATCH_SIZE", 20)),
+                flush_interval_seconds=float(
+                    get_env("MESSAGE_WRITER_FLUSH_INTERVAL", 1.0)
+                ),
+                max_retries=int(get_env("MESSAGE_WRITER_MAX_RETRIES", 3)),
+                name="message-writer",
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
         self.bind(
             "whatsapp_repository",
             lambda: WhatsappRepository(
                 container.make("backend_ac_client"),
-                container.make("redis_connection")
+                container.make("redis_connection"),
+                container.make("debounce_scheduler"),
+                buffer_window_seconds=int(get_env("WHATSAPP_BUFFER_SECONDS", 30)),
+                contact_cache=container.make("contact_cache"),
+                share_contact_cache=get_env("CONTACT_CACHE_SHARED", "false").lower()
+                == "true",
+                message_writer=container.make("message_writer"),
+                recent_memories_max=int(get_env("RECENT_MEMORIES_MAX", 50)),
+            ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        self.bind(
+            "debounce_scheduler",
+            lambda: RedisDebounceScheduler(
+                container.make("redis_connection"),
+                lease_seconds=int(get_env("SCHEDULER_LEASE_SECONDS", 300)),
+                max_attempts=int(get_env("SCHEDULER_MAX_ATTEMPTS", 3)),
             ),
+            lifetime=Lifetime.SINGLETON,
         )
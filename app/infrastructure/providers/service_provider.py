@@ -1,4 +1,4 @@
-from infrastructure.interfaces.provider_interface import ProviderInterface
+from infrastructure.interfaces.provider_interface import ProviderInterface, Lifetime
 from application.services.whatsapp.verify_token_service import VerifyTokenService
 from application.services.whatsapp.received_message_service import (
     ReceivedMessageService,
@@ -14,6 +14,13 @@ from application.services.calendar_event.add_calendar_event_service import (
 from application.services.llm.retreive_user_information_service import (
     RetriveUserInformationService,
 )
+from application.services.llm.contact_resume_job_service import (
+    ContactResumeJobService,
+)
+from infrastructure.workers.keyed_worker_pool import KeyedWorkerPool
+from infrastructure.workers.redis_job_store import RedisJobStore
+from infrastructure.workers.redis_stream_queue import RedisStreamQueue
+from infrastructure.config.config import get_env
 
 
 class ServiceProvider(ProviderInterface):
@@ -23,12 +30,16 @@ class ServiceProvider(ProviderInterface):
 
     def __init__(self):
         self.services = {}
+        self.lifetimes = {}
 
-    def bind(self, name: str, callable_fn: callable) -> None:
+    def bind(
+        self, name: str, callable_fn: callable, lifetime: str = Lifetime.TRANSIENT
+    ) -> None:
         """
         Bind a service provider to a name.
         """
         self.services[name] = callable_fn
+        self.lifetimes[name] = lifetime
 
     def make(self, name: str):
         """
@@ -44,29 +55,50 @@ class ServiceProvider(ProviderInterface):
         """
         return name in self.services
 
+    def names(self) -> list:
+        """
+        Get the names of the bound services.
+        """
+        return list(self.services)
+
+    def get_lifetime(self, name: str) -> str:
+        """
+        Get the lifetime a service was bound with.
+        """
+        return self.lifetimes.get(name, Lifetime.TRANSIENT)
+
     # Services registered here will be available in the container
     def register(self, container) -> None:
         """
         Register the service services.
         """
-        self.bind("verify_token_service", lambda: VerifyTokenService())
+        self.bind(
+            "verify_token_service",
+            lambda: VerifyTokenService(),
+            lifetime=Lifetime.SINGLETON,
+        )
 
         self.bind(
             "received_message_service",
             lambda: ReceivedMessageService(
                 container.make("conversation_service"),
                 container.make("whatsapp_repository"),
+                enqueue_only=get_env("WHATSAPP_WEBHOOK_ENQUEUE_ONLY", "false").lower()
+                == "true",
             ),
+            lifetime=Lifetime.SINGLETON,
         )
 
         self.bind(
             "conversation_service",
             lambda: ConversationService(container.make("executive_assistant_gpt_4o")),
+            lifetime=Lifetime.SINGLETON,
         )
 
         self.bind(
             "send_message_service",
             lambda: SendMessageService(container.make("whatsapp_client")),
+            lifetime=Lifetime.SINGLETON,
         )
 
         self.bind(
@@ -78,12 +110,46 @@ class ServiceProvider(ProviderInterface):
                 container.make("builder_state"),
                 container.make("langraph_state"),
                 container.make("whatsapp_repository"),
+                KeyedWorkerPool(
+                    max_workers=int(get_env("LISTENER_MAX_WORKERS", 4)),
+                    max_pending=int(get_env("LISTENER_MAX_PENDING", 100)),
+                    name="listener-worker",
+                ),
+                container.make("debounce_scheduler"),
+                container.make("memory_write_queue"),
+                poll_interval_seconds=float(get_env("LISTENER_POLL_INTERVAL", 0.5)),
+                claim_batch_size=int(get_env("LISTENER_CLAIM_BATCH_SIZE", 10)),
+                metrics=container.make("metrics"),
+                turn_budget_seconds=float(get_env("TURN_BUDGET_SECONDS", 45)),
+                lease_heartbeat_seconds=float(
+                    get_env("SCHEDULER_LEASE_HEARTBEAT_SECONDS", 60)
+                ),
             ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        # Memorias de los turnos: se guardan en lotes después de responder.
+        self.bind(
+            "memory_write_queue",
+            lambda: RedisStreamQueue(
+                container.make("redis_connection"),
+                stream="whatsapp:memories:stream",
+                group="memory-writers",
+                handler=lambda memories: container.make(
+                    "langraph_state"
+                ).save_memories(memories),
+                batch_size=int(get_env("MEMORY_WRITER_BATCH_SIZE", 20)),
+                claim_idle_ms=int(get_env("MEMORY_WRITER_CLAIM_IDLE_MS", 60000)),
+                max_deliveries=int(get_env("MEMORY_WRITER_MAX_DELIVERIES", 5)),
+                name="memory-writer",
+            ),
+            lifetime=Lifetime.SINGLETON,
         )
 
         self.bind(
             "add_calendar_event_service",
             lambda: AddCalendarEventService(container.make("google_calendar_client")),
+            lifetime=Lifetime.SINGLETON,
         )
 
         self.bind(
@@ -92,4 +158,25 @@ class ServiceProvider(ProviderInterface):
                 container.make("retriver_assistant_gpt_4o"),
                 container.make("whatsapp_repository"),
             ),
+            lifetime=Lifetime.SINGLETON,
+        )
+
+        # Lotes del CRM: pool acotado; el límite de peticiones es el del asistente.
+        self.bind(
+            "contact_resume_job_service",
+            lambda: ContactResumeJobService(
+                container.make("retreive_user_information_service"),
+                RedisJobStore(
+                    container.make("redis_connection"),
+                    ttl_seconds=int(get_env("CONTACT_RESUME_JOB_TTL_SECONDS", 86400)),
+                ),
+                KeyedWorkerPool(
+                    max_workers=int(get_env("CONTACT_RESUME_JOB_MAX_WORKERS", 4)),
+                    max_pending=int(get_env("CONTACT_RESUME_JOB_MAX_PENDING", 100)),
+                    name="contact-resume-job",
+                ),
+                container.make("contact_resume_rate_limiter"),
+                max_items=int(get_env("CONTACT_RESUME_JOB_MAX_ITEMS", 1000)),
+            ),
+            lifetime=Lifetime.SINGLETON,
         )
\ No newline at end of file
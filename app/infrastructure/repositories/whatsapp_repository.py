@@ -5,9 +5,45 @@ from infrastructure.interfaces.db_connection_interface import DBConnectionInterf
 from infrastructure.interfaces.backend_ac_client_interface import (
     BackendACClientInterface,
 )
+from infrastructure.interfaces.debounce_scheduler_interface import (
+    DebounceSchedulerInterface,
+)
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+from infrastructure.workers.write_behind_queue import WriteBehindQueue
+from threading import Lock
+from typing import Tuple
 from flask import jsonify
 import pymysql
 import json
+import time
+
+# Moves the pending buffer into the in-flight list and returns everything in flight.
+# Messages appended after the drain land in a fresh buffer and are never lost.
+# Returns [number of messages moved by this drain, in-flight messages...].
+DRAIN_BUFFER_SCRIPT = """
+local messages = redis.call('LRANGE', KEYS[1], 0, -1)
+if #messages > 0 then
+    redis.call('RPUSH', KEYS[2], unpack(messages))
+    redis.call('DEL', KEYS[1])
+end
+local inflight = redis.call('LRANGE', KEYS[2], 0, -1)
+table.insert(inflight, 1, #messages)
+return inflight
+"""
+
+# Moves the in-flight messages of a dropped turn to its dead-letter list.
+DEAD_LETTER_SCRIPT = """
+local messages = redis.call('LRANGE', KEYS[1], 0, -1)
+if #messages > 0 then
+    redis.call('RPUSH', KEYS[2], unpack(messages))
+    redis.call('EXPIRE', KEYS[2], ARGV[1])
+    redis.call('DEL', KEYS[1])
+end
+return #messages
+"""
+
+# Canal por el que cada proceso avisa a los demás de un contacto modificado.
+CONTACT_INVALIDATION_CHANNEL = "whatsapp:contact:invalidations"
 
 
 class WhatsappRepository(WhatsappRepositoryInterface):
@@ -16,12 +52,40 @@ class WhatsappRepository(WhatsappRepositoryInterface):
         self,
         backend_ac_client: BackendACClientInterface,
         redis_connection: DBConnectionInterface,
+        debounce_scheduler: DebounceSchedulerInterface,
+        buffer_window_seconds: int = 30,
+        contact_cache: TTLLRUCache = None,
+        share_contact_cache: bool = False,
+        message_writer: WriteBehindQueue = None,
+        recent_memories_max: int = 50,
+        dead_letter_ttl_seconds: int = 60 * 60 * 24 * 7,
     ) -> None:
         """
         Initialize the WhatsappRepository with a database connection.
+
+        :param contact_cache: Optional in-process cache for contacts (TTL + LRU).
+            Invalidations are published on Redis so every process drops the
+            contact; a process that misses the message (e.g. while reconnecting)
+            serves it until the local TTL expires, so keep that TTL short.
+        :param share_contact_cache: Also cache contacts in Redis so every process
+            (webhook workers, listener) shares them.
+        :param message_writer: Optional write-behind queue used by `queue_message`
+            to persist the conversation history off the critical path.
+        :param recent_memories_max: Memories kept per user in the recency index.
         """
         self.backend_ac_client = backend_ac_client
         self.redis_connection = redis_connection
+        self.debounce_scheduler = debounce_scheduler
+        self.buffer_window_seconds = buffer_window_seconds
+        self.contact_cache = contact_cache
+        self.share_contact_cache = share_contact_cache
+        self.message_writer = message_writer
+        self.recent_memories_max = recent_memories_max
+        self.dead_letter_ttl_seconds = dead_letter_ttl_seconds
+        self.shared_cache_lock = Lock()
+        self.shared_cache_hits = 0
+        self.shared_cache_misses = 0
+        self.invalidation_thread = None
         self.init_connections()
 
     def init_connections(self) -> None:
@@ -31,10 +95,48 @@ class WhatsappRepository(WhatsappRepositoryInterface):
         if not self.redis_connection.is_connected():
             self.redis_connection.connect()
 
+        self.drain_buffer_script = self.redis_connection.get_connection().register_script(
+            DRAIN_BUFFER_SCRIPT
+        )
+        self.dead_letter_script = self.redis_connection.get_connection().register_script(
+            DEAD_LETTER_SCRIPT
+        )
+
+        if self.contact_cache is not None:
+            self.subscribe_contact_invalidations()
+
+    def subscribe_contact_invalidations(self) -> None:
+        """
+        Listen (in a daemon thread) for contacts modified by other processes.
+        """
+        pubsub = self.redis_connection.get_connection().pubsub(
+            ignore_subscribe_messages=True
+        )
+        pubsub.subscribe(
+            **{CONTACT_INVALIDATION_CHANNEL: self.handle_contact_invalidation}
+        )
+        self.invalidation_thread = pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=self.handle_pubsub_error
+        )
+
+    def handle_contact_invalidation(self, message: dict) -> None:
+        contact_id = int(message["data"])
+        self.contact_cache.delete_where(
+            lambda _, contact: contact.get("id") == contact_id
+        )
+
+    def handle_pubsub_error(self, error, pubsub, thread) -> None:
+        # El hilo sigue escuchando; lo perdido mientras tanto lo cubre el TTL local.
+        print(f"⚠️ Error escuchando invalidaciones de contactos: {error}", "\n")
+        time.sleep(1)
+
     def close_connections(self) -> None:
         """
         Close the database and Redis connections.
         """
+        if getattr(self, "invalidation_thread", None) is not None:
+            self.invalidation_thread.stop()
+            self.invalidation_thread = None
 
         if self.redis_connection.is_connected():
             self.redis_connection.disconnect()
@@ -54,16 +156,22 @@ class WhatsappRepository(WhatsappRepositoryInterface):
         :return: A dictionary containing the user's information.
         """
 
+        cached_contact = self.get_cached_contact(number)
+        if cached_contact:
+            return cached_contact
+
         try:
             result = self.backend_ac_client.get_contact_by_number(number)
 
             if result:
-                return {
+                contact = {
                     "id": result["id"],
                     "phone_number": result["phone_number"],
                     "created_at": result["created_at"],
                     "updated_at": result["updated_at"],
                 }
+                self.cache_contact(number, contact)
+                return contact
             else:
                 return None
 
@@ -85,12 +193,14 @@ class WhatsappRepository(WhatsappRepositoryInterface):
 
             # Return the created user as a dictionary.
             if user:
-                return {
+                contact = {
                     "id": user["id"],
                     "phone_number": user["phone_number"],
                     "created_at": user["created_at"],
                     "updated_at": user["updated_at"],
                 }
+                self.cache_contact(number, contact)
+                return contact
         except pymysql.MySQLError as e:
             print(f"Error saving user {number}: {e}")
 
@@ -115,6 +225,7 @@ class WhatsappRepository(WhatsappRepositoryInterface):
             self.backend_ac_client.update_contact_by_id(
                 contact_id, column_to_update, new_value
             )
+            self.invalidate_contact_by_id(contact_id)
 
             print(
                 f"\n ** Contact with ID {contact_id} updated successfully ✅. '{column_to_update}' set to {new_value}.",
@@ -123,6 +234,91 @@ class WhatsappRepository(WhatsappRepositoryInterface):
         except pymysql.MySQLError as e:
             print(f"Error updating contact with ID {contact_id}: {e}")
 
+    # Contact cache ================================================
+    def get_cached_contact(self, number: str) -> dict:
+        """
+        Look the contact up in the local cache and then in the shared Redis cache.
+        """
+        if self.contact_cache is None:
+            return None
+
+        contact = self.contact_cache.get(number)
+        if contact:
+            return dict(contact)
+
+        if not self.share_contact_cache:
+            return None
+
+        cached = self.redis_connection.get_connection().get(f"whatsapp:contact:{number}")
+        with self.shared_cache_lock:
+            if cached:
+                self.shared_cache_hits += 1
+            else:
+                self.shared_cache_misses += 1
+
+        if not cached:
+            return None
+
+        contact = json.loads(cached)
+        self.contact_cache.set(number, contact)
+        return dict(contact)
+
+    def cache_contact(self, number: str, contact: dict) -> None:
+        """
+        Store a contact in the local cache and, if enabled, in the shared Redis cache.
+        """
+        if self.contact_cache is None:
+            return
+
+        self.contact_cache.set(number, dict(contact))
+
+        if self.share_contact_cache:
+            ttl = int(self.contact_cache.ttl_seconds) or None
+            pipeline = self.redis_connection.get_connection().pipeline()
+            pipeline.set(
+                f"whatsapp:contact:{number}", json.dumps(contact, default=str), ex=ttl
+            )
+            pipeline.set(f"whatsapp:contact:id:{contact['id']}", number, ex=ttl)
+            pipeline.execute()
+
+    def invalidate_contact_by_id(self, contact_id: int) -> None:
+        """
+        Drop a contact from the caches after it was modified in the backend,
+        here and (through Redis pub/sub) in every other process.
+        """
+        if self.contact_cache is None:
+            return
+
+        self.contact_cache.delete_where(
+            lambda _, contact: contact.get("id") == contact_id
+        )
+
+        client = self.redis_connection.get_connection()
+        if self.share_contact_cache:
+            id_key = f"whatsapp:contact:id:{contact_id}"
+            number = client.get(id_key)
+            if number:
+                client.delete(f"whatsapp:contact:{number.decode()}", id_key)
+
+        # Después de borrar la copia compartida: quien recargue no la vuelve a leer.
+        client.publish(CONTACT_INVALIDATION_CHANNEL, contact_id)
+
+    def get_contact_cache_stats(self) -> dict:
+        """
+        Hit/miss counters of the contact cache, to size it.
+        """
+        if self.contact_cache is None:
+            return {"enabled": False}
+
+        with self.shared_cache_lock:
+            shared = {
+                "enabled": self.share_contact_cache,
+                "hits": self.shared_cache_hits,
+                "misses": self.shared_cache_misses,
+            }
+
+        return {"enabled": True, "local": self.contact_cache.stats(), "shared": shared}
+
     # 6.
     def save_message(
         self,
@@ -148,16 +344,177 @@ class WhatsappRepository(WhatsappRepositoryInterface):
         except pymysql.MySQLError as e:
             print(f"Error saving conversation for {user}: {e}")
 
+    # 7.
+    def save_messages(self, messages: list) -> None:
+        """
+        Save several conversation messages in a single backend call.
+
+        :param messages: List of dicts with contact_id, type_sender and message.
+        """
+        failed = self.backend_ac_client.save_messages(messages)
+        if failed:
+            raise Exception(
+                f"Backend rejected {len(failed)} of a batch of {len(messages)} messages. ❌"
+            )
+
+        print(f"** {len(messages)} mensajes guardados con éxito ✅", "\n")
+
+    def queue_message(self, user: dict, type_sender: str, message: dict) -> None:
+        """
+        Queue a message to be saved by the write-behind queue. Without a queue
+        the message is saved synchronously.
+        """
+        if self.message_writer is None:
+            return self.save_message(user, type_sender, message)
+
+        self.message_writer.put(
+            {
+                "contact_id": user["id"],
+                "type_sender": type_sender,
+                "message": message,
+            }
+        )
+
     def add_message_to_buffer(self, user: str, message: str) -> None:
-        list_key = f"whatsapp:buffer:{user}"
-        self.redis_connection.get_connection().rpush(list_key, message)
+        """
+        Append a message to the user's buffer and restart its debounce window
+        in a single atomic round trip.
+        """
+        pipeline = self.redis_connection.get_connection().pipeline(transaction=True)
+        pipeline.rpush(f"whatsapp:buffer:{user}", message)
+
+        # Reinicia la ventana de espera: la conversación se procesa cuando el usuario deja de escribir.
+        self.debounce_scheduler.schedule(
+            user, self.buffer_window_seconds, pipeline=pipeline
+        )
+        pipeline.execute()
 
-        timer_key = f"whatsapp:timer:{user}"
-        self.redis_connection.get_connection().set(
-            timer_key, "true", ex=30
-        )  # "true" es simplemente un placeholder, no tiene significado semántico; solo necesitamos que la clave exista para que pueda expirar.
         print(f"Mensaje añadido al buffer de {user}: {message}", "\n")
-        print(
-            f"Buffer actual para {user}: {self.redis_connection.get_connection().lrange(list_key, 0, -1)}",
-            "\n",
+
+    def drain_message_buffer(self, user: str) -> Tuple[list, list]:
+        """
+        Atomically take every buffered message of the user for processing.
+
+        The messages move to an in-flight list that survives until
+        `ack_message_buffer`, so a failed turn is retried with the same messages.
+
+        :return: (every in-flight message, the ones moved by this drain). Only
+            the latter are new: the rest were already taken by a failed attempt.
+        """
+        moved, *messages = self.drain_buffer_script(
+            keys=[f"whatsapp:buffer:{user}", f"whatsapp:inflight:{user}"]
+        )
+        messages = [message.decode() for message in messages]
+        return messages, messages[len(messages) - int(moved):]
+
+    def ack_message_buffer(self, user: str, pipeline=None) -> None:
+        """
+        Discard the in-flight messages of the user, and the replies saved for
+        them, once they were answered.
+        """
+        client = pipeline or self.redis_connection.get_connection()
+        client.delete(f"whatsapp:inflight:{user}", f"whatsapp:outbox:{user}")
+
+    def dead_letter_message_buffer(self, user: str, pipeline=None) -> None:
+        """
+        Move the in-flight messages of a turn that will not be retried to
+        `whatsapp:dead:{user}`, so the next turn does not answer them again.
+        """
+        client = pipeline or self.redis_connection.get_connection()
+        self.dead_letter_script(
+            keys=[f"whatsapp:inflight:{user}", f"whatsapp:dead:{user}"],
+            args=[self.dead_letter_ttl_seconds],
+            client=client,
+        )
+        client.delete(f"whatsapp:outbox:{user}")
+
+    def save_pending_replies(self, user: str, replies: list, answered: int) -> None:
+        """
+        Save the replies generated for the in-flight messages before sending
+        them, so a retried turn sends the missing ones instead of calling the
+        LLM again (`whatsapp:outbox:{user}`, cleared by `ack_message_buffer`).
+
+        :param answered: In-flight messages these replies answer.
+        """
+        key = f"whatsapp:outbox:{user}"
+        pipeline = self.redis_connection.get_connection().pipeline(transaction=True)
+        pipeline.delete(key)
+        pipeline.hset(
+            key,
+            mapping={
+                "replies": json.dumps(replies, ensure_ascii=False, default=str),
+                "sent": 0,
+                "answered": answered,
+            },
+        )
+        pipeline.expire(key, self.dead_letter_ttl_seconds)
+        pipeline.execute()
+
+    def get_pending_replies(self, user: str) -> Tuple[list, int, int]:
+        """
+        :return: (saved replies, how many were already sent, in-flight messages
+            they answer), or ([], 0, 0) if there are none.
+        """
+        saved = self.redis_connection.get_connection().hgetall(
+            f"whatsapp:outbox:{user}"
+        )
+        if not saved:
+            return [], 0, 0
+        return (
+            json.loads(saved[b"replies"]),
+            int(saved[b"sent"]),
+            int(saved[b"answered"]),
+        )
+
+    def mark_reply_sent(self, user: str) -> None:
+        """Record that the next saved reply was delivered."""
+        self.redis_connection.get_connection().hincrby(
+            f"whatsapp:outbox:{user}", "sent", 1
+        )
+
+    def add_recent_memories(self, user: str, memories: list) -> None:
+        """
+        Add memories to the user's recency index (a sorted set scored by
+        timestamp), keeping only the newest `recent_memories_max`.
+
+        :param memories: Dicts with at least "content" and "timestamp".
+        """
+        if not memories:
+            return
+
+        key = f"whatsapp:memories:recent:{user}"
+        pipeline = self.redis_connection.get_connection().pipeline(transaction=True)
+        pipeline.zadd(
+            key,
+            {
+                json.dumps(memory, ensure_ascii=False, sort_keys=True): memory["timestamp"]
+                for memory in memories
+            },
+        )
+        pipeline.zremrangebyrank(key, 0, -(self.recent_memories_max + 1))
+        pipeline.execute()
+
+    def get_recent_memories(self, user: str, limit: int = 15) -> list:
+        """
+        Get the `limit` newest memories of the user, newest first.
+        """
+        memories = self.redis_connection.get_connection().zrevrange(
+            f"whatsapp:memories:recent:{user}", 0, limit - 1
+        )
+        return [json.loads(memory) for memory in memories]
+
+    def mark_recent_memories_backfilled(self, user: str) -> None:
+        """
+        Record that the recency index of the user was rebuilt from the vector
+        store, so an empty index is not rebuilt again on every turn.
+        """
+        self.redis_connection.get_connection().set(
+            f"whatsapp:memories:backfilled:{user}", 1
+        )
+
+    def recent_memories_backfilled(self, user: str) -> bool:
+        return bool(
+            self.redis_connection.get_connection().exists(
+                f"whatsapp:memories:backfilled:{user}"
+            )
         )
@@ -0,0 +1,240 @@
+from infrastructure.interfaces.debounce_scheduler_interface import (
+    DebounceSchedulerInterface,
+)
+from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
+from typing import Any, Callable, List, Tuple
+import time
+import uuid
+
+# Moves due keys to the processing set with a lease owned by the claim token
+# (ARGV[5]). Keys that are already being processed stay in the due set, so one
+# conversation never runs twice at once.
+# Returns [key, due time, key, due time, ...].
+CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[3])
+local claimed = {}
+for i = 1, #due, 2 do
+    local key = due[i]
+    if not redis.call('ZSCORE', KEYS[2], key) then
+        redis.call('ZREM', KEYS[1], key)
+        redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), key)
+        redis.call('HINCRBY', KEYS[3], key, 1)
+        redis.call('HSET', KEYS[4], key, ARGV[5])
+        table.insert(claimed, key)
+        table.insert(claimed, due[i + 1])
+        if #claimed >= tonumber(ARGV[4]) * 2 then
+            break
+        end
+    end
+end
+return claimed
+"""
+
+# Moves keys whose lease expired back to the due set (at-least-once delivery).
+# The expired claim loses its ownership: its late ack/nack is ignored.
+REQUEUE_EXPIRED_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, key in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], key)
+    redis.call('HDEL', KEYS[3], key)
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[1], key)
+end
+return expired
+"""
+
+# Pushes back the lease of a key (ARGV[1]) while the claim (ARGV[2]) still owns it.
+EXTEND_LEASE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+# Ends the lease of a key (ARGV[1]) if the claim (ARGV[2]) still owns it.
+ACK_SCRIPT = """
+if redis.call('HGET', KEYS[3], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+class RedisDebounceScheduler(DebounceSchedulerInterface):
+    """
+    Durable debounce scheduler built on Redis sorted sets.
+
+    - `due` set: key -> timestamp when the debounce window ends.
+    - `processing` set: key -> timestamp when the consumer lease expires.
+    - `attempts` hash: key -> delivery attempts of the current claim.
+    - `owners` hash: key -> token of the claim that holds the lease.
+
+    Any number of listener processes can poll `claim_due`; the Lua scripts make
+    each claim atomic, and unacknowledged keys are re-delivered once their lease
+    expires. A consumer keeps a long turn alive with `extend_lease`; `ack` and
+    `nack` with the claim token do nothing once the claim lost its lease.
+    """
+
+    def __init__(
+        self,
+        redis_connection: DBConnectionInterface,
+        prefix: str = "whatsapp:scheduler",
+        lease_seconds: int = 120,
+        max_attempts: int = 3,
+    ) -> None:
+        self.redis_connection = redis_connection
+        self.due_key = f"{prefix}:due"
+        self.processing_key = f"{prefix}:processing"
+        self.attempts_key = f"{prefix}:attempts"
+        self.owners_key = f"{prefix}:owners"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        if not self.redis_connection.is_connected():
+            self.redis_connection.connect()
+
+        client = self.redis_connection.get_connection()
+        self.claim_due_script = client.register_script(CLAIM_DUE_SCRIPT)
+        self.requeue_expired_script = client.register_script(REQUEUE_EXPIRED_SCRIPT)
+        self.extend_lease_script = client.register_script(EXTEND_LEASE_SCRIPT)
+        self.ack_script = client.register_script(ACK_SCRIPT)
+
+    def schedule(self, key: str, delay_seconds: int, pipeline=None) -> None:
+        """
+        Set (or push back) the due time of a key. Re-scheduling before the window
+        ends restarts it, which is the debounce behaviour.
+        """
+        client = pipeline or self.redis_connection.get_connection()
+        client.zadd(self.due_key, {key: time.time() + delay_seconds})
+
+    def claim_due(self, limit: int = 10) -> List[str]:
+        """
+        Claim up to `limit` due keys, leasing them for `lease_seconds`.
+        """
+        return [key for key, _, _ in self.claim_due_with_times(limit)]
+
+    def claim_due_with_times(self, limit: int = 10) -> List[Tuple[str, float, str]]:
+        """
+        Same as `claim_due`, also returning when each key became due and the
+        token of the claim (for `extend_lease`, `ack` and `nack`).
+        """
+        if limit <= 0:
+            return []
+
+        token = uuid.uuid4().hex
+        claimed = self.claim_due_script(
+            keys=[self.due_key, self.processing_key, self.attempts_key, self.owners_key],
+            # Scan a bit further than `limit` in case some due keys are still busy.
+            args=[time.time(), self.lease_seconds, limit * 2, limit, token],
+        )
+        return [
+            (key.decode() if isinstance(key, bytes) else key, float(due_at), token)
+            for key, due_at in zip(claimed[::2], claimed[1::2])
+        ]
+
+    def extend_lease(self, key: str, token: str) -> bool:
+        """
+        Renew the lease of a claimed key for another `lease_seconds`.
+
+        :return: False if the claim no longer owns the key (it was re-delivered).
+        """
+        return bool(
+            self.extend_lease_script(
+                keys=[self.processing_key, self.owners_key],
+                args=[key, token, time.time() + self.lease_seconds],
+            )
+        )
+
+    def ack(self, key: str, pipeline=None, token: str = None) -> bool:
+        """
+        Acknowledge a claimed key, ending its lease.
+
+        :param pipeline: Queue the ack on this pipeline (executed by the caller,
+            who already checked the ownership).
+        :param token: Claim token; the ack is ignored if the claim lost the key.
+        :return: False if the ack was ignored.
+        """
+        if pipeline is not None or token is None:
+            client = pipeline or self.redis_connection.get_connection().pipeline()
+            client.zrem(self.processing_key, key)
+            client.hdel(self.attempts_key, key)
+            client.hdel(self.owners_key, key)
+            if pipeline is None:
+                client.execute()
+            return True
+
+        acked = bool(
+            self.ack_script(
+                keys=[self.processing_key, self.attempts_key, self.owners_key],
+                args=[key, token],
+            )
+        )
+        if not acked:
+            print(f"⚠️ {key} ya no pertenece a este consumidor: ack ignorado.", "\n")
+        return acked
+
+    def nack(
+        self,
+        key: str,
+        delay_seconds: int = 5,
+        on_drop: Callable[[Any], None] = None,
+        token: str = None,
+    ) -> bool:
+        """
+        Release a claimed key for a new attempt.
+
+        :param on_drop: Called with the transaction of the ack when the key is
+            dropped, so its pending data is discarded in the same step.
+        :param token: Claim token; the nack is ignored if the claim lost the key
+            (its new owner decides).
+        :return: True if it was re-scheduled (or the nack was ignored), False if
+            it exceeded `max_attempts` and was dropped.
+        """
+        outcome = {}
+
+        def release(pipeline) -> None:
+            # WATCH sobre el dueño: si otro consumidor toma la clave entre la
+            # lectura y el EXEC, la transacción se repite.
+            owner = pipeline.hget(self.owners_key, key)
+            if token is not None and (owner.decode() if owner else None) != token:
+                outcome["ignored"] = True
+                return
+
+            attempts = int(pipeline.hget(self.attempts_key, key) or 0)
+            outcome["dropped"] = attempts >= self.max_attempts
+            pipeline.multi()
+            if outcome["dropped"]:
+                self.ack(key, pipeline=pipeline)
+                if on_drop is not None:
+                    on_drop(pipeline)
+            else:
+                pipeline.zrem(self.processing_key, key)
+                pipeline.hdel(self.owners_key, key)
+                pipeline.zadd(self.due_key, {key: time.time() + delay_seconds}, nx=True)
+
+        self.redis_connection.get_connection().transaction(
+            release, self.owners_key, self.attempts_key
+        )
+
+        if outcome.get("ignored"):
+            print(f"⚠️ {key} ya no pertenece a este consumidor: nack ignorado.", "\n")
+            return True
+        if outcome["dropped"]:
+            print(
+                f"❌ {key} superó {self.max_attempts} intentos. Se descarta.", "\n"
+            )
+            return False
+        return True
+
+    def requeue_expired(self) -> List[str]:
+        """
+        Re-deliver keys whose consumer died or exceeded its lease.
+        """
+        expired = self.requeue_expired_script(
+            keys=[self.due_key, self.processing_key, self.owners_key],
+            args=[time.time()],
+        )
+        return [key.decode() if isinstance(key, bytes) else key for key in expired]
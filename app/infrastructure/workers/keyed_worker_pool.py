@@ -0,0 +1,170 @@
+from collections import deque
+from concurrent.futures import Future
+from threading import BoundedSemaphore, Lock, Thread
+from typing import Any, Callable, Dict, Hashable
+import queue
+import time
+
+
+class KeyedWorkerPool:
+    """
+    Bounded thread pool that runs tasks sharing the same key strictly in
+    submission order, while tasks with different keys run in parallel.
+
+    Each key owns a FIFO of pending tasks. A key is handed to a worker only
+    when it is not already being processed, so a slow conversation never
+    blocks another phone number and never runs two turns at the same time.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 0, name: str = "worker"):
+        """
+        :param max_workers: Number of worker threads.
+        :param max_pending: Max tasks waiting to run (0 = unbounded). When the
+            limit is reached `submit` blocks, applying backpressure to the producer.
+        :param name: Prefix used for the worker thread names.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be greater than 0")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.name = name
+
+        self._ready_keys = queue.Queue()
+        self._pending: Dict[Hashable, deque] = {}
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(max_pending) if max_pending > 0 else None
+        self._workers = []
+        self._started = False
+        self._shutdown = False
+
+        # Counters
+        self._queue_depth = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def start(self) -> None:
+        """Start the worker threads (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        for index in range(self.max_workers):
+            worker = Thread(
+                target=self._run_worker, name=f"{self.name}-{index}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, key: Hashable, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """
+        Queue `fn(*args, **kwargs)` behind every task already submitted for `key`.
+        """
+        if self._shutdown:
+            raise RuntimeError("Worker pool is shut down.")
+
+        self.start()
+
+        if self._slots:
+            self._slots.acquire()
+
+        future = Future()
+        with self._lock:
+            self._submitted += 1
+            self._queue_depth += 1
+            tasks = self._pending.get(key)
+            if tasks is None:
+                # Key is idle: create its queue and schedule it.
+                self._pending[key] = deque([(future, fn, args, kwargs, time.monotonic())])
+                self._ready_keys.put(key)
+            else:
+                # Key is already scheduled or running: keep strict order.
+                tasks.append((future, fn, args, kwargs, time.monotonic()))
+
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting tasks and let workers exit once the queue is drained."""
+        self._shutdown = True
+        for _ in self._workers:
+            self._ready_keys.put(None)
+
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def idle_workers(self) -> int:
+        """Workers that would start a new task right away."""
+        with self._lock:
+            return max(0, self.max_workers - self._active - self._queue_depth)
+
+    def stats(self) -> dict:
+        """Queue depth, throughput and wait-time counters of the pool."""
+        with self._lock:
+            dequeued = self._completed + self._failed + self._active
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self._queue_depth,
+                "active": self._active,
+                "active_keys": len(self._pending),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_time_total_seconds": round(self._wait_time_total, 4),
+                "wait_time_max_seconds": round(self._wait_time_max, 4),
+                "wait_time_avg_seconds": (
+                    round(self._wait_time_total / dequeued, 4) if dequeued else 0.0
+                ),
+            }
+
+    def _run_worker(self) -> None:
+        while True:
+            key = self._ready_keys.get()
+            if key is None:
+                with self._lock:
+                    drained = not self._pending
+                if drained:
+                    return
+                # Una clave en curso puede volver a la cola detrás de la señal de
+                # parada: se reencola la señal hasta que no quede trabajo.
+                self._ready_keys.put(None)
+                time.sleep(0.01)
+                continue
+
+            with self._lock:
+                future, fn, args, kwargs, enqueued_at = self._pending[key].popleft()
+                wait_time = time.monotonic() - enqueued_at
+                self._queue_depth -= 1
+                self._active += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+
+            if self._slots:
+                self._slots.release()
+
+            failed = False
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    failed = True
+                    print(f"❌ Error en tarea del worker pool ({key}): {e}", "\n")
+                    future.set_exception(e)
+
+            with self._lock:
+                self._active -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+                if self._pending[key]:
+                    # More work for this key: reschedule it behind other keys.
+                    self._ready_keys.put(key)
+                else:
+                    del self._pending[key]
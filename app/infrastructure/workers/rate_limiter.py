@@ -0,0 +1,80 @@
+from threading import Lock
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by the workers that call a rate-limited API.
+
+    `acquire` blocks until a token is available. When the API answers with a
+    rate-limit error, `pause` stops every worker for the given seconds instead
+    of letting each one retry on its own.
+    """
+
+    def __init__(self, requests_per_minute: float = 60, burst: int = 1):
+        """
+        :param requests_per_minute: Sustained request rate (0 = unlimited).
+        :param burst: Requests that may start back to back after an idle period.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = Lock()
+
+        # Counters
+        self._acquired = 0
+        self._pauses = 0
+        self._wait_time_total = 0.0
+
+    def acquire(self) -> float:
+        """Block until a request may start; return the seconds waited."""
+        started_at = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._paused_until - now
+                if delay <= 0:
+                    delay = self._take_token(now)
+                if delay <= 0:
+                    waited = now - started_at
+                    self._acquired += 1
+                    self._wait_time_total += waited
+                    return waited
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._pauses += 1
+            # La ráfaga no se reanuda de golpe después de la pausa: los tokens
+            # vuelven a acumularse solo desde que termina.
+            self._tokens = min(self._tokens, 1.0)
+            self._updated_at = max(self._updated_at, self._paused_until)
+
+    def _take_token(self, now: float) -> float:
+        """Take a token; return 0, or the seconds until the next one."""
+        if self.requests_per_minute <= 0:
+            return 0.0
+
+        rate = self.requests_per_minute / 60
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * rate)
+        self._updated_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / rate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "acquired": self._acquired,
+                "pauses": self._pauses,
+                "paused_seconds_left": round(
+                    max(0.0, self._paused_until - time.monotonic()), 4
+                ),
+                "wait_time_total_seconds": round(self._wait_time_total, 4),
+            }
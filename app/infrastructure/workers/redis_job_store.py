@@ -0,0 +1,173 @@
+from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
+from typing import List, Optional
+import json
+import time
+import uuid
+
+# Appends the result of one item (ARGV[1]) and counts it as ARGV[2] ("completed"
+# or "failed"); the item stops counting as running. Results of a job that no
+# longer exists (expired) are dropped instead of recreating a partial hash.
+# Returns -1 (no job), 1 (last result) or 0.
+ADD_RESULT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+redis.call('RPUSH', KEYS[2], ARGV[1])
+redis.call('HINCRBY', KEYS[1], ARGV[2], 1)
+if ARGV[5] == '1' then
+    redis.call('HINCRBY', KEYS[1], 'running', -1)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+local job = redis.call('HMGET', KEYS[1], 'total', 'completed', 'failed', 'status')
+if tonumber(job[2]) + tonumber(job[3]) < tonumber(job[1]) then
+    return 0
+end
+if job[4] ~= 'failed' then
+    redis.call('HSET', KEYS[1], 'status', 'completed', 'finished_at', ARGV[4])
+end
+return 1
+"""
+
+# Applies HSET/HINCRBY to a job hash only if it still exists.
+UPDATE_JOB_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[1] == 'incr' then
+    redis.call('HINCRBY', KEYS[1], ARGV[2], ARGV[3])
+else
+    for i = 2, #ARGV, 2 do
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+return 1
+"""
+
+
+class RedisJobStore:
+    """
+    Batch jobs on Redis, readable from any process of the API.
+
+    Per job:
+    - `{prefix}:{job_id}`: hash with the status and the counters.
+    - `{prefix}:{job_id}:results`: list with the result of each item, in the
+      order they finished; a client resumes reading from its last offset.
+
+    Both keys expire `ttl_seconds` after the last update; updates of an
+    expired job are ignored.
+    """
+
+    def __init__(
+        self,
+        redis_connection: DBConnectionInterface,
+        prefix: str = "whatsapp:jobs",
+        ttl_seconds: int = 60 * 60 * 24,
+    ) -> None:
+        self.redis_connection = redis_connection
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+        if not self.redis_connection.is_connected():
+            self.redis_connection.connect()
+
+        client = self.redis_connection.get_connection()
+        self.add_result_script = client.register_script(ADD_RESULT_SCRIPT)
+        self.update_job_script = client.register_script(UPDATE_JOB_SCRIPT)
+
+    def job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    def results_key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}:results"
+
+    def create(self, kind: str, total: int) -> dict:
+        """Register a queued job of `total` items."""
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "total": total,
+            "completed": 0,
+            "failed": 0,
+            "running": 0,
+            "created_at": time.time(),
+        }
+        client = self.redis_connection.get_connection()
+        pipeline = client.pipeline(transaction=True)
+        pipeline.hset(self.job_key(job["job_id"]), mapping=job)
+        pipeline.expire(self.job_key(job["job_id"]), self.ttl_seconds)
+        pipeline.execute()
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        saved = self.redis_connection.get_connection().hgetall(self.job_key(job_id))
+        if not saved:
+            return None
+
+        job = {key.decode(): value.decode() for key, value in saved.items()}
+        for field in ("total", "completed", "failed", "running"):
+            job[field] = int(job.get(field, 0))
+        for field in ("created_at", "finished_at"):
+            if field in job:
+                job[field] = float(job[field])
+        return job
+
+    def set_status(self, job_id: str, status: str) -> bool:
+        return self.update(job_id, status=status)
+
+    def add_running(self, job_id: str, count: int = 1) -> bool:
+        """Count items handed to a worker (negative: released without a result)."""
+        return bool(
+            self.update_job_script(
+                keys=[self.job_key(job_id)], args=["incr", "running", count]
+            )
+        )
+
+    def update(self, job_id: str, **fields) -> bool:
+        """Set fields of the job; False if it no longer exists."""
+        args = ["set"]
+        for field, value in fields.items():
+            args += [field, value]
+        return bool(self.update_job_script(keys=[self.job_key(job_id)], args=args))
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """
+        Mark the job as failed (e.g. some items could not be queued or their
+        result could not be stored). Results added later are still kept.
+        """
+        return self.update(
+            job_id, status="failed", error=error, finished_at=time.time()
+        )
+
+    def add_result(
+        self, job_id: str, result: dict, failed: bool = False, running: bool = True
+    ) -> bool:
+        """
+        Append the result of one item; return True when it was the last one
+        (the job is then marked as completed, unless it already failed).
+
+        :param running: The item was counted with `add_running`.
+        """
+        finished = self.add_result_script(
+            keys=[self.job_key(job_id), self.results_key(job_id)],
+            args=[
+                json.dumps(result, ensure_ascii=False),
+                "failed" if failed else "completed",
+                self.ttl_seconds,
+                time.time(),
+                1 if running else 0,
+            ],
+        )
+        if finished == -1:
+            print(f"⚠️ El job {job_id} ya no existe: resultado descartado.", "\n")
+            return False
+        return finished == 1
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = -1) -> List[dict]:
+        """Results from `offset` on (`limit` = -1: all of them)."""
+        end = -1 if limit < 0 else offset + limit - 1
+        values = self.redis_connection.get_connection().lrange(
+            self.results_key(job_id), offset, end
+        )
+        return [json.loads(value) for value in values]
@@ -0,0 +1,251 @@
+from infrastructure.interfaces.db_connection_interface import DBConnectionInterface
+from threading import Event, Lock, Thread
+from typing import Any, Callable, List
+import json
+import os
+import socket
+import time
+
+
+class RedisStreamQueue:
+    """
+    Durable background queue on a Redis Stream with a consumer group.
+
+    Producers `put` items from any process; a worker thread reads them in batches
+    and calls `handler(items)`. Entries are acknowledged only after the handler
+    succeeds, so delivery is at-least-once: entries of a failed batch or of a
+    dead consumer stay pending and are re-claimed (XAUTOCLAIM) once idle for
+    `claim_idle_ms`. After `max_deliveries` attempts an entry is moved to the
+    `{stream}:dead` stream.
+    """
+
+    def __init__(
+        self,
+        redis_connection: DBConnectionInterface,
+        stream: str,
+        group: str,
+        handler: Callable[[List[Any]], Any],
+        batch_size: int = 20,
+        block_ms: int = 1000,
+        claim_idle_ms: int = 60000,
+        max_deliveries: int = 5,
+        name: str = "stream-worker",
+    ) -> None:
+        """
+        :param handler: Callable that processes a list of items. It must raise
+            when the batch could not be processed.
+        """
+        self.redis_connection = redis_connection
+        self.stream = stream
+        self.dead_stream = f"{stream}:dead"
+        self.group = group
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.handler = handler
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.name = name
+
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._thread = None
+        self._group_ready = False
+        # XAUTOCLAIM cursor: "0-0" once the whole pending list was scanned.
+        self._claim_cursor = "0-0"
+
+        # Counters
+        self._enqueued = 0
+        self._processed = 0
+        self._failed_batches = 0
+        self._reclaimed = 0
+        self._dead = 0
+
+        if not self.redis_connection.is_connected():
+            self.redis_connection.connect()
+
+    def put(self, item: Any) -> None:
+        """Append an item to the stream."""
+        self.redis_connection.get_connection().xadd(
+            self.stream, {"data": json.dumps(item, ensure_ascii=False)}
+        )
+        with self._lock:
+            self._enqueued += 1
+
+    def start(self) -> None:
+        """Start the consumer thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Stop consuming; the batch in progress finishes first."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "enqueued": self._enqueued,
+                "processed": self._processed,
+                "failed_batches": self._failed_batches,
+                "reclaimed": self._reclaimed,
+                "dead": self._dead,
+            }
+        try:
+            client = self.redis_connection.get_connection()
+            stats["length"] = client.xlen(self.stream)
+            stats["pending"] = client.xpending(self.stream, self.group)["pending"]
+        except Exception:
+            pass
+        return stats
+
+    def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            self.redis_connection.get_connection().xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except Exception as e:
+            # BUSYGROUP: el grupo ya existe.
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def _run(self) -> None:
+        next_claim_at = 0.0
+        while not self._stop_event.is_set():
+            try:
+                self._ensure_group()
+
+                entries = []
+                if time.monotonic() >= next_claim_at:
+                    entries = self._claim_stale()
+                    # Si quedó lista pendiente por revisar, se sigue en la próxima vuelta.
+                    if self._claim_cursor == "0-0":
+                        next_claim_at = time.monotonic() + self.claim_idle_ms / 1000
+
+                if not entries:
+                    entries = self._read_new()
+
+                if entries:
+                    self._process(entries)
+            except Exception as e:
+                print(f"❌ Error en {self.name}: {e}", "\n")
+                self._stop_event.wait(1)
+
+    def _read_new(self) -> list:
+        response = self.redis_connection.get_connection().xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: ">"},
+            count=self.batch_size,
+            block=self.block_ms,
+        )
+        return response[0][1] if response else []
+
+    def _claim_stale(self) -> list:
+        """
+        Take over entries left pending by failed batches or dead consumers, up
+        to `batch_size`, following the XAUTOCLAIM cursor from where the last
+        call stopped.
+        """
+        client = self.redis_connection.get_connection()
+        entries = []
+        deleted = []
+        while len(entries) < self.batch_size:
+            # Redis 7 responde [cursor, entradas, ids borrados]; Redis 6.2 solo
+            # [cursor, entradas], con las borradas como (id, None).
+            reply = client.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=self.claim_idle_ms,
+                start_id=self._claim_cursor,
+                count=self.batch_size - len(entries),
+            )
+            cursor, claimed = reply[0], reply[1]
+            for entry_id, fields in claimed:
+                if fields:
+                    entries.append((entry_id, fields))
+                else:
+                    deleted.append(entry_id)
+
+            self._claim_cursor = (
+                cursor.decode() if isinstance(cursor, bytes) else str(cursor)
+            )
+            if self._claim_cursor == "0-0":
+                break
+
+        # Entradas borradas del stream mientras estaban pendientes (Redis 6.2
+        # las deja en la lista de pendientes).
+        if deleted:
+            client.xack(self.stream, self.group, *deleted)
+        if not entries:
+            return []
+
+        with self._lock:
+            self._reclaimed += len(entries)
+
+        deliveries = {
+            pending["message_id"]: pending["times_delivered"]
+            for pending in client.xpending_range(
+                self.stream,
+                self.group,
+                min=entries[0][0],
+                max=entries[-1][0],
+                count=len(entries),
+                consumername=self.consumer,
+            )
+        }
+
+        alive = []
+        for entry_id, fields in entries:
+            if deliveries.get(entry_id, 0) > self.max_deliveries:
+                self._dead_letter(entry_id, fields)
+            else:
+                alive.append((entry_id, fields))
+        return alive
+
+    def _dead_letter(self, entry_id, fields) -> None:
+        client = self.redis_connection.get_connection()
+        pipeline = client.pipeline(transaction=True)
+        pipeline.xadd(self.dead_stream, fields)
+        pipeline.xack(self.stream, self.group, entry_id)
+        pipeline.xdel(self.stream, entry_id)
+        pipeline.execute()
+
+        with self._lock:
+            self._dead += 1
+        print(
+            f"❌ Entrada {entry_id} de {self.stream} superó {self.max_deliveries} intentos. Movida a {self.dead_stream}.",
+            "\n",
+        )
+
+    def _process(self, entries: list) -> None:
+        ids = [entry_id for entry_id, _ in entries]
+        items = [json.loads(fields[b"data"]) for _, fields in entries]
+
+        try:
+            self.handler(items)
+        except Exception as e:
+            # Quedan pendientes y se re-intentan tras `claim_idle_ms`.
+            with self._lock:
+                self._failed_batches += 1
+            print(f"❌ Error procesando lote de {len(items)} en {self.name}: {e}", "\n")
+            return
+
+        client = self.redis_connection.get_connection()
+        pipeline = client.pipeline(transaction=True)
+        pipeline.xack(self.stream, self.group, *ids)
+        pipeline.xdel(self.stream, *ids)
+        pipeline.execute()
+
+        with self._lock:
+            self._processed += len(items)
@@ -0,0 +1,181 @@
+from threading import Lock, Thread
+from typing import Any, Callable, List
+import atexit
+import queue
+import time
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Buffers writes in memory and flushes them in batches from a background thread.
+
+    A batch is flushed when it reaches `max_batch_size` items or when
+    `flush_interval_seconds` elapsed since its first item, whichever comes first.
+    Failed batches are retried with backoff (only the items that were not
+    stored, when `flush_fn` reports them), and pending items are flushed on
+    shutdown (`close`, also registered with atexit).
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Any]], Any],
+        max_batch_size: int = 20,
+        flush_interval_seconds: float = 1.0,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 1.0,
+        name: str = "write-behind",
+    ):
+        """
+        :param flush_fn: Callable that persists a list of items. It must raise
+            (or return False) when the batch could not be stored, or return
+            the list of items that were not stored (empty if all were).
+        """
+        self.flush_fn = flush_fn
+        self.max_batch_size = max_batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self._thread = None
+        self._closed = False
+
+        # Counters
+        self._enqueued = 0
+        self._flushed_items = 0
+        self._flushed_batches = 0
+        self._failed_attempts = 0
+        self._dropped_items = 0
+
+        atexit.register(self.close)
+
+    def put(self, item: Any) -> None:
+        """Queue an item to be written in the next batch."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} queue is closed.")
+
+        self.start()
+        with self._lock:
+            self._enqueued += 1
+        self._queue.put(item)
+
+    def start(self) -> None:
+        """Start the flusher thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 30) -> None:
+        """Stop accepting items and flush everything still pending."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is None:
+            return
+
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "enqueued": self._enqueued,
+                "flushed_items": self._flushed_items,
+                "flushed_batches": self._flushed_batches,
+                "failed_attempts": self._failed_attempts,
+                "dropped_items": self._dropped_items,
+            }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval_seconds)
+            except queue.Empty:
+                continue
+
+            if first is _STOP:
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and not stopping:
+                    break
+                try:
+                    item = (
+                        self._queue.get_nowait()
+                        if stopping
+                        else self._queue.get(timeout=remaining)
+                    )
+                except queue.Empty:
+                    break
+
+                if item is _STOP:
+                    # Flush what is left without waiting for the interval.
+                    stopping = True
+                    continue
+                batch.append(item)
+
+            self._flush(batch)
+
+            if stopping:
+                self._drain()
+
+    def _drain(self) -> None:
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.max_batch_size:
+                self._flush(batch)
+                batch = []
+
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List[Any]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = self.flush_fn(batch)
+                if result is False:
+                    raise Exception("flush_fn returned False")
+
+                # Guardado parcial: solo se reintenta lo que no se guardó.
+                failed = list(result) if isinstance(result, (list, tuple)) else []
+                with self._lock:
+                    self._flushed_items += len(batch) - len(failed)
+                    if not failed:
+                        self._flushed_batches += 1
+                if not failed:
+                    return
+                batch = failed
+                raise Exception(f"{len(failed)} items were not stored")
+            except Exception as e:
+                with self._lock:
+                    self._failed_attempts += 1
+                print(
+                    f"❌ Error escribiendo lote de {len(batch)} en {self.name} (intento {attempt + 1}): {e}",
+                    "\n",
+                )
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_backoff_seconds * (2**attempt))
+
+        with self._lock:
+            self._dropped_items += len(batch)
+        print(f"❌ Lote de {len(batch)} descartado en {self.name}.", "\n")
@@ -0,0 +1,104 @@
+from threading import Event, Thread
+from prometheus_client import start_http_server
+import signal
+
+from infrastructure.providers.bootstrap import create_container
+from infrastructure.locks.redis_leader_lock import RedisLeaderLock
+from infrastructure.config.config import get_env
+
+# Dedicated entry point for the messages expiration listener, so the web workers
+# (app.py / asgi.py) scale independently of it.
+# Run with: python3 app/listener.py
+#
+# Several listener processes can run at once: every conversation is claimed
+# atomically from the debounce scheduler, so each one is processed by a single
+# listener. With LISTENER_LEADER_ELECTION=true only the process holding the Redis
+# lock polls the scheduler and the rest stay on standby.
+
+shutdown_event = Event()
+
+
+def run_listener(listener_service) -> None:
+    listener_service.execute()
+
+
+def run_as_leader(listener_service, leader_lock: RedisLeaderLock, renew_interval: float) -> None:
+    """
+    Wait until this process takes the leader lock, run the listener while the
+    lock is renewed and go back to standby if the leadership is lost.
+    """
+    while not shutdown_event.is_set():
+        try:
+            acquired = leader_lock.acquire()
+        except Exception as e:
+            print(f"❌ Error adquiriendo el lock del listener: {e}", "\n")
+            acquired = False
+
+        if not acquired:
+            shutdown_event.wait(renew_interval)
+            continue
+
+        print("👑 Este proceso es el líder del listener.", "\n")
+        thread = Thread(target=run_listener, args=(listener_service,), daemon=True)
+        thread.start()
+
+        while thread.is_alive() and not shutdown_event.is_set():
+            shutdown_event.wait(renew_interval)
+            try:
+                renewed = leader_lock.renew()
+            except Exception as e:
+                print(f"❌ Error renovando el lock del listener: {e}", "\n")
+                renewed = False
+
+            if not renewed:
+                print("⚠️ Se perdió el liderazgo del listener.", "\n")
+                break
+
+        listener_service.stop()
+        thread.join()
+
+        try:
+            leader_lock.release()
+        except Exception as e:
+            print(f"❌ Error liberando el lock del listener: {e}", "\n")
+
+
+def main() -> None:
+    container = create_container()
+    listener_service = container.make("messages_expiration_listener_service")
+
+    # El listener no sirve la app web: expone sus métricas en un puerto propio.
+    metrics_port = int(get_env("LISTENER_METRICS_PORT", 0))
+    if metrics_port:
+        start_http_server(metrics_port, registry=container.make("metrics").registry)
+        print(f"📈 Métricas del listener en :{metrics_port}/metrics", "\n")
+
+    def handle_shutdown(signum, frame):
+        print("🛑 Deteniendo listener...", "\n")
+        shutdown_event.set()
+        listener_service.stop()
+
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    signal.signal(signal.SIGINT, handle_shutdown)
+
+    if get_env("LISTENER_LEADER_ELECTION", "false").lower() == "true":
+        lock_ttl_seconds = int(get_env("LISTENER_LOCK_TTL_SECONDS", 15))
+        leader_lock = RedisLeaderLock(
+            container.make("redis_connection"),
+            name="messages_expiration_listener",
+            ttl_seconds=lock_ttl_seconds,
+        )
+        # Renew well before the lock expires.
+        run_as_leader(listener_service, leader_lock, lock_ttl_seconds / 3)
+    else:
+        run_listener(listener_service)
+
+    # Terminar las conversaciones ya reclamadas y los envíos pendientes antes de salir.
+    listener_service.worker_pool.shutdown(wait=True)
+    whatsapp_client = container.resolved("whatsapp_client")
+    if whatsapp_client is not None:
+        whatsapp_client.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from domain.whatsapp.helpers.wp_helper import get_message_format
+from infrastructure.config.config import get_env
+import hmac
+
+
+def register_asgi_routes(app: FastAPI, container):
+    """
+    Register the same routes as `register_routes` on the ASGI (FastAPI) application,
+    using the async versions of the services.
+    """
+
+    @app.get("/")
+    async def hello_world():
+        return JSONResponse({"message": "Hello, World!", "status": 200}, 200)
+
+    @app.get("/welcome")
+    async def welcome():
+        return JSONResponse({"message": "Welcome to the WhatsApp API", "status": 200}, 200)
+
+    # Con varios workers cada uno solo conoce sus números: sin el directorio
+    # multiproceso de prometheus_client, /metrics no se publica.
+    if int(get_env("ASGI_WORKERS", 1)) <= 1 or get_env("PROMETHEUS_MULTIPROC_DIR"):
+
+        @app.get("/metrics")
+        async def metrics():
+            """
+            Prometheus metrics: latency per stage, external calls and LLM tokens.
+            """
+            body, content_type = container.make("metrics").export()
+            return Response(body, 200, media_type=content_type)
+
+    @app.post("/answer-cache/invalidate")
+    async def invalidate_answer_cache(request: Request):
+        """
+        Endpoint to drop the cached FAQ answers (all, or those of one intent),
+        e.g. after the price or the address changed. Requires X-Admin-Token.
+        """
+        try:
+            admin_token = get_env("ADMIN_API_TOKEN", "")
+            if not admin_token or not hmac.compare_digest(
+                request.headers.get("x-admin-token", ""), admin_token
+            ):
+                return JSONResponse({"message": "Forbidden", "status": 403}, 403)
+
+            try:
+                data = await request.json()
+            except Exception:
+                data = {}
+            removed = await asyncio.to_thread(
+                container.make("answer_cache").invalidate, (data or {}).get("intent")
+            )
+            return JSONResponse({"removed": removed, "status": 200}, 200)
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    @app.post("/calendar/add_event")
+    async def add_calendar_event(request: Request):
+        """
+        Endpoint to add a calendar event.
+        """
+        try:
+            data = await request.json()
+            add_calendar_event_service = container.make("add_calendar_event_service")
+
+            response = await add_calendar_event_service.aexecute(
+                summary=data.get("summary"),
+                description=data.get("description"),
+                start=data.get("start"),
+                end=data.get("end"),
+                attendees=data.get("attendees", []),
+            )
+
+            return JSONResponse(response, 200)
+
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    @app.post("/whatsapp/contact/resume/information")
+    async def get_contact_resume_information(request: Request):
+        """
+        Endpoint to get user resume information.
+        """
+        try:
+            retreive_user_information_service = container.make(
+                "retreive_user_information_service"
+            )
+
+            data = await request.json()
+            contact_resume_information = await retreive_user_information_service.aexecute(
+                conversation=data.get("conversation", []),
+                telefono=data.get("telefono", "0000000000"),
+            )
+
+            if not contact_resume_information:
+                return JSONResponse(
+                    {"message": "User resume information not found", "status": 404},
+                    404,
+                )
+
+            return JSONResponse(
+                {
+                    "contact_resume_information": contact_resume_information,
+                    "status": 200,
+                },
+                200,
+            )
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    @app.post("/whatsapp/contact/resume/information/jobs")
+    async def create_contact_resume_job(request: Request):
+        """
+        Endpoint to extract the resume information of many contacts in the
+        background. Body: {"items": [{"telefono", "conversation"}]}.
+        """
+        try:
+            contact_resume_job_service = container.make("contact_resume_job_service")
+
+            try:
+                data = await request.json()
+            except Exception:
+                data = None
+            if not data:
+                return JSONResponse({"message": "Invalid JSON payload", "status": 400}, 400)
+
+            job = await contact_resume_job_service.aexecute(items=data.get("items"))
+            return JSONResponse({"job": job, "status": 202}, 202)
+        except ValueError as e:
+            return JSONResponse({"message": str(e), "status": 400}, 400)
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    @app.get("/whatsapp/contact/resume/information/jobs/{job_id}")
+    async def get_contact_resume_job(job_id: str, offset: int = 0, limit: int = 100):
+        """
+        Endpoint to poll a job: its status and the results from `offset` on.
+        """
+        try:
+            contact_resume_job_service = container.make("contact_resume_job_service")
+
+            response = await asyncio.to_thread(
+                contact_resume_job_service.get_job, job_id, offset, limit
+            )
+            if response is None:
+                return JSONResponse({"message": "Job not found", "status": 404}, 404)
+
+            return JSONResponse({**response, "status": 200}, 200)
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    @app.get("/whatsapp/contact/resume/information/jobs/{job_id}/stream")
+    async def stream_contact_resume_job(request: Request, job_id: str, offset: int = 0):
+        """
+        Endpoint to receive the results of a job as Server-Sent Events.
+        """
+        contact_resume_job_service = container.make("contact_resume_job_service")
+
+        # Al reconectar, el navegador envía el id del último evento recibido.
+        last_event_id = request.headers.get("last-event-id")
+        if last_event_id and last_event_id.isdigit():
+            offset = int(last_event_id) + 1
+
+        return StreamingResponse(
+            contact_resume_job_service.astream(job_id, offset),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/whatsapp/send/message")
+    async def send_whatsapp_message(request: Request):
+        """
+        Endpoint to send a message to a WhatsApp number.
+        """
+        try:
+            send_message_service = container.make("send_message_service")
+
+            data = await request.json()
+
+            if not isinstance(data, dict):
+                return JSONResponse({"message": "Invalid JSON payload", "status": 400}, 400)
+
+            phone_number = data.get("phone_number", "0000000000")
+
+            format_message = get_message_format(
+                format_type=data.get("format_type", "text"),
+                phone_number=phone_number,
+                response={"message": data.get("message", "")},
+            )
+
+            response = await send_message_service.aexecute(
+                phone_number=phone_number,
+                format_message=format_message,
+            )
+
+            return JSONResponse(response, 200)
+
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    @app.post("/whatsapp/send/template/message")
+    async def send_whatsapp_template_message(request: Request):
+        """
+        Endpoint to send a template message to a WhatsApp number.
+        """
+        try:
+            send_message_service = container.make("send_message_service")
+
+            data = await request.json()
+
+            if not isinstance(data, dict):
+                return JSONResponse({"message": "Invalid JSON payload", "status": 400}, 400)
+
+            phone_number = data.get("phone_number", "0000000000")
+
+            format_message = get_message_format(
+                format_type=data.get("template_name", ""),
+                phone_number=phone_number,
+                response=data.get("template_parameters", {}),
+            )
+
+            response = await send_message_service.aexecute(
+                phone_number=phone_number,
+                format_message=format_message,
+            )
+
+            return JSONResponse(response, 200)
+
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    # Endpoint for WhatsApp webhook =========================
+    @app.get("/whatsapp")
+    async def verify_token(request: Request):
+        try:
+            verify_token_service = container.make("verify_token_service")
+
+            response = await verify_token_service.aexecute(
+                request.query_params.get("hub.verify_token"),
+                request.query_params.get("hub.challenge"),
+            )
+            return JSONResponse(response, response.get("status", 200))
+
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    @app.post("/webhook/whatsapp")
+    async def received_message(request: Request):
+        try:
+            body = await request.json()
+
+            received_message_service = container.make("received_message_service")
+
+            response = await received_message_service.aexecute(body)
+            return JSONResponse(response, response.get("status", 200))
+
+        except Exception as e:
+            return JSONResponse({"message": str(e), "status": 500}, 500)
+
+    # ==========================================================
+    # Endpoint for Google Calendar Webhook =========================
+    @app.post("/webhook/google-calendar")
+    async def webhook_google_calendar(request: Request):
+        # Google envía solo headers, sin body
+        print("\n ===== Google Calendar Webhook Received =====")
+        for k, v in request.headers.items():
+            print(f"{k}: {v}")
+
+        raw_data = await request.body()
+        if raw_data:
+            print("Body:", raw_data)
+        else:
+            print("Body: <empty>")
+
+        return PlainTextResponse("OK", 200)
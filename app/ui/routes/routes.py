@@ -1,6 +1,8 @@
-from flask import request, jsonify
+from flask import Response, request, jsonify, stream_with_context
 from flask_cors import CORS, cross_origin
 from domain.whatsapp.helpers.wp_helper import get_message_format
+from infrastructure.config.config import get_env
+import hmac
 
 
 def register_routes(app, container):
@@ -16,6 +18,33 @@ def register_routes(app, container):
     def welcome():
         return jsonify({"message": "Welcome to the WhatsApp API", "status": 200}), 200
 
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """
+        Prometheus metrics: latency per stage, external calls and LLM tokens.
+        """
+        body, content_type = container.make("metrics").export()
+        return Response(body, status=200, content_type=content_type)
+
+    @app.route("/answer-cache/invalidate", methods=["POST"])
+    def invalidate_answer_cache():
+        """
+        Endpoint to drop the cached FAQ answers (all, or those of one intent),
+        e.g. after the price or the address changed. Requires X-Admin-Token.
+        """
+        try:
+            admin_token = get_env("ADMIN_API_TOKEN", "")
+            if not admin_token or not hmac.compare_digest(
+                request.headers.get("X-Admin-Token", ""), admin_token
+            ):
+                return jsonify({"message": "Forbidden", "status": 403}), 403
+
+            data = request.get_json(silent=True) or {}
+            removed = container.make("answer_cache").invalidate(data.get("intent"))
+            return jsonify({"removed": removed, "status": 200}), 200
+        except Exception as e:
+            return jsonify({"message": str(e), "status": 500}), 500
+
     @cross_origin()
     @app.route("/calendar/add_event", methods=["POST"])
     def add_calendar_event():
@@ -85,6 +114,73 @@ def register_routes(app, container):
         except Exception as e:
             return jsonify({"message": str(e), "status": 500}), 500
 
+    @cross_origin()
+    @app.route("/whatsapp/contact/resume/information/jobs", methods=["POST"])
+    def create_contact_resume_job():
+        """
+        Endpoint to extract the resume information of many contacts in the
+        background. Body: {"items": [{"telefono", "conversation"}]}.
+        """
+        try:
+            contact_resume_job_service = container.make("contact_resume_job_service")
+
+            data = request.get_json(silent=True)
+            if not data:
+                return jsonify({"message": "Invalid JSON payload", "status": 400}), 400
+
+            job = contact_resume_job_service.execute(items=data.get("items"))
+            return jsonify({"job": job, "status": 202}), 202
+        except ValueError as e:
+            return jsonify({"message": str(e), "status": 400}), 400
+        except Exception as e:
+            return jsonify({"message": str(e), "status": 500}), 500
+
+    @cross_origin()
+    @app.route("/whatsapp/contact/resume/information/jobs/<job_id>", methods=["GET"])
+    def get_contact_resume_job(job_id):
+        """
+        Endpoint to poll a job: its status and the results from `offset` on.
+        """
+        try:
+            contact_resume_job_service = container.make("contact_resume_job_service")
+
+            response = contact_resume_job_service.get_job(
+                job_id,
+                offset=request.args.get("offset", 0, type=int),
+                limit=request.args.get("limit", 100, type=int),
+            )
+            if response is None:
+                return jsonify({"message": "Job not found", "status": 404}), 404
+
+            return jsonify({**response, "status": 200}), 200
+        except Exception as e:
+            return jsonify({"message": str(e), "status": 500}), 500
+
+    @cross_origin()
+    @app.route(
+        "/whatsapp/contact/resume/information/jobs/<job_id>/stream", methods=["GET"]
+    )
+    def stream_contact_resume_job(job_id):
+        """
+        Endpoint to receive the results of a job as Server-Sent Events.
+        """
+        contact_resume_job_service = container.make("contact_resume_job_service")
+
+        # Al reconectar, el navegador envía el id del último evento recibido.
+        last_event_id = request.headers.get("Last-Event-ID")
+        offset = (
+            int(last_event_id) + 1
+            if last_event_id and last_event_id.isdigit()
+            else request.args.get("offset", 0, type=int)
+        )
+
+        return Response(
+            stream_with_context(contact_resume_job_service.stream(job_id, offset)),
+            status=200,
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @cross_origin()
     @app.route("/whatsapp/send/message", methods=["POST"])
     def send_whatsapp_message():
@@ -0,0 +1,132 @@
+from application.services.llm.contact_resume_job_service import ContactResumeJobService
+from infrastructure.workers.rate_limiter import RateLimiter
+from infrastructure.workers.redis_job_store import RedisJobStore
+
+
+class FakeRetriveService:
+    def execute(self, *args, **kwargs):
+        return {"nombre": kwargs.get("telefono")}
+
+
+class ClosingWorkerPool:
+    """Keeps the submitted items without running them; closes after `capacity`."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.submitted = []
+
+    def submit(self, key, fn, *args):
+        if len(self.submitted) >= self.capacity:
+            raise RuntimeError("pool closed")
+        self.submitted.append((fn, args))
+
+    def run_all(self) -> None:
+        for fn, args in self.submitted:
+            fn(*args)
+
+
+def build_service(redis_connection, worker_pool) -> ContactResumeJobService:
+    return ContactResumeJobService(
+        FakeRetriveService(),
+        RedisJobStore(redis_connection),
+        worker_pool,
+        RateLimiter(requests_per_minute=6000, burst=10),
+    )
+
+
+ITEMS = [{"telefono": f"57300000000{index}", "conversation": []} for index in range(3)]
+
+
+def test_failed_dispatch_waits_for_the_items_already_in_the_pool(redis_connection):
+    pool = ClosingWorkerPool(capacity=2)
+    service = build_service(redis_connection, pool)
+    job = service.job_store.create("contact_resume", len(ITEMS))
+
+    service.dispatch(job["job_id"], ITEMS)
+
+    job_state, results, done = service.poll(job["job_id"], 0)
+    assert job_state["status"] == "failed"
+    assert job_state["running"] == 2
+    assert [result["index"] for result in results] == [2]
+    assert done is False
+
+    pool.run_all()
+
+    job_state, results, done = service.poll(job["job_id"], 1)
+    assert [result["status"] for result in results] == ["ok", "ok"]
+    assert job_state["running"] == 0
+    assert done is True
+
+
+def test_unstored_result_releases_the_item(redis_connection):
+    pool = ClosingWorkerPool(capacity=1)
+    service = build_service(redis_connection, pool)
+    job = service.job_store.create("contact_resume", 1)
+    service.dispatch(job["job_id"], ITEMS[:1])
+
+    def broken_add_result(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    service.job_store.add_result = broken_add_result
+    pool.run_all()
+
+    job_state, results, done = service.poll(job["job_id"], 0)
+    assert job_state["status"] == "failed"
+    assert job_state["running"] == 0
+    assert results == []
+    assert done is True
+
+
+class RateLimitedRetriveService:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    def execute(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return "An error occurred: Error code: 429 - rate limit exceeded"
+        return {"nombre": "Ana"}
+
+
+def test_rate_limited_item_pauses_every_worker_and_retries(redis_connection):
+    retrive = RateLimitedRetriveService(failures=2)
+    service = ContactResumeJobService(
+        retrive,
+        RedisJobStore(redis_connection),
+        ClosingWorkerPool(capacity=1),
+        RateLimiter(requests_per_minute=6000),
+        retry_backoff_seconds=0.01,
+    )
+    job = service.job_store.create("contact_resume", 1)
+
+    service.dispatch(job["job_id"], ITEMS[:1])
+    service.worker_pool.run_all()
+
+    job_state, results, done = service.poll(job["job_id"], 0)
+    assert retrive.calls == 3
+    assert service.rate_limiter.stats()["pauses"] == 2
+    assert results[0]["contact_resume_information"] == {"nombre": "Ana"}
+    assert (job_state["status"], done) == ("completed", True)
+
+
+def test_item_still_rate_limited_after_its_retries_is_recorded_as_error(redis_connection):
+    retrive = RateLimitedRetriveService(failures=5)
+    service = ContactResumeJobService(
+        retrive,
+        RedisJobStore(redis_connection),
+        ClosingWorkerPool(capacity=1),
+        RateLimiter(requests_per_minute=6000),
+        max_retries=1,
+        retry_backoff_seconds=0.01,
+    )
+    job = service.job_store.create("contact_resume", 1)
+
+    service.dispatch(job["job_id"], ITEMS[:1])
+    service.worker_pool.run_all()
+
+    job_state, results, done = service.poll(job["job_id"], 0)
+    assert retrive.calls == 2
+    assert results[0]["status"] == "error"
+    assert "429" in results[0]["error"]
+    assert (job_state["failed"], done) == (1, True)
@@ -0,0 +1,159 @@
+from application.services.whatsapp.messages_expiration_listener_service import (
+    MessagesExpirationListenerService,
+)
+from infrastructure.clients.whatsapp_client import DeliveryUnknownError
+from infrastructure.repositories.whatsapp_repository import WhatsappRepository
+from infrastructure.schedulers.redis_debounce_scheduler import RedisDebounceScheduler
+from infrastructure.workers.keyed_worker_pool import KeyedWorkerPool
+import pytest
+
+PHONE = "573001112233"
+
+
+class FakeBackendClient:
+    def get_contact_by_number(self, number):
+        return {"id": 7, "phone_number": number, "created_at": None, "updated_at": None}
+
+
+class FakeMessageWriter:
+    def __init__(self) -> None:
+        self.items = []
+
+    def put(self, item) -> None:
+        self.items.append((item["type_sender"], item["message"]))
+
+
+class FakeConversationService:
+    def __init__(self) -> None:
+        self.calls = []
+
+    def execute(self, builder_state, langraph_state, phone_number, message, deadline):
+        self.calls.append(message)
+        return {
+            "responses": [
+                {"format_type": "text", "response": {"message": f"{message} #{n}"}}
+                for n in (1, 2, 3)
+            ]
+        }
+
+
+class FakeSendMessageService:
+    """Fails (once) when sending the reply whose text ends with `fail_on`."""
+
+    def __init__(self, fail_on: str = None, error: Exception = None) -> None:
+        self.fail_on = fail_on
+        self.error = error or Exception("WhatsApp 500")
+        self.sent = []
+
+    def execute(self, phone_number, format_message, deadline=None):
+        text = format_message["text"]["body"]
+        if self.fail_on and text.endswith(self.fail_on):
+            self.fail_on = None
+            raise self.error
+        self.sent.append(text)
+
+
+class FakeLangGraphState:
+    def build_memory(self, phone_number, user_message, responses):
+        return {"user_phone": phone_number, "user_message": user_message}
+
+
+class FakeMemoryQueue:
+    def __init__(self) -> None:
+        self.items = []
+
+    def put(self, item) -> None:
+        self.items.append(item)
+
+
+@pytest.fixture
+def scheduler(redis_connection):
+    return RedisDebounceScheduler(redis_connection, max_attempts=3)
+
+
+@pytest.fixture
+def writer():
+    return FakeMessageWriter()
+
+
+@pytest.fixture
+def repository(redis_connection, scheduler, writer):
+    return WhatsappRepository(
+        FakeBackendClient(),
+        redis_connection,
+        scheduler,
+        buffer_window_seconds=0,
+        message_writer=writer,
+    )
+
+
+def build_listener(redis_connection, repository, scheduler, conversation, sender):
+    return MessagesExpirationListenerService(
+        redis_connection,
+        conversation,
+        sender,
+        None,
+        FakeLangGraphState(),
+        repository,
+        KeyedWorkerPool(max_workers=2),
+        scheduler,
+        FakeMemoryQueue(),
+        retry_delay_seconds=0,
+    )
+
+
+def run_turn(listener, scheduler):
+    key, due_at, token = scheduler.claim_due_with_times(1)[0]
+    listener.process_due_conversation(key, due_at, token)
+
+
+def test_retry_sends_only_the_undelivered_replies(
+    redis_connection, repository, scheduler, writer
+):
+    conversation = FakeConversationService()
+    sender = FakeSendMessageService(fail_on="#2")
+    listener = build_listener(redis_connection, repository, scheduler, conversation, sender)
+    repository.add_message_to_buffer(PHONE, "hola")
+
+    with pytest.raises(Exception):
+        run_turn(listener, scheduler)
+    run_turn(listener, scheduler)
+
+    assert conversation.calls == ["hola"]
+    assert sender.sent == ["hola #1", "hola #2", "hola #3"]
+    assistant_rows = [message for sender_type, message in writer.items if sender_type == "ASSISTANT"]
+    assert assistant_rows == [{"message": f"hola #{n}"} for n in (1, 2, 3)]
+    assert [m for t, m in writer.items if t == "USER"] == [{"message": "hola"}]
+    assert len(listener.memory_queue.items) == 1
+    assert repository.get_pending_replies(PHONE) == ([], 0, 0)
+
+
+def test_messages_that_arrive_before_the_retry_get_their_own_reply(
+    redis_connection, repository, scheduler
+):
+    conversation = FakeConversationService()
+    sender = FakeSendMessageService(fail_on="#3")
+    listener = build_listener(redis_connection, repository, scheduler, conversation, sender)
+    repository.add_message_to_buffer(PHONE, "hola")
+
+    with pytest.raises(Exception):
+        run_turn(listener, scheduler)
+    repository.add_message_to_buffer(PHONE, "gracias")
+    run_turn(listener, scheduler)
+
+    assert conversation.calls == ["hola", "gracias"]
+    assert sender.sent == [
+        "hola #1", "hola #2", "hola #3", "gracias #1", "gracias #2", "gracias #3",
+    ]
+
+
+def test_unconfirmed_delivery_is_not_resent(redis_connection, repository, scheduler):
+    conversation = FakeConversationService()
+    sender = FakeSendMessageService(fail_on="#1", error=DeliveryUnknownError("timeout"))
+    listener = build_listener(redis_connection, repository, scheduler, conversation, sender)
+    repository.add_message_to_buffer(PHONE, "hola")
+
+    run_turn(listener, scheduler)
+
+    assert sender.sent == ["hola #2", "hola #3"]
+    assert scheduler.claim_due(1) == []
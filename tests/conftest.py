@@ -0,0 +1,26 @@
+import fakeredis
+import pytest
+
+
+class FakeRedisConnection:
+    """DBConnectionInterface over fakeredis (Lua scripts included)."""
+
+    def __init__(self, client=None) -> None:
+        self.client = client or fakeredis.FakeRedis()
+
+    def is_connected(self) -> bool:
+        return True
+
+    def connect(self) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        pass
+
+    def get_connection(self):
+        return self.client
+
+
+@pytest.fixture
+def redis_connection():
+    return FakeRedisConnection()
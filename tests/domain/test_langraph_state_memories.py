@@ -0,0 +1,106 @@
+from domain.whatsapp.entities.langraph_state import LangGraphState
+from infrastructure.repositories.whatsapp_repository import WhatsappRepository
+from infrastructure.schedulers.redis_debounce_scheduler import RedisDebounceScheduler
+import pytest
+
+
+class FakeLLM:
+    def bind_tools(self, tools):
+        return self
+
+
+class FakeVectorStore:
+    def __init__(self, memories: list) -> None:
+        self.memories = memories
+        self.gets = []
+        self.searches = []
+
+    def max_marginal_relevance_search(self, query, k=4, fetch_k=20, filter=None):
+        self.searches.append(filter)
+        conditions = filter.get("$and", [filter])
+        return [
+            m["content"]
+            for m in self.memories
+            if all(m.get(field) == value for c in conditions for field, value in c.items())
+        ][:k]
+
+    def get(self, where=None, limit=None, include=None):
+        self.gets.append({"where": where, "limit": limit})
+        found = [m for m in self.memories if m["user_phone"] == where["user_phone"]]
+        found = found[:limit]
+        return {
+            "ids": [m["id"] for m in found],
+            "documents": [m["content"] for m in found],
+            "metadatas": [{"timestamp": m["timestamp"]} for m in found],
+        }
+
+
+@pytest.fixture
+def repository(redis_connection):
+    return WhatsappRepository(
+        None, redis_connection, RedisDebounceScheduler(redis_connection)
+    )
+
+
+def test_user_without_memories_is_looked_up_once(repository):
+    vectorstore = FakeVectorStore([])
+    state = LangGraphState(FakeLLM(), vectorstore, None, repository)
+
+    assert state.search_recent_memories("573001") == []
+    assert state.search_recent_memories("573001") == []
+
+    assert vectorstore.gets == [{"where": {"user_phone": "573001"}, "limit": 500}]
+
+
+def test_backfill_rebuilds_the_index_newest_first(repository):
+    vectorstore = FakeVectorStore(
+        [
+            {"id": str(ts), "user_phone": "573001", "content": f"m{ts}", "timestamp": ts}
+            for ts in range(1, 6)
+        ]
+    )
+    state = LangGraphState(
+        FakeLLM(), vectorstore, None, repository, recent_memories_backfill_limit=4
+    )
+
+    first = state.search_recent_memories("573001", limit=2)
+    second = state.search_recent_memories("573001", limit=2)
+
+    assert [doc.page_content for doc in first] == ["m4", "m3"]
+    assert [doc.page_content for doc in second] == ["m4", "m3"]
+    assert len(vectorstore.gets) == 1
+    assert vectorstore.gets[0]["limit"] == 4
+
+
+def test_relevant_memories_fall_back_to_any_topic(repository):
+    vectorstore = FakeVectorStore(
+        [{"user_phone": "573001", "topic": "agendar cita", "content": "quiere el lunes"}]
+    )
+    state = LangGraphState(FakeLLM(), vectorstore, None, repository)
+
+    memories = state.search_relevant_memories(
+        "¿tienen cita el lunes?", "573001", topic="agendamiento cita", max_age_days=None
+    )
+
+    assert memories == ["quiere el lunes"]
+    assert vectorstore.searches == [
+        {"$and": [{"user_phone": "573001"}, {"topic": "agendamiento cita"}]},
+        {"user_phone": "573001"},
+    ]
+
+
+def test_relevant_memories_keep_the_topic_filter_when_it_matches(repository):
+    vectorstore = FakeVectorStore(
+        [
+            {"user_phone": "573001", "topic": "pagos", "content": "pagó por nequi"},
+            {"user_phone": "573001", "topic": "saludo", "content": "hola"},
+        ]
+    )
+    state = LangGraphState(FakeLLM(), vectorstore, None, repository)
+
+    memories = state.search_relevant_memories(
+        "ya pagué", "573001", topic="pagos", max_age_days=None
+    )
+
+    assert memories == ["pagó por nequi"]
+    assert len(vectorstore.searches) == 1
@@ -0,0 +1,91 @@
+from domain.whatsapp.entities.deadline import Deadline
+from domain.whatsapp.entities.langraph_state import LangGraphState, TOOL_ERROR_RESPONSE
+import time
+
+
+class FakeLLM:
+    def bind_tools(self, tools):
+        return self
+
+
+class SlowCalendarClient:
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.calls = 0
+
+    def get_available_slots(self, calendar_id):
+        time.sleep(self.seconds)
+        return {"format_type": "text", "response": {"message": "slots"}}
+
+    def schedule_pre_consultation(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return {"format_type": "text", "response": {"message": "agendada"}}
+
+
+def build_state(calendar_client, **kwargs) -> LangGraphState:
+    return LangGraphState(FakeLLM(), None, calendar_client, None, **kwargs)
+
+
+SCHEDULE_CALL = {
+    "name": "schedule_pre_consultation",
+    "args": {
+        "full_name": "Ana Pérez",
+        "type_consultation": "VIRTUAL",
+        "user_phone": "573001112233",
+        "start": "2025-10-02T09:00:00",
+        "end": "2025-10-02T10:00:00",
+    },
+}
+
+
+def test_mutating_tool_is_awaited_past_its_timeout():
+    calendar = SlowCalendarClient(seconds=0.3)
+    state = build_state(calendar, default_tool_timeout_seconds=0.05)
+
+    responses = state.process_tool_calls([SCHEDULE_CALL], deadline=Deadline(0.05))
+
+    assert responses == [{"format_type": "text", "response": {"message": "agendada"}}]
+    assert calendar.calls == 1
+
+
+def test_read_only_tool_times_out_and_reports_error():
+    calendar = SlowCalendarClient(seconds=0.5)
+    state = build_state(
+        calendar, default_tool_timeout_seconds=0.05, min_tool_timeout_seconds=0.01
+    )
+
+    started_at = time.monotonic()
+    responses = state.process_tool_calls([{"name": "get_available_slots", "args": {}}])
+
+    assert responses == [TOOL_ERROR_RESPONSE]
+    assert time.monotonic() - started_at < 0.4
+
+
+def test_spent_budget_still_gives_tools_the_minimum_timeout():
+    calendar = SlowCalendarClient(seconds=0.1)
+    state = build_state(
+        calendar, default_tool_timeout_seconds=5, min_tool_timeout_seconds=1
+    )
+    deadline = Deadline(0)
+
+    assert state.get_tool_timeout("get_available_slots", deadline) == 1
+    responses = state.process_tool_calls(
+        [{"name": "get_available_slots", "args": {}}], deadline=deadline
+    )
+
+    assert responses == [{"format_type": "text", "response": {"message": "slots"}}]
+
+
+def test_tool_timeout_is_capped_by_the_remaining_budget():
+    state = build_state(
+        SlowCalendarClient(0), default_tool_timeout_seconds=15, min_tool_timeout_seconds=3
+    )
+
+    assert state.get_tool_timeout("get_available_slots") == 15
+    assert state.get_tool_timeout("get_available_slots", Deadline(60)) == 15
+    assert 5 < state.get_tool_timeout("get_available_slots", Deadline(6)) <= 6
+    # Un timeout configurado menor que el mínimo se respeta.
+    state.tool_timeouts = {"get_available_slots": 1}
+    assert state.get_tool_timeout("get_available_slots", Deadline(0)) == 1
+    assert state.get_tool_timeout("payment_received", Deadline(0)) is None
@@ -0,0 +1,88 @@
+from domain.assistants.entities.retriver_assistant import RetriverAssistant
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+from infrastructure.workers.rate_limiter import RateLimiter
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+import asyncio
+import json
+
+
+class WordContextBuilder:
+    """Counts one token per word."""
+
+    def count_tokens(self, text: str) -> int:
+        return len(text.split())
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return " ".join(text.split()[:max_tokens])
+
+
+def extraction(**user_info) -> str:
+    return json.dumps({"user_info": user_info})
+
+
+CONVERSATION = [
+    {"role": "user", "content": "hola soy Ana Pérez"},
+    {"role": "assistant", "content": "mucho gusto Ana"},
+    {"role": "user", "content": "mi correo es ana@correo.com"},
+    {"role": "user", "content": "mejor agendemos el martes"},
+]
+
+
+def build_assistant(responses, **kwargs) -> RetriverAssistant:
+    return RetriverAssistant(
+        FakeListChatModel(responses=responses),
+        context_builder=WordContextBuilder(),
+        **kwargs,
+    )
+
+
+def test_long_conversation_is_extracted_by_chunks_and_merged():
+    assistant = build_assistant(
+        [
+            extraction(primer_nombre="Ana", fecha_consulta="2025-10-01"),
+            extraction(email="ana@correo.com", fecha_consulta="2025-10-07"),
+        ],
+        chunk_token_budget=12,
+        max_concurrency=1,
+    )
+
+    response = assistant.invoke(conversation=CONVERSATION, telefono="573001")
+
+    user_info = response["user_info"]
+    assert user_info["primer_nombre"] == "Ana"
+    assert user_info["email"] == "ana@correo.com"
+    # El tramo posterior gana (cita reagendada).
+    assert user_info["fecha_consulta"] == "2025-10-07"
+    assert user_info["telefono"] == "573001"
+    assert user_info["tipo_documento"] == "CC"
+
+
+def test_every_chunk_takes_a_rate_limiter_token():
+    limiter = RateLimiter(requests_per_minute=0)
+    assistant = build_assistant(
+        [extraction(primer_nombre="Ana")] * 4,
+        chunk_token_budget=8,
+        rate_limiter=limiter,
+    )
+
+    inputs = assistant.build_inputs(CONVERSATION, "573001")
+    assistant.invoke(conversation=CONVERSATION, telefono="573001")
+    asyncio.run(assistant.ainvoke(conversation=CONVERSATION[:1], telefono="573002"))
+
+    assert len(inputs) > 1
+    assert limiter.stats()["acquired"] == len(inputs) + 1
+
+
+def test_cached_resume_skips_the_llm():
+    limiter = RateLimiter(requests_per_minute=0)
+    assistant = build_assistant(
+        [extraction(primer_nombre="Ana")],
+        result_cache=TTLLRUCache(max_size=10, ttl_seconds=60),
+        rate_limiter=limiter,
+    )
+
+    first = assistant.invoke(conversation=CONVERSATION, telefono="573001")
+    second = asyncio.run(assistant.ainvoke(conversation=CONVERSATION, telefono="573001"))
+
+    assert first == second
+    assert limiter.stats()["acquired"] == 1
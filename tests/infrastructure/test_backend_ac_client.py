@@ -0,0 +1,81 @@
+from infrastructure.clients.backend_ac_client import BackendACClient
+import json
+
+
+class FakeResponse:
+    def __init__(self, status_code: int) -> None:
+        self.status_code = status_code
+
+
+class FakeSession:
+    """Answers by path; single saves fail for the messages in `failing`."""
+
+    def __init__(self, bulk_status: int = 201, failing=()) -> None:
+        self.bulk_status = bulk_status
+        self.failing = set(failing)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        path = url.split("/whatsapp/")[1]
+        data = json.loads(kwargs["data"])
+        self.calls.append((path, data))
+        if path == "save/messages":
+            return FakeResponse(self.bulk_status)
+        return FakeResponse(500 if data["message"] in self.failing else 201)
+
+
+def build_client(session: FakeSession) -> BackendACClient:
+    client = BackendACClient("http://backend", "key")
+    client.session = session
+    return client
+
+
+def message(text: str) -> dict:
+    return {"contact_id": 1, "type_sender": "USER", "message": text}
+
+
+def test_bulk_save_returns_no_failures():
+    session = FakeSession(bulk_status=201)
+    client = build_client(session)
+
+    assert client.save_messages([message("a"), message("b")]) == []
+    assert [path for path, _ in session.calls] == ["save/messages"]
+
+
+def test_fallback_returns_only_the_failed_messages():
+    session = FakeSession(bulk_status=404, failing={"b"})
+    client = build_client(session)
+
+    failed = client.save_messages([message("a"), message("b"), message("c")])
+
+    assert failed == [message("b")]
+    assert [path for path, _ in session.calls] == [
+        "save/messages",
+        "save/message",
+        "save/message",
+        "save/message",
+    ]
+
+
+def test_missing_bulk_endpoint_is_remembered():
+    session = FakeSession(bulk_status=405)
+    client = build_client(session)
+
+    client.save_messages([message("a")])
+    client.save_messages([message("b")])
+
+    assert not client.bulk_messages_supported
+    assert [path for path, _ in session.calls] == [
+        "save/messages",
+        "save/message",
+        "save/message",
+    ]
+
+
+def test_bulk_error_reports_every_message():
+    client = build_client(FakeSession(bulk_status=500))
+
+    assert client.save_messages([message("a"), message("b")]) == [
+        message("a"),
+        message("b"),
+    ]
@@ -0,0 +1,51 @@
+from infrastructure.embeddings.cached_embeddings import CachedEmbeddings
+from conftest import FakeRedisConnection
+from langchain_core.embeddings import Embeddings
+
+
+class FakeEmbeddings(Embeddings):
+    model = "fake"
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[len(text) / 3, 0.1, 1 / 7] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_model_local_and_redis_return_the_same_vector(redis_connection):
+    model = FakeEmbeddings()
+    embeddings = CachedEmbeddings(model, redis_connection=redis_connection)
+    other_process = CachedEmbeddings(model, redis_connection=redis_connection)
+
+    from_model = embeddings.embed_query("hola")
+    from_local = embeddings.embed_query("hola")
+    from_redis = other_process.embed_query("hola")
+
+    assert from_model == from_local == from_redis
+    assert len(model.calls) == 1
+
+
+def test_redis_keeps_only_the_newest_vectors(redis_connection):
+    embeddings = CachedEmbeddings(
+        FakeEmbeddings(), redis_connection=redis_connection, redis_max_size=2
+    )
+
+    for text in ("uno", "dos", "tres"):
+        embeddings.embed_query(text)
+
+    client = redis_connection.get_connection()
+    assert client.zcard(embeddings.index_key) == 2
+    assert client.get(embeddings.key("uno")) is None
+    assert client.get(embeddings.key("tres")) is not None
+
+    # Otro proceso vuelve a pedir al modelo solo el vector descartado.
+    model = FakeEmbeddings()
+    CachedEmbeddings(model, redis_connection=FakeRedisConnection(client)).embed_documents(
+        ["uno", "dos", "tres"]
+    )
+    assert model.calls == [["uno"]]
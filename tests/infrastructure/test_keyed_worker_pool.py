@@ -0,0 +1,81 @@
+from infrastructure.workers.keyed_worker_pool import KeyedWorkerPool
+from threading import Event, Lock
+import time
+
+
+def test_tasks_of_a_key_run_in_submission_order_and_never_overlap():
+    pool = KeyedWorkerPool(max_workers=4)
+    runs = {"a": [], "b": []}
+    running = set()
+    overlaps = []
+    lock = Lock()
+
+    def task(key, index):
+        with lock:
+            if key in running:
+                overlaps.append((key, index))
+            running.add(key)
+        time.sleep(0.005)
+        with lock:
+            running.discard(key)
+            runs[key].append(index)
+
+    futures = [pool.submit(key, task, key, i) for i in range(10) for key in ("a", "b")]
+    for future in futures:
+        future.result(timeout=5)
+    pool.shutdown()
+
+    assert runs == {"a": list(range(10)), "b": list(range(10))}
+    assert overlaps == []
+
+
+def test_a_slow_key_does_not_block_the_others():
+    pool = KeyedWorkerPool(max_workers=2)
+    release = Event()
+
+    slow = pool.submit("slow", release.wait, 5)
+    fast = [pool.submit("fast", lambda i=i: i) for i in range(3)]
+
+    assert [future.result(timeout=2) for future in fast] == [0, 1, 2]
+    assert not slow.done()
+    release.set()
+    assert slow.result(timeout=2) is True
+    pool.shutdown()
+
+
+def test_failed_task_keeps_the_key_running():
+    pool = KeyedWorkerPool(max_workers=1)
+
+    def boom():
+        raise ValueError("boom")
+
+    failed = pool.submit("a", boom)
+    after = pool.submit("a", lambda: "ok")
+
+    assert isinstance(failed.exception(timeout=2), ValueError)
+    assert after.result(timeout=2) == "ok"
+    pool.shutdown()
+    assert pool.stats()["failed"] == 1
+    assert pool.stats()["completed"] == 1
+
+
+def test_idle_workers_counts_running_and_queued_tasks():
+    pool = KeyedWorkerPool(max_workers=3)
+    release = Event()
+    assert pool.idle_workers() == 3
+
+    started = [Event(), Event()]
+    for index, event in enumerate(started):
+        pool.submit(f"key-{index}", lambda e=event: (e.set(), release.wait(5)))
+    for event in started:
+        assert event.wait(2)
+    assert pool.idle_workers() == 1
+
+    queued = pool.submit("key-0", lambda: "queued")
+    assert pool.idle_workers() == 0
+
+    release.set()
+    pool.shutdown()
+    assert pool.idle_workers() == 3
+    # El apagado espera también a la tarea que quedó detrás de su clave.
+    assert queued.result(timeout=0) == "queued"
@@ -0,0 +1,57 @@
+from infrastructure.workers.rate_limiter import RateLimiter
+from threading import Thread
+import time
+
+
+def test_burst_starts_right_away_and_then_follows_the_rate():
+    limiter = RateLimiter(requests_per_minute=600, burst=3)
+
+    waits = [limiter.acquire() for _ in range(4)]
+
+    assert all(wait < 0.02 for wait in waits[:3])
+    # 600/min = un token cada 0.1 s.
+    assert 0.05 < waits[3] < 0.2
+
+
+def test_zero_rate_is_unlimited():
+    limiter = RateLimiter(requests_per_minute=0)
+
+    started_at = time.monotonic()
+    for _ in range(100):
+        limiter.acquire()
+
+    assert time.monotonic() - started_at < 0.1
+    assert limiter.stats()["acquired"] == 100
+
+
+def test_pause_holds_every_worker_and_drops_the_burst():
+    limiter = RateLimiter(requests_per_minute=600, burst=5)
+    limiter.pause(0.2)
+    waits = []
+
+    workers = [Thread(target=lambda: waits.append(limiter.acquire())) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(2)
+
+    assert len(waits) == 2
+    assert min(waits) >= 0.15
+    # Tras la pausa queda un solo token: el segundo espera al siguiente.
+    assert max(waits) - min(waits) > 0.05
+    assert limiter.stats()["pauses"] == 1
+
+
+def test_concurrent_workers_share_the_rate():
+    limiter = RateLimiter(requests_per_minute=1200, burst=1)
+
+    started_at = time.monotonic()
+    workers = [Thread(target=limiter.acquire) for _ in range(5)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(2)
+
+    # 1 inmediato + 4 tokens a 20/s.
+    assert time.monotonic() - started_at >= 0.18
+    assert limiter.stats()["acquired"] == 5
@@ -0,0 +1,85 @@
+from infrastructure.checkpoints.redis_checkpoint_saver import RedisCheckpointSaver
+from langgraph.graph import END, START, StateGraph
+from typing import Annotated, TypedDict
+import asyncio
+import operator
+
+
+class TurnState(TypedDict):
+    messages: Annotated[list, operator.add]
+
+
+def build_graph(saver: RedisCheckpointSaver):
+    graph = StateGraph(TurnState)
+    graph.add_node("reply", lambda state: {"messages": [f"eco {len(state['messages'])}"]})
+    graph.add_edge(START, "reply")
+    graph.add_edge("reply", END)
+    return graph.compile(checkpointer=saver)
+
+
+def thread(phone: str) -> dict:
+    return {"configurable": {"thread_id": phone}}
+
+
+def test_conversation_state_survives_between_turns_and_processes(redis_connection):
+    build_graph(RedisCheckpointSaver(redis_connection)).invoke(
+        {"messages": ["hola"]}, thread("573001")
+    )
+
+    # Otro proceso (otro saver) continúa la misma conversación.
+    graph = build_graph(RedisCheckpointSaver(redis_connection))
+    result = graph.invoke({"messages": ["¿y la cita?"]}, thread("573001"))
+
+    assert result["messages"] == ["hola", "eco 1", "¿y la cita?", "eco 3"]
+    assert graph.get_state(thread("573002")).values == {}
+
+
+def test_history_is_listed_newest_first_and_trimmed(redis_connection):
+    saver = RedisCheckpointSaver(redis_connection, max_checkpoints=3)
+    graph = build_graph(saver)
+    for turn in range(3):
+        graph.invoke({"messages": [f"m{turn}"]}, thread("573001"))
+
+    history = list(saver.list(thread("573001")))
+    steps = [checkpoint.metadata["step"] for checkpoint in history]
+
+    assert steps == sorted(steps, reverse=True)
+    assert len(history) == 3
+    assert history[0].checkpoint["channel_values"]["messages"][-1] == "eco 5"
+    assert [c.metadata["step"] for c in saver.list(thread("573001"), limit=1)] == steps[:1]
+    assert list(saver.list(thread("573001"), before=history[1].config)) == history[2:]
+
+
+def test_pending_writes_are_returned_with_their_checkpoint(redis_connection):
+    saver = RedisCheckpointSaver(redis_connection)
+    build_graph(saver).invoke({"messages": ["hola"]}, thread("573001"))
+    config = saver.get_tuple(thread("573001")).config
+
+    saver.put_writes(config, [("messages", ["a"]), ("messages", ["b"])], "task-1")
+    saver.put_writes(config, [("messages", ["otro"])], "task-1")
+
+    writes = saver.get_tuple(config).pending_writes
+    assert writes == [("task-1", "messages", ["a"]), ("task-1", "messages", ["b"])]
+
+
+def test_delete_thread_removes_only_that_conversation(redis_connection):
+    saver = RedisCheckpointSaver(redis_connection)
+    graph = build_graph(saver)
+    graph.invoke({"messages": ["hola"]}, thread("573001"))
+    graph.invoke({"messages": ["hola"]}, thread("5730011"))
+
+    saver.delete_thread("573001")
+
+    assert saver.get_tuple(thread("573001")) is None
+    assert saver.get_tuple(thread("5730011")) is not None
+
+
+def test_async_methods_match_the_sync_ones(redis_connection):
+    saver = RedisCheckpointSaver(redis_connection)
+    graph = build_graph(saver)
+
+    result = asyncio.run(graph.ainvoke({"messages": ["hola"]}, thread("573001")))
+
+    assert result["messages"] == ["hola", "eco 1"]
+    latest = asyncio.run(saver.aget_tuple(thread("573001")))
+    assert latest == saver.get_tuple(thread("573001"))
@@ -0,0 +1,97 @@
+from infrastructure.schedulers.redis_debounce_scheduler import RedisDebounceScheduler
+import pytest
+import time
+
+
+@pytest.fixture
+def scheduler(redis_connection):
+    return RedisDebounceScheduler(redis_connection, lease_seconds=60, max_attempts=2)
+
+
+def claim_one(scheduler):
+    claimed = scheduler.claim_due_with_times(10)
+    assert len(claimed) == 1
+    return claimed[0]
+
+
+def test_only_due_keys_are_claimed(scheduler):
+    scheduler.schedule("573001", 0)
+    scheduler.schedule("573002", 60)
+
+    assert scheduler.claim_due(10) == ["573001"]
+    assert scheduler.claim_due(10) == []
+
+
+def test_rescheduling_restarts_the_debounce_window(scheduler):
+    scheduler.schedule("573001", 0)
+    scheduler.schedule("573001", 60)
+
+    assert scheduler.claim_due(10) == []
+
+
+def test_a_key_in_process_is_not_claimed_twice(scheduler):
+    scheduler.schedule("573001", 0)
+    key, _, token = claim_one(scheduler)
+    # Llega otro mensaje mientras el turno está en proceso.
+    scheduler.schedule(key, 0)
+
+    assert scheduler.claim_due(10) == []
+    assert scheduler.ack(key, token=token)
+    assert scheduler.claim_due(10) == [key]
+
+
+def test_claim_respects_the_limit(scheduler):
+    for number in range(5):
+        scheduler.schedule(f"57300{number}", 0)
+
+    assert len(scheduler.claim_due(2)) == 2
+    assert scheduler.claim_due(0) == []
+    assert len(scheduler.claim_due(10)) == 3
+
+
+def test_expired_lease_is_redelivered_and_the_old_claim_loses_it(scheduler):
+    scheduler.lease_seconds = 0
+    scheduler.schedule("573001", 0)
+    key, _, old_token = claim_one(scheduler)
+    time.sleep(0.01)
+
+    assert scheduler.requeue_expired() == [key]
+    scheduler.lease_seconds = 60
+    _, _, new_token = claim_one(scheduler)
+
+    # El primer consumidor termina tarde: no libera el claim del segundo.
+    assert not scheduler.ack(key, token=old_token)
+    assert not scheduler.extend_lease(key, old_token)
+    assert scheduler.nack(key, 0, token=old_token)
+    assert scheduler.claim_due(10) == []
+    assert scheduler.ack(key, token=new_token)
+
+
+def test_extend_lease_keeps_the_key_from_being_requeued(scheduler, redis_connection):
+    scheduler.schedule("573001", 0)
+    key, _, token = claim_one(scheduler)
+    client = redis_connection.get_connection()
+    client.zadd(scheduler.processing_key, {key: time.time() - 1})
+
+    assert scheduler.extend_lease(key, token)
+    assert scheduler.requeue_expired() == []
+    assert client.zscore(scheduler.processing_key, key) > time.time()
+
+
+def test_nack_reschedules_until_max_attempts_then_drops(scheduler, redis_connection):
+    client = redis_connection.get_connection()
+    dropped = []
+    scheduler.schedule("573001", 0)
+
+    key, _, token = claim_one(scheduler)
+    assert scheduler.nack(key, 0, on_drop=dropped.append, token=token)
+    assert dropped == []
+
+    key, _, token = claim_one(scheduler)
+    assert not scheduler.nack(
+        key, 0, on_drop=lambda pipeline: pipeline.set("dropped", key), token=token
+    )
+    assert client.get("dropped") == key.encode()
+    assert scheduler.claim_due(10) == []
+    assert client.hget(scheduler.attempts_key, key) is None
+    assert client.zscore(scheduler.processing_key, key) is None
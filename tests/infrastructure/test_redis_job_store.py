@@ -0,0 +1,40 @@
+from infrastructure.workers.redis_job_store import RedisJobStore
+
+
+def test_last_result_completes_the_job(redis_connection):
+    store = RedisJobStore(redis_connection)
+    job = store.create("contact_resume", 2)
+    store.add_running(job["job_id"], 2)
+
+    assert store.add_result(job["job_id"], {"index": 0}) is False
+    assert store.add_result(job["job_id"], {"index": 1}, failed=True) is True
+
+    saved = store.get(job["job_id"])
+    assert saved["status"] == "completed"
+    assert (saved["completed"], saved["failed"], saved["running"]) == (1, 1, 0)
+    assert store.get_results(job["job_id"]) == [{"index": 0}, {"index": 1}]
+
+
+def test_failed_job_stays_failed_when_its_results_arrive(redis_connection):
+    store = RedisJobStore(redis_connection)
+    job = store.create("contact_resume", 1)
+
+    store.fail(job["job_id"], "boom")
+    assert store.add_result(job["job_id"], {"index": 0}, running=False) is True
+
+    saved = store.get(job["job_id"])
+    assert (saved["status"], saved["error"], saved["completed"]) == ("failed", "boom", 1)
+
+
+def test_updates_of_an_expired_job_are_dropped(redis_connection):
+    store = RedisJobStore(redis_connection)
+    job = store.create("contact_resume", 2)
+    redis_connection.get_connection().delete(store.job_key(job["job_id"]))
+
+    assert store.add_result(job["job_id"], {"index": 0}) is False
+    assert store.fail(job["job_id"], "boom") is False
+    assert store.set_status(job["job_id"], "running") is False
+    assert store.add_running(job["job_id"]) is False
+
+    assert store.get(job["job_id"]) is None
+    assert store.get_results(job["job_id"]) == []
@@ -0,0 +1,116 @@
+from infrastructure.workers.redis_stream_queue import RedisStreamQueue
+import json
+import time
+
+
+class FlakyHandler:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(items)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("vector store down")
+
+
+def build_queue(redis_connection, handler, **kwargs) -> RedisStreamQueue:
+    queue = RedisStreamQueue(
+        redis_connection, "memories", "writers", handler, block_ms=10, **kwargs
+    )
+    queue._ensure_group()
+    return queue
+
+
+def test_processed_entries_are_acked_and_deleted(redis_connection):
+    handler = FlakyHandler()
+    queue = build_queue(redis_connection, handler)
+    queue.put({"user": "573001"})
+    queue.put({"user": "573002"})
+
+    queue._process(queue._read_new())
+
+    assert handler.batches == [[{"user": "573001"}, {"user": "573002"}]]
+    assert queue.stats()["length"] == 0
+    assert queue.stats()["pending"] == 0
+
+
+def test_failed_batch_is_reclaimed_and_retried(redis_connection):
+    handler = FlakyHandler(failures=1)
+    queue = build_queue(redis_connection, handler, claim_idle_ms=0)
+    queue.put({"user": "573001"})
+
+    queue._process(queue._read_new())
+    assert queue.stats()["pending"] == 1
+
+    queue._process(queue._claim_stale())
+
+    assert handler.batches == [[{"user": "573001"}], [{"user": "573001"}]]
+    assert queue.stats()["pending"] == 0
+    assert queue.stats()["reclaimed"] == 1
+
+
+def test_entries_of_a_dead_consumer_are_claimed_by_another(redis_connection):
+    dead = build_queue(redis_connection, FlakyHandler(), claim_idle_ms=0)
+    dead.consumer = "dead-consumer"
+    dead.put({"user": "573001"})
+    assert len(dead._read_new()) == 1
+
+    handler = FlakyHandler()
+    alive = build_queue(redis_connection, handler, claim_idle_ms=0)
+    alive._process(alive._claim_stale())
+
+    assert handler.batches == [[{"user": "573001"}]]
+    assert alive.stats()["pending"] == 0
+
+
+def test_claim_follows_the_cursor_across_batches(redis_connection):
+    handler = FlakyHandler(failures=1)
+    queue = build_queue(redis_connection, handler, claim_idle_ms=0, batch_size=2)
+    for index in range(3):
+        queue.put({"index": index})
+
+    queue.batch_size = 3
+    queue._process(queue._read_new())
+    queue.batch_size = 2
+
+    first = queue._claim_stale()
+    queue._process(first)
+    second = queue._claim_stale()
+
+    assert [json.loads(f[b"data"])["index"] for _, f in first] == [0, 1]
+    assert [json.loads(f[b"data"])["index"] for _, f in second] == [2]
+
+
+def test_entry_over_max_deliveries_goes_to_the_dead_stream(redis_connection):
+    handler = FlakyHandler(failures=10)
+    queue = build_queue(redis_connection, handler, claim_idle_ms=0, max_deliveries=2)
+    queue.put({"user": "573001"})
+
+    queue._process(queue._read_new())
+    for _ in range(2):
+        queue._process(queue._claim_stale())
+    assert queue._claim_stale() == []
+
+    client = redis_connection.get_connection()
+    dead = client.xrange("memories:dead")
+    assert [json.loads(fields[b"data"]) for _, fields in dead] == [{"user": "573001"}]
+    assert queue.stats()["pending"] == 0
+    assert queue.stats()["length"] == 0
+    assert len(handler.batches) == 3
+
+
+def test_worker_thread_processes_new_entries(redis_connection):
+    handler = FlakyHandler()
+    queue = build_queue(redis_connection, handler)
+    queue.start()
+    try:
+        queue.put({"user": "573001"})
+        deadline = time.monotonic() + 3
+        while not handler.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        queue.stop()
+
+    assert handler.batches == [[{"user": "573001"}]]
@@ -0,0 +1,51 @@
+from infrastructure.repositories.whatsapp_repository import WhatsappRepository
+from infrastructure.schedulers.redis_debounce_scheduler import RedisDebounceScheduler
+import pytest
+
+
+@pytest.fixture
+def scheduler(redis_connection):
+    return RedisDebounceScheduler(redis_connection, max_attempts=1)
+
+
+@pytest.fixture
+def repository(redis_connection, scheduler):
+    return WhatsappRepository(None, redis_connection, scheduler, buffer_window_seconds=0)
+
+
+def test_failed_turn_is_retried_with_the_same_messages(repository):
+    repository.add_message_to_buffer("573001", "hola")
+    repository.add_message_to_buffer("573001", "quiero una cita")
+
+    messages, new_messages = repository.drain_message_buffer("573001")
+    assert messages == new_messages == ["hola", "quiero una cita"]
+
+    # El turno falla; mientras tanto llega otro mensaje.
+    repository.add_message_to_buffer("573001", "gracias")
+    messages, new_messages = repository.drain_message_buffer("573001")
+    assert messages == ["hola", "quiero una cita", "gracias"]
+    assert new_messages == ["gracias"]
+
+    repository.ack_message_buffer("573001")
+    assert repository.drain_message_buffer("573001") == ([], [])
+
+
+def test_dropped_turn_moves_its_messages_to_the_dead_letter_list(
+    repository, scheduler, redis_connection
+):
+    repository.add_message_to_buffer("573001", "hola")
+    key, _, token = scheduler.claim_due_with_times(1)[0]
+    repository.drain_message_buffer(key)
+
+    dropped = scheduler.nack(
+        key,
+        0,
+        on_drop=lambda pipeline: repository.dead_letter_message_buffer(key, pipeline),
+        token=token,
+    )
+
+    client = redis_connection.get_connection()
+    assert dropped is False
+    assert client.lrange("whatsapp:dead:573001", 0, -1) == [b"hola"]
+    assert client.ttl("whatsapp:dead:573001") > 0
+    assert repository.drain_message_buffer(key) == ([], [])
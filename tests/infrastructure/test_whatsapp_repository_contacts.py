@@ -0,0 +1,60 @@
+from infrastructure.caches.ttl_lru_cache import TTLLRUCache
+from infrastructure.repositories.whatsapp_repository import WhatsappRepository
+from infrastructure.schedulers.redis_debounce_scheduler import RedisDebounceScheduler
+from conftest import FakeRedisConnection
+import fakeredis
+import time
+
+CONTACT = {"id": 7, "name": "Ana", "phone": "573001"}
+
+
+def build_repository(server, shared: bool = False) -> WhatsappRepository:
+    connection = FakeRedisConnection(fakeredis.FakeRedis(server=server))
+    return WhatsappRepository(
+        None,
+        connection,
+        RedisDebounceScheduler(connection),
+        contact_cache=TTLLRUCache(ttl_seconds=600),
+        share_contact_cache=shared,
+    )
+
+
+def wait_until(condition, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_invalidation_reaches_the_local_cache_of_other_processes():
+    server = fakeredis.FakeServer()
+    webhook, listener = build_repository(server), build_repository(server)
+    try:
+        webhook.cache_contact("573001", CONTACT)
+        listener.cache_contact("573001", CONTACT)
+
+        webhook.invalidate_contact_by_id(7)
+
+        assert webhook.get_cached_contact("573001") is None
+        assert wait_until(lambda: listener.get_cached_contact("573001") is None)
+    finally:
+        webhook.close_connections()
+        listener.close_connections()
+
+
+def test_invalidation_drops_the_shared_copy():
+    server = fakeredis.FakeServer()
+    webhook, listener = build_repository(server, True), build_repository(server, True)
+    try:
+        webhook.cache_contact("573001", CONTACT)
+        assert listener.get_cached_contact("573001") == CONTACT
+
+        listener.invalidate_contact_by_id(7)
+
+        assert wait_until(lambda: webhook.get_cached_contact("573001") is None)
+        assert listener.get_cached_contact("573001") is None
+    finally:
+        webhook.close_connections()
+        listener.close_connections()
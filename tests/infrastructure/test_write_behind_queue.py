@@ -0,0 +1,70 @@
+from infrastructure.workers.write_behind_queue import WriteBehindQueue
+
+
+def build_queue(flush_fn, **kwargs) -> WriteBehindQueue:
+    return WriteBehindQueue(
+        flush_fn,
+        max_batch_size=10,
+        flush_interval_seconds=0.01,
+        retry_backoff_seconds=0,
+        **kwargs,
+    )
+
+
+def test_items_are_flushed_in_batches_on_close():
+    batches = []
+    writer = build_queue(batches.append)
+
+    for item in range(25):
+        writer.put(item)
+    writer.close()
+
+    assert sorted(item for batch in batches for item in batch) == list(range(25))
+    assert all(len(batch) <= 10 for batch in batches)
+    assert writer.stats()["flushed_items"] == 25
+
+
+def test_partial_failure_retries_only_the_failed_items():
+    attempts = []
+
+    def flush(batch):
+        attempts.append(list(batch))
+        # El item 2 se guarda recién en el segundo intento.
+        return [item for item in batch if item == 2 and len(attempts) == 1]
+
+    writer = build_queue(flush)
+    writer._flush([1, 2, 3])
+
+    assert attempts == [[1, 2, 3], [2]]
+    stats = writer.stats()
+    assert stats["flushed_items"] == 3
+    assert stats["failed_attempts"] == 1
+    assert stats["dropped_items"] == 0
+
+
+def test_batch_is_dropped_after_max_retries():
+    attempts = []
+
+    def flush(batch):
+        attempts.append(list(batch))
+        raise Exception("backend down")
+
+    writer = build_queue(flush, max_retries=2)
+    writer._flush([1, 2])
+
+    assert len(attempts) == 3
+    assert writer.stats()["dropped_items"] == 2
+
+
+def test_false_means_the_whole_batch_failed():
+    attempts = []
+
+    def flush(batch):
+        attempts.append(list(batch))
+        return len(attempts) > 1 or False
+
+    writer = build_queue(flush)
+    writer._flush([1, 2])
+
+    assert attempts == [[1, 2], [1, 2]]
+    assert writer.stats()["flushed_items"] == 2